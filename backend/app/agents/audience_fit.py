@@ -1,20 +1,14 @@
-from typing import Dict
-from langchain_openai import ChatOpenAI
+from typing import Dict, List, Optional
 from langchain_core.prompts import ChatPromptTemplate
 
 from ..config import settings
+from .context import pack_sections
+from .runtime import get_llm
 
+TEMPERATURE = 0.3
 
-def run_audience_fit(concept: str, scout_analysis: str) -> Dict[str, str]:
+prompt = ChatPromptTemplate.from_template(
     """
-    Audience Fit Agent:
-    Takes the concept + content scout analysis and infers target audience,
-    regions, age groups, and possible localization needs.
-    """
-    llm = ChatOpenAI(model=settings.CHAT_MODEL, temperature=0.3)
-
-    prompt = ChatPromptTemplate.from_template(
-        """
 You are an Audience Fit Agent for a global streaming platform.
 
 User concept:
@@ -23,8 +17,12 @@ User concept:
 Content Scout Analysis:
 {scout}
 
+Target regions requested:
+{regions}
+
 Task:
-1. Identify likely target regions (continents / example countries).
+1. Identify likely target regions (continents / example countries), and
+   assess the fit in any requested regions.
 2. Identify likely age ranges (e.g., 13–17, 18–34, 35+).
 3. Identify audience segments (e.g., young adults, families, cinephiles, thriller fans).
 4. Point out potential cultural sensitivities or localization needs (if any).
@@ -32,9 +30,45 @@ Task:
 
 Answer in markdown bullet points.
 """
+)
+
+
+def _build_audience_fit(concept: str, scout_analysis: str, target_regions: Optional[List[str]] = None):
+    llm = get_llm(settings.CHAT_MODEL, TEMPERATURE)
+    packed, _ = pack_sections(
+        {"scout": scout_analysis}, settings.CONTEXT_BUDGET_AUDIENCE_FIT, agent="audience_fit"
     )
+    regions = ", ".join(target_regions) if target_regions else "None specified."
+    msgs = prompt.format_messages(concept=concept, regions=regions, **packed)
+    return llm, msgs
 
-    msgs = prompt.format_messages(concept=concept, scout=scout_analysis)
+
+async def arun_audience_fit(
+    concept: str,
+    scout_analysis: str,
+    target_regions: Optional[List[str]] = None,
+) -> Dict[str, str]:
+    """
+    Audience Fit Agent:
+    Takes the concept + content scout analysis (and any requested target
+    regions) and infers target audience, regions, age groups, and possible
+    localization needs.
+    """
+    llm, msgs = _build_audience_fit(concept, scout_analysis, target_regions)
+    resp = await llm.ainvoke(msgs)
+
+    return {"audience_insights": resp.content}
+
+
+def run_audience_fit(
+    concept: str,
+    scout_analysis: str,
+    target_regions: Optional[List[str]] = None,
+) -> Dict[str, str]:
+    """
+    Blocking variant of arun_audience_fit for scripts and notebooks.
+    """
+    llm, msgs = _build_audience_fit(concept, scout_analysis, target_regions)
     resp = llm.invoke(msgs)
 
-    return {"audience_insights": resp.content}
\ No newline at end of file
+    return {"audience_insights": resp.content}
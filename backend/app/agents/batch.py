@@ -0,0 +1,135 @@
+import argparse
+import asyncio
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from ..config import settings
+from ..utils.limiter import request_priority
+from .runtime import get_runtime, shutdown_runtime
+from .tools import asearch_many
+
+
+async def aprefetch_similar(states: List[Dict[str, Any]]) -> None:
+    """
+    Retrieve similar titles for every state in one batched search and store
+    them on the states, so the graph's retrieve node skips its own search.
+    Mirrors retrieve_node, including the unfiltered fallback.
+    """
+    t0 = time.perf_counter()
+    concepts = [s["concept"] for s in states]
+    filters = [s.get("filters") or None for s in states]
+
+    found = await asearch_many(concepts, filters)
+    fallback = [i for i, f in enumerate(filters) if f and not found[i]]
+    if fallback:
+        again = await asearch_many([concepts[i] for i in fallback])
+        for i, similar in zip(fallback, again):
+            found[i] = similar
+
+    elapsed_ms = round((time.perf_counter() - t0) * 1000, 2)
+    for i, state in enumerate(states):
+        state["similar_titles"] = found[i]
+        state["retrieval_stats"] = {
+            "searches": 2 if i in fallback else 1,
+            "results": len(found[i]),
+            "filters": filters[i] or {},
+            "filter_fallback": i in fallback,
+            "elapsed_ms": elapsed_ms,
+            "batch_size": len(states),
+        }
+
+
+async def arun_batch(
+    states: List[Dict[str, Any]],
+    concurrency: Optional[int] = None,
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Run the analysis graph over many states with at most `concurrency`
+    graphs in flight, yielding one item per state as soon as it finishes
+    (completion order, not input order):
+
+        {"index", "ok", "result" | "error", "queued_ms", "elapsed_ms"}
+
+    A failing item never aborts the batch. If the consumer stops early the
+    remaining graphs are cancelled. Their provider calls run at "batch"
+    priority, behind interactive requests.
+    """
+    graph = get_runtime().graph
+    semaphore = asyncio.Semaphore(max(1, concurrency or settings.BATCH_CONCURRENCY))
+
+    try:
+        with request_priority("batch"):
+            await aprefetch_similar(states)
+    except Exception as exc:
+        # per-item retrieval inside the graph still works, just slower
+        print(f"[WARN] Batched retrieval failed, falling back to per-item search: {exc}")
+        for state in states:
+            state.pop("similar_titles", None)
+
+    submitted = time.perf_counter()
+
+    async def run_one(index: int, state: Dict[str, Any]) -> Dict[str, Any]:
+        async with semaphore:
+            started = time.perf_counter()
+            item: Dict[str, Any] = {"index": index, "queued_ms": round((started - submitted) * 1000, 2)}
+            try:
+                item["result"] = await graph.ainvoke(state)
+                item["ok"] = True
+            except Exception as exc:
+                item["ok"] = False
+                item["error"] = f"{type(exc).__name__}: {exc}"
+            item["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 2)
+            return item
+
+    # tasks copy the current context, priority included
+    with request_priority("batch"):
+        tasks = [asyncio.create_task(run_one(i, s)) for i, s in enumerate(states)]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+async def _run_cli(source: Path, out, concurrency: Optional[int]) -> None:
+    # imported here: the request model and response shaping live with the route
+    from ..routes.analyze import TitleAnalysisRequest, batch_events
+
+    text = source.read_text(encoding="utf-8")
+    if text.lstrip().startswith("["):
+        rows = json.loads(text)
+    else:
+        rows = [json.loads(line) for line in text.splitlines() if line.strip()]
+    requests = [TitleAnalysisRequest(**row) for row in rows]
+
+    try:
+        async for event in batch_events(requests, concurrency):
+            out.write(json.dumps(event, ensure_ascii=False) + "\n")
+            out.flush()
+    finally:
+        await shutdown_runtime()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Analyze a slate of title concepts (JSON list or JSONL of analyze_title requests)."
+    )
+    parser.add_argument("input", type=Path, help="file of TitleAnalysisRequest objects")
+    parser.add_argument("-o", "--output", type=Path, help="NDJSON output file (default: stdout)")
+    parser.add_argument("--concurrency", type=int, help=f"graphs in flight (default {settings.BATCH_CONCURRENCY})")
+    args = parser.parse_args()
+
+    out = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    try:
+        asyncio.run(_run_cli(args.input, out, args.concurrency))
+    finally:
+        if args.output:
+            out.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,28 +1,17 @@
-from typing import Dict, List, Any
-from langchain_openai import ChatOpenAI
+from typing import Dict, List, Any, Optional, Union
 from langchain_core.prompts import ChatPromptTemplate
 
 from ..config import settings
-from .tools import search_similar_titles
+from ..rag.analytics import get_catalog_analytics, infer_segment, render_segment
+from ..rag.filters import TitleFilters
+from .context import pack_titles
+from .runtime import get_llm
+from .tools import search_similar_titles, asearch_similar_titles
 
+TEMPERATURE = 0.35
 
-def run_competitive(concept: str) -> Dict[str, str]:
+prompt = ChatPromptTemplate.from_template(
     """
-    Competitive Intelligence Agent:
-    Uses semantic search to find similar titles and reasons about
-    how saturated or open the market space is.
-    """
-    llm = ChatOpenAI(model=settings.CHAT_MODEL, temperature=0.35)
-
-    # Step 1: use RAG tool to find similar titles
-    similar: List[Dict[str, Any]] = search_similar_titles.func(concept)
-
-    similar_str = "\n".join(
-        [f"- {s['title']}: {s['snippet'][:300]}..." for s in similar]
-    )
-
-    prompt = ChatPromptTemplate.from_template(
-        """
 You are a Competitive Intelligence Agent for a streaming platform.
 
 New concept:
@@ -31,8 +20,12 @@ New concept:
 Here are some similar titles already in the catalog:
 {similar}
 
+Catalog saturation metrics (exact, computed over the whole catalog):
+{market}
+
 Task:
-1. Assess how crowded/saturated this space is (high / medium / low).
+1. Report how crowded/saturated this space is (high / medium / low), taking
+   the level from the catalog metrics when given, and explain what drives it.
 2. Identify what patterns you see among the similar titles (themes, tones, regions).
 3. Suggest angles for differentiation (how this new concept could stand out).
 4. Flag any obvious strategic risks (e.g., "market fatigue for this genre").
@@ -43,9 +36,76 @@ Respond in markdown with headings:
 ## Differentiation
 ## Strategic Risks
 """
-    )
+)
+
+
+def market_metrics(
+    similar: List[Dict[str, Any]],
+    filters: Union[TitleFilters, Dict[str, Any], None] = None,
+) -> Optional[Dict[str, Any]]:
+    """
+    Exact saturation metrics of the segment the concept competes in (see
+    infer_segment), with semantic density measured around its retrieved
+    titles. None when the collection has no catalog analytics yet.
+    """
+    analytics = get_catalog_analytics()
+    if analytics is None:
+        return None
+    if isinstance(filters, dict):
+        filters = TitleFilters(**filters)
+    ids = [item["doc_id"] for item in similar if item.get("doc_id")]
+    return analytics.segment(infer_segment(similar, filters), around_ids=ids or None)
+
+
+def _build_competitive(
+    concept: str,
+    similar: List[Dict[str, Any]],
+    filters: Union[TitleFilters, Dict[str, Any], None] = None,
+):
+    llm = get_llm(settings.CHAT_MODEL, TEMPERATURE)
+
+    similar_str, _ = pack_titles(similar, settings.CONTEXT_BUDGET_COMPETITIVE, agent="competitive")
+    metrics = market_metrics(similar, filters)
+    market = render_segment(metrics) if metrics is not None else "Not available; judge from the similar titles."
+
+    msgs = prompt.format_messages(concept=concept, similar=similar_str, market=market)
+    return llm, msgs
+
+
+async def arun_competitive(
+    concept: str,
+    similar: Optional[List[Dict[str, Any]]] = None,
+    filters: Optional[Dict[str, Any]] = None,
+) -> Dict[str, str]:
+    """
+    Competitive Intelligence Agent:
+    Uses semantic search to find similar titles and reasons about
+    how saturated or open the market space is, grounded in the exact
+    catalog saturation metrics of its segment.
+    """
+    # Step 1: use RAG tool to find similar titles (skipped when the graph
+    # already retrieved them for this request)
+    if similar is None:
+        similar = await asearch_similar_titles(concept, filters=filters)
+
+    llm, msgs = _build_competitive(concept, similar, filters)
+    resp = await llm.ainvoke(msgs)
+
+    return {"competitive_insights": resp.content}
+
+
+def run_competitive(
+    concept: str,
+    similar: Optional[List[Dict[str, Any]]] = None,
+    filters: Optional[Dict[str, Any]] = None,
+) -> Dict[str, str]:
+    """
+    Blocking variant of arun_competitive for scripts and notebooks.
+    """
+    if similar is None:
+        similar = search_similar_titles.func(concept, filters)
 
-    msgs = prompt.format_messages(concept=concept, similar=similar_str)
+    llm, msgs = _build_competitive(concept, similar, filters)
     resp = llm.invoke(msgs)
 
-    return {"competitive_insights": resp.content}
\ No newline at end of file
+    return {"competitive_insights": resp.content}
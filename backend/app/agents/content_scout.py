@@ -1,13 +1,11 @@
-from typing import Dict, Any
-from langchain_openai import ChatOpenAI
+from typing import Dict, Any, List, Optional
 from langchain_core.prompts import ChatPromptTemplate
-from .tools import search_similar_titles
+from .context import pack_titles, with_conversation
+from .runtime import get_llm
+from .tools import search_similar_titles, asearch_similar_titles
 from ..config import settings
 
-llm = ChatOpenAI(
-    model=settings.CHAT_MODEL,
-    temperature=0.3,
-)
+TEMPERATURE = 0.3
 
 prompt = ChatPromptTemplate.from_template(
     """
@@ -26,25 +24,52 @@ Respond in a structured, concise way.
 """
 )
 
-def run_content_scout(concept: str) -> Dict[str, Any]:
+def _build_messages(concept: str, similar, conversation: str = ""):
+    formatted = prompt.format_messages(concept=concept)
+    # Attach similar titles as context (deduplicated table within the token budget)
+    context_str, _ = pack_titles(similar, settings.CONTEXT_BUDGET_CONTENT_SCOUT, agent="content_scout")
+    return with_conversation([
+        formatted[0],
+        {"role": "system", "content": f"Similar titles:\n{context_str}"}
+    ], conversation)
+
+
+async def arun_content_scout(
+    concept: str,
+    similar: Optional[List[Dict[str, Any]]] = None,
+    conversation: str = "",
+) -> Dict[str, Any]:
     """
     Simple function-style agent:
-    - Calls the tool
+    - Calls the tool (unless the graph already retrieved `similar`)
     - Calls the LLM with tool results
     - Returns structured info
     """
-    similar = search_similar_titles.func(concept)  # direct tool call
-    formatted = prompt.format_messages(concept=concept)
-    # Attach similar titles as context
-    context_str = "\n".join(
-        [f"- {s['title']}: {s['snippet']}" for s in similar]
-    )
-    messages = [
-        formatted[0],
-        {"role": "system", "content": f"Similar titles:\n{context_str}"}
-    ]
+    if similar is None:
+        similar = await asearch_similar_titles(concept)
+    messages = _build_messages(concept, similar, conversation)
+    llm = get_llm(settings.CHAT_MODEL, TEMPERATURE)
+    resp = await llm.ainvoke(messages)
+    return {
+        "similar_titles": similar,
+        "analysis": resp.content,
+    }
+
+
+def run_content_scout(
+    concept: str,
+    similar: Optional[List[Dict[str, Any]]] = None,
+    conversation: str = "",
+) -> Dict[str, Any]:
+    """
+    Blocking variant of arun_content_scout for scripts and notebooks.
+    """
+    if similar is None:
+        similar = search_similar_titles.func(concept)  # direct tool call
+    messages = _build_messages(concept, similar, conversation)
+    llm = get_llm(settings.CHAT_MODEL, TEMPERATURE)
     resp = llm.invoke(messages)
     return {
         "similar_titles": similar,
         "analysis": resp.content,
-    }
\ No newline at end of file
+    }
@@ -0,0 +1,279 @@
+import logging
+import re
+import threading
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from ..utils.metrics import CONTEXT_TOKENS
+
+logger = logging.getLogger(__name__)
+
+# tokenizer of the gpt-4o / gpt-4.1 family; without it tokens are estimated
+ENCODING = "o200k_base"
+CHARS_PER_TOKEN = 4
+ELLIPSIS = "…"
+
+TITLE_COLUMNS = ("title", "type", "year", "country", "genres", "description")
+# bump whenever packing output changes (table layout, dedupe, trimming rules);
+# it is part of the node memo fingerprint, so memoized outputs built from
+# differently packed prompts are not served
+PACKER_VERSION = 1
+
+_encoding = None
+_encoding_lock = threading.Lock()
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+_HEADING = re.compile(r"^\s*(#{1,6}\s|\d+[.)]\s*\S+.*:$|\*\*[^*]+\*\*:?$)")
+
+
+def get_encoding():
+    """
+    The tiktoken encoding, loaded once; None (chars/4 estimates) when
+    tiktoken or its BPE file is unavailable, e.g. offline.
+    """
+    global _encoding
+    if _encoding is None:
+        with _encoding_lock:
+            if _encoding is None:
+                try:
+                    import tiktoken
+
+                    _encoding = tiktoken.get_encoding(ENCODING)
+                except Exception as exc:
+                    print(f"[WARN] Tokenizer {ENCODING} unavailable ({type(exc).__name__}); estimating tokens as chars/{CHARS_PER_TOKEN}.")
+                    _encoding = False
+    return _encoding or None
+
+
+def count_tokens(text: str) -> int:
+    if not text:
+        return 0
+    encoding = get_encoding()
+    if encoding is None:
+        return -(-len(text) // CHARS_PER_TOKEN)
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def truncate_tokens(text: str, budget: int) -> str:
+    """
+    Cut `text` to at most `budget` tokens at a word boundary, marking the cut.
+    """
+    if budget <= 0:
+        return ""
+    if count_tokens(text) <= budget:
+        return text
+    encoding = get_encoding()
+    if encoding is None:
+        head = text[:max(0, (budget - 1) * CHARS_PER_TOKEN)]
+    else:
+        head = encoding.decode(encoding.encode(text, disallowed_special=())[:budget - 1])
+    if " " in head:
+        head = head.rsplit(" ", 1)[0]
+    return head.rstrip(" ,;:-") + ELLIPSIS
+
+
+@dataclass
+class PackStats:
+    budget: int
+    tokens_before: int
+    tokens_after: int
+    duplicates: int = 0
+    dropped: int = 0
+    trimmed: int = 0
+
+    @property
+    def saved(self) -> int:
+        return max(0, self.tokens_before - self.tokens_after)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return dict(asdict(self), saved=self.saved)
+
+
+def _report(agent: str, stats: PackStats) -> None:
+    CONTEXT_TOKENS.inc(stats.tokens_after, agent=agent, kind="packed")
+    CONTEXT_TOKENS.inc(stats.saved, agent=agent, kind="saved")
+    logger.debug("context %s %s", agent, stats.to_dict())
+
+
+def with_conversation(messages: List[Any], conversation: str) -> List[Any]:
+    """
+    Append the chat session's earlier turns (already packed by the session
+    store) as a system message; no-op for a new session.
+    """
+    if not conversation:
+        return messages
+    return list(messages) + [{"role": "system", "content": f"Conversation so far:\n{conversation}"}]
+
+
+# ---------- retrieved titles ----------
+
+def dedupe_titles(similar: Sequence[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], int]:
+    """
+    Drop repeated titles (same doc_id, or same title and year), keeping the
+    best-ranked occurrence.
+    """
+    seen = set()
+    unique = []
+    for item in similar:
+        keys = {
+            ("id", item.get("doc_id")) if item.get("doc_id") else None,
+            ("title", str(item.get("title", "")).casefold().strip(), str(item.get("release_year", ""))),
+        } - {None}
+        if keys & seen:
+            continue
+        seen |= keys
+        unique.append(item)
+    return unique, len(similar) - len(unique)
+
+
+def _cell(value: Any) -> str:
+    return " ".join(str(value or "").replace("|", "/").split())
+
+
+def _description(item: Dict[str, Any]) -> str:
+    if item.get("description"):
+        return _cell(item["description"])
+    # older results only carry the rendered snippet
+    return _cell(str(item.get("snippet", "")).partition("Description: ")[2])
+
+
+def _titles_table(rows: Sequence[Dict[str, Any]], descriptions: Sequence[str], cap: Optional[int]) -> str:
+    lines = [" | ".join(TITLE_COLUMNS)]
+    for item, desc in zip(rows, descriptions):
+        if cap is not None and len(desc) > cap:
+            desc = desc[:cap].rsplit(" ", 1)[0] + ELLIPSIS if cap else ""
+        lines.append(" | ".join([
+            _cell(item.get("title")), _cell(item.get("type")), _cell(item.get("release_year")),
+            _cell(item.get("country")), _cell(item.get("genres")), desc,
+        ]))
+    return "\n".join(lines)
+
+
+def pack_titles(similar: Sequence[Dict[str, Any]], budget: int, agent: str = "") -> Tuple[str, PackStats]:
+    """
+    Render retrieved titles as one dense pipe-separated table (a header
+    line instead of per-row field labels) that fits in `budget` tokens.
+
+    Duplicates are dropped first; if the table is still too large every
+    description is shortened to the longest common length that fits, and
+    only then are the lowest-ranked rows dropped. A budget <= 0 keeps
+    everything. Savings are measured against the plain "- title: snippet"
+    listing.
+    """
+    before = count_tokens("\n".join(f"- {s.get('title', '')}: {s.get('snippet', '')}" for s in similar))
+    rows, duplicates = dedupe_titles(similar)
+    descriptions = [_description(r) for r in rows]
+
+    table = _titles_table(rows, descriptions, None)
+    stats = PackStats(budget=budget, tokens_before=before, tokens_after=count_tokens(table), duplicates=duplicates)
+    if budget > 0 and stats.tokens_after > budget:
+        while rows:
+            # binary search the largest description length (chars) that fits
+            lo, hi = 0, max(len(d) for d in descriptions)
+            if count_tokens(_titles_table(rows, descriptions, lo)) <= budget:
+                while lo < hi:
+                    mid = (lo + hi + 1) // 2
+                    if count_tokens(_titles_table(rows, descriptions, mid)) <= budget:
+                        lo = mid
+                    else:
+                        hi = mid - 1
+                table = _titles_table(rows, descriptions, lo)
+                stats.trimmed = sum(len(d) > lo for d in descriptions)
+                break
+            rows, descriptions = rows[:-1], descriptions[:-1]
+            stats.dropped += 1
+        else:
+            table = ""
+        stats.tokens_after = count_tokens(table)
+
+    if agent:
+        _report(agent, stats)
+    return table, stats
+
+
+# ---------- upstream analyses ----------
+
+def _compact(text: str) -> str:
+    lines = [line.rstrip() for line in text.strip().splitlines()]
+    return re.sub(r"\n{3,}", "\n\n", "\n".join(lines))
+
+
+def _is_heading(line: str) -> bool:
+    return not line.strip() or bool(_HEADING.match(line))
+
+
+def trim_text(text: str, budget: int) -> str:
+    """
+    Fit an agent's markdown output into `budget` tokens, degrading
+    gracefully: squeeze whitespace, then shorten bullets / paragraphs to
+    their first sentence from the bottom up (headings and the opening
+    lines survive longest), then cut at a line boundary.
+    """
+    if budget <= 0 or count_tokens(text) <= budget:
+        return text
+    text = _compact(text)
+    if count_tokens(text) <= budget:
+        return text
+
+    lines = text.splitlines()
+    for i in range(len(lines) - 1, -1, -1):
+        if _is_heading(lines[i]):
+            continue
+        first = _SENTENCE_END.split(lines[i], 1)[0]
+        if first != lines[i]:
+            lines[i] = first
+            if count_tokens("\n".join(lines)) <= budget:
+                return "\n".join(lines)
+
+    kept: List[str] = []
+    used = 0
+    for line in lines:
+        cost = count_tokens(line + "\n")
+        if used + cost > budget:
+            remaining = budget - used
+            kept.append(truncate_tokens(line, remaining) if remaining > 8 else ELLIPSIS)
+            break
+        kept.append(line)
+        used += cost
+    return "\n".join(kept)
+
+
+def split_budget(sizes: Dict[str, int], budget: int) -> Dict[str, int]:
+    """
+    Share `budget` between sections: small sections keep their full size
+    and whatever they leave over is split evenly among the larger ones.
+    """
+    shares: Dict[str, int] = {}
+    pending = sorted(sizes, key=sizes.get)
+    remaining = budget
+    while pending:
+        fair = remaining // len(pending)
+        name = pending[0]
+        if sizes[name] > fair:
+            for name in pending:
+                shares[name] = fair
+            break
+        shares[name] = sizes[name]
+        remaining -= sizes[name]
+        pending.pop(0)
+    return shares
+
+
+def pack_sections(sections: Dict[str, str], budget: int, agent: str = "") -> Tuple[Dict[str, str], PackStats]:
+    """
+    Trim upstream analyses so together they fit in `budget` tokens (<= 0
+    keeps them verbatim).
+    """
+    sizes = {name: count_tokens(text) for name, text in sections.items()}
+    before = sum(sizes.values())
+    stats = PackStats(budget=budget, tokens_before=before, tokens_after=before)
+    packed = dict(sections)
+    if budget > 0 and before > budget:
+        for name, share in split_budget(sizes, budget).items():
+            if sizes[name] > share:
+                packed[name] = trim_text(sections[name], share)
+                stats.trimmed += 1
+        stats.tokens_after = sum(count_tokens(text) for text in packed.values())
+
+    if agent:
+        _report(agent, stats)
+    return packed, stats
@@ -1,24 +1,14 @@
 from typing import Dict
-from langchain_openai import ChatOpenAI
 from langchain_core.prompts import ChatPromptTemplate
 
 from ..config import settings
+from .context import pack_sections, with_conversation
+from .runtime import get_llm
 
+TEMPERATURE = 0.25
 
-def run_executive_summary(
-    concept: str,
-    scout_analysis: str,
-    audience_insights: str,
-    competitive_insights: str,
-) -> Dict[str, str]:
+prompt = ChatPromptTemplate.from_template(
     """
-    Executive Summary Agent:
-    Combines analyses into a concise Go/No-Go style summary.
-    """
-    llm = ChatOpenAI(model=settings.CHAT_MODEL, temperature=0.25)
-
-    prompt = ChatPromptTemplate.from_template(
-        """
 You are an Executive Summary Agent supporting senior leadership at a global streaming company.
 
 Concept:
@@ -41,14 +31,59 @@ Write a structured executive summary with sections:
 
 Be concise but specific.
 """
+)
+
+
+def _build_executive_summary(
+    concept: str,
+    scout_analysis: str,
+    audience_insights: str,
+    competitive_insights: str,
+    conversation: str = "",
+):
+    llm = get_llm(settings.CHAT_MODEL, TEMPERATURE)
+
+    # the largest prompt of the graph: three upstream analyses share one budget
+    packed, _ = pack_sections(
+        {"scout": scout_analysis, "audience": audience_insights, "competitive": competitive_insights},
+        settings.CONTEXT_BUDGET_EXECUTIVE_SUMMARY,
+        agent="executive_summary",
     )
+    msgs = with_conversation(prompt.format_messages(concept=concept, **packed), conversation)
+
+    return llm, msgs
+
 
-    msgs = prompt.format_messages(
-        concept=concept,
-        scout=scout_analysis,
-        audience=audience_insights,
-        competitive=competitive_insights,
+async def arun_executive_summary(
+    concept: str,
+    scout_analysis: str,
+    audience_insights: str,
+    competitive_insights: str,
+    conversation: str = "",
+) -> Dict[str, str]:
+    """
+    Executive Summary Agent:
+    Combines analyses into a concise Go/No-Go style summary.
+    """
+    llm, msgs = _build_executive_summary(
+        concept, scout_analysis, audience_insights, competitive_insights, conversation
     )
+    resp = await llm.ainvoke(msgs)
+    return {"executive_summary": resp.content}
+
 
+def run_executive_summary(
+    concept: str,
+    scout_analysis: str,
+    audience_insights: str,
+    competitive_insights: str,
+    conversation: str = "",
+) -> Dict[str, str]:
+    """
+    Blocking variant of arun_executive_summary for scripts and notebooks.
+    """
+    llm, msgs = _build_executive_summary(
+        concept, scout_analysis, audience_insights, competitive_insights, conversation
+    )
     resp = llm.invoke(msgs)
-    return {"executive_summary": resp.content}
\ No newline at end of file
+    return {"executive_summary": resp.content}
@@ -1,16 +1,50 @@
+import logging
+import time
 from typing import TypedDict, List, Dict, Any
 from langgraph.graph import StateGraph, START, END
 
-from .content_scout import run_content_scout
-from .audience_fit import run_audience_fit
-from .competitive import run_competitive
-from .executive_summary import run_executive_summary
+from .content_scout import arun_content_scout
+from .audience_fit import arun_audience_fit
+from .competitive import arun_competitive
+from .executive_summary import arun_executive_summary
+from . import audience_fit, competitive, content_scout, executive_summary
+from .memo import get_node_memo
+from .tools import asearch_similar_titles
+from ..config import settings
+from ..utils.metrics import NODE_SECONDS
+
+logger = logging.getLogger(__name__)
+
+SCHEDULING_MODES = ("parallel", "sequential")
+
+# state fields each agent node reads; node memoization keys on exactly these.
+# The executive-summary agent runs as node "summarize": langgraph rejects a
+# node named like a state key ("executive_summary").
+NODE_INPUTS = {
+    "content_scout": ("concept", "conversation", "similar_titles"),
+    "audience_fit": ("concept", "scout_analysis", "target_regions"),
+    "competitive": ("concept", "similar_titles", "filters"),
+    "summarize": (
+        "concept", "conversation", "scout_analysis", "audience_insights", "competitive_insights",
+    ),
+}
 
 
 class StreamIntelState(TypedDict, total=False):
     concept: str
-
+    # analyze requests: the title being analysed (also scopes the response cache)
+    # and the requested target regions, read by audience_fit only
+    title_name: str
+    target_regions: List[str]
+    # chat sessions: id, and the earlier turns packed as prompt text ("" on the first turn)
+    session_id: str
+    conversation: str
+    # optional TitleFilters fields (countries / types / genres / year range)
+    filters: Dict[str, Any]
+
+    # filled once by the retrieve node and shared by every downstream agent
     similar_titles: List[Dict[str, Any]]
+    retrieval_stats: Dict[str, Any]
     scout_analysis: str
 
     audience_insights: str
@@ -19,49 +53,147 @@ class StreamIntelState(TypedDict, total=False):
     executive_summary: str
 
 
-def content_scout_node(state: StreamIntelState) -> StreamIntelState:
-    result = run_content_scout(state["concept"])
+async def retrieve_node(state: StreamIntelState) -> StreamIntelState:
+    if state.get("similar_titles") is not None:
+        # already retrieved by the caller (batch analysis searches all concepts at once);
+        # langgraph passes unset keys as None, so test the value, not the key
+        return {"similar_titles": state["similar_titles"]}
+
+    t0 = time.perf_counter()
+    filters = state.get("filters") or None
+    searches = 1
+    similar = await asearch_similar_titles(state["concept"], filters=filters)
+    fallback = False
+    if filters and not similar:
+        # nothing in the catalog matches the filters; better broad context than none
+        similar = await asearch_similar_titles(state["concept"])
+        searches += 1
+        fallback = True
+    return {
+        "similar_titles": similar,
+        "retrieval_stats": {
+            "searches": searches,
+            "results": len(similar),
+            "filters": filters or {},
+            "filter_fallback": fallback,
+            "elapsed_ms": round((time.perf_counter() - t0) * 1000, 2),
+        },
+    }
+
+
+async def content_scout_node(state: StreamIntelState) -> StreamIntelState:
+    result = await arun_content_scout(
+        state["concept"],
+        similar=state.get("similar_titles") or [],
+        conversation=state.get("conversation") or "",
+    )
     return {
-        "similar_titles": result["similar_titles"],
         "scout_analysis": result["analysis"],
     }
 
 
-def audience_fit_node(state: StreamIntelState) -> StreamIntelState:
-    result = run_audience_fit(
+async def audience_fit_node(state: StreamIntelState) -> StreamIntelState:
+    result = await arun_audience_fit(
         concept=state["concept"],
-        scout_analysis=state.get("scout_analysis", ""),
+        scout_analysis=state.get("scout_analysis") or "",
+        target_regions=state.get("target_regions"),
     )
     return result  # contains "audience_insights"
 
 
-def competitive_node(state: StreamIntelState) -> StreamIntelState:
-    result = run_competitive(concept=state["concept"])
+async def competitive_node(state: StreamIntelState) -> StreamIntelState:
+    result = await arun_competitive(
+        concept=state["concept"],
+        similar=state.get("similar_titles") or [],
+        filters=state.get("filters"),
+    )
     return result  # contains "competitive_insights"
 
 
-def executive_summary_node(state: StreamIntelState) -> StreamIntelState:
-    result = run_executive_summary(
+async def executive_summary_node(state: StreamIntelState) -> StreamIntelState:
+    result = await arun_executive_summary(
         concept=state["concept"],
-        scout_analysis=state.get("scout_analysis", ""),
-        audience_insights=state.get("audience_insights", ""),
-        competitive_insights=state.get("competitive_insights", ""),
+        scout_analysis=state.get("scout_analysis") or "",
+        audience_insights=state.get("audience_insights") or "",
+        competitive_insights=state.get("competitive_insights") or "",
+        conversation=state.get("conversation") or "",
     )
     return result  # contains "executive_summary"
 
 
-def build_streamintel_graph():
-    graph = StateGraph(StreamIntelState)
-
-    graph.add_node("content_scout", content_scout_node)
-    graph.add_node("audience_fit", audience_fit_node)
-    graph.add_node("competitive", competitive_node)
-    graph.add_node("executive_summary", executive_summary_node)
+def _timed(name: str, node):
+    """
+    Record each node's latency and outcome (memoized nodes included, so a
+    memo hit shows up as a near-zero sample).
+    """
+    async def timed(state: StreamIntelState) -> StreamIntelState:
+        t0 = time.perf_counter()
+        outcome = "error"
+        try:
+            result = await node(state)
+            outcome = "ok"
+            return result
+        finally:
+            elapsed = time.perf_counter() - t0
+            NODE_SECONDS.observe(elapsed, node=name, outcome=outcome)
+            logger.info("node %s %s in %.3fs", name, outcome, elapsed)
+
+    timed.__name__ = name
+    return timed
+
+
+def build_streamintel_graph(scheduling: str | None = None):
+    """
+    Build and compile the agent graph.
+
+    Every schedule starts with a single retrieve node, so the catalog is
+    searched once per request and the results are shared via state.
+
+    scheduling:
+    - "parallel"   -> content_scout and competitive start together,
+                      audience_fit follows the scout, and both branches
+                      join before summarize (the executive summary).
+    - "sequential" -> the original strict chain, one LLM hop at a time.
+
+    Defaults to settings.GRAPH_SCHEDULING. Agent nodes are memoized on
+    their NODE_INPUTS unless NODE_MEMO_BACKEND is "off".
+    """
+    scheduling = (scheduling or settings.GRAPH_SCHEDULING).lower()
+    if scheduling not in SCHEDULING_MODES:
+        raise ValueError(
+            f"Unknown graph scheduling '{scheduling}', expected one of {SCHEDULING_MODES}"
+        )
 
-    graph.add_edge(START, "content_scout")
-    graph.add_edge("content_scout", "audience_fit")
-    graph.add_edge("audience_fit", "competitive")
-    graph.add_edge("competitive", "executive_summary")
-    graph.add_edge("executive_summary", END)
+    graph = StateGraph(StreamIntelState)
 
-    return graph.compile()
\ No newline at end of file
+    agents = {
+        "content_scout": (content_scout_node, content_scout),
+        "audience_fit": (audience_fit_node, audience_fit),
+        "competitive": (competitive_node, competitive),
+        "summarize": (executive_summary_node, executive_summary),
+    }
+    memo = get_node_memo()
+
+    graph.add_node("retrieve", _timed("retrieve", retrieve_node))
+    for name, (node, module) in agents.items():
+        if memo is not None:
+            node = memo.wrap(name, node, NODE_INPUTS[name], module)
+        graph.add_node(name, _timed(name, node))
+
+    if scheduling == "parallel":
+        # competitive only needs the concept, so it does not wait for the scout
+        graph.add_edge(START, "retrieve")
+        graph.add_edge("retrieve", "content_scout")
+        graph.add_edge("retrieve", "competitive")
+        graph.add_edge("content_scout", "audience_fit")
+        graph.add_edge(["audience_fit", "competitive"], "summarize")
+    else:
+        graph.add_edge(START, "retrieve")
+        graph.add_edge("retrieve", "content_scout")
+        graph.add_edge("content_scout", "audience_fit")
+        graph.add_edge("audience_fit", "competitive")
+        graph.add_edge("competitive", "summarize")
+
+    graph.add_edge("summarize", END)
+
+    return graph.compile()
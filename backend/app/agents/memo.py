@@ -0,0 +1,195 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Optional, Sequence
+
+from ..config import settings
+from ..rag.retriever import add_swap_listener
+from ..rag.vectorstore import get_active_collection, get_data_root
+from .context import PACKER_VERSION
+
+NodeFn = Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]]
+
+
+class MemoryMemoStore:
+    """
+    Bounded in-process LRU of node outputs.
+    """
+
+    def __init__(self, max_entries: int = 2048):
+        self.max_entries = max_entries
+        self._data: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            value = self._data.get(key)
+            if value is not None:
+                self._data.move_to_end(key)
+            return value
+
+    def put(self, key: str, node: str, value: Dict[str, Any]) -> None:
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class SQLiteMemoStore:
+    """
+    Node outputs in a SQLite table, shared across restarts and workers.
+    """
+
+    def __init__(self, db_path: Path):
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(db_path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS node_memo ("
+            " key TEXT PRIMARY KEY, node TEXT NOT NULL, value TEXT NOT NULL)"
+        )
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM node_memo WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put(self, key: str, node: str, value: Dict[str, Any]) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO node_memo (key, node, value) VALUES (?, ?, ?)",
+                (key, node, json.dumps(value, ensure_ascii=False)),
+            )
+            self._conn.commit()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM node_memo")
+            self._conn.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM node_memo").fetchone()[0]
+
+
+def agent_version(module) -> Dict[str, Any]:
+    """
+    Everything besides state that determines an agent's output: chat
+    model, temperature, the prompt template text, and how its context is
+    packed (the agent's CONTEXT_BUDGET_* and PACKER_VERSION). Editing a
+    prompt or a budget therefore invalidates its memoized outputs
+    automatically.
+    """
+    agent = module.__name__.rsplit(".", 1)[-1]
+    return {
+        "model": settings.CHAT_MODEL,
+        "temperature": module.TEMPERATURE,
+        "prompt": [m.prompt.template for m in module.prompt.messages],
+        "context_budget": getattr(settings, f"CONTEXT_BUDGET_{agent.upper()}", None),
+        "packer": PACKER_VERSION,
+    }
+
+
+class NodeMemo:
+    """
+    Deterministic per-node memoization for the agent graph.
+
+    Each wrapped node is keyed by a hash of exactly the state fields it
+    reads plus its agent_version() and the active collection, so when only
+    some inputs change, only the nodes reading them re-execute. Agents also
+    read the index outside state (catalog metrics), so an index swap clears
+    the memo, and outputs persisted under an older collection never match.
+    Hits and misses are counted per node.
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self._stats: Dict[str, Dict[str, int]] = {}
+        self._index = get_active_collection()
+
+    @staticmethod
+    def make_key(node: str, version: Dict[str, Any], inputs: Dict[str, Any], index: str = "") -> str:
+        payload = json.dumps(
+            {"node": node, "version": version, "inputs": inputs, "index": index},
+            sort_keys=True, ensure_ascii=False, default=str,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def wrap(self, node: str, fn: NodeFn, reads: Sequence[str], module) -> NodeFn:
+        stats = self._stats.setdefault(node, {"hits": 0, "misses": 0})
+        version = agent_version(module)
+
+        async def memoized(state: Dict[str, Any]) -> Dict[str, Any]:
+            key = self.make_key(node, version, {field: state.get(field) for field in reads}, self._index)
+            cached = self.store.get(key)
+            if cached is not None:
+                stats["hits"] += 1
+                return cached
+            stats["misses"] += 1
+            result = await fn(state)
+            self.store.put(key, node, result)
+            return result
+
+        memoized.__name__ = getattr(fn, "__name__", node)
+        return memoized
+
+    def clear(self) -> None:
+        self.store.clear()
+        for stats in self._stats.values():
+            stats["hits"] = stats["misses"] = 0
+
+    def on_index_swap(self) -> None:
+        """
+        Swap listener: outputs were grounded in the previous index.
+        """
+        self._index = get_active_collection()
+        self.store.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        nodes = {}
+        for node, s in self._stats.items():
+            calls = s["hits"] + s["misses"]
+            nodes[node] = {**s, "hit_rate": round(s["hits"] / calls, 4) if calls else 0.0}
+        return {"backend": type(self.store).__name__, "entries": len(self.store), "nodes": nodes}
+
+
+_memo: Optional[NodeMemo] = None
+_memo_lock = threading.Lock()
+
+
+def get_node_memo() -> Optional[NodeMemo]:
+    """
+    Process-wide NodeMemo for NODE_MEMO_BACKEND, or None when it is "off".
+    The SQLite file is DATA_ROOT/node_memo.sqlite unless NODE_MEMO_PATH is set.
+    """
+    global _memo
+    backend = settings.NODE_MEMO_BACKEND.lower()
+    if backend == "off":
+        return None
+    with _memo_lock:
+        if _memo is None:
+            if backend == "sqlite":
+                path = Path(os.getenv("NODE_MEMO_PATH", get_data_root() / "node_memo.sqlite")).resolve()
+                store = SQLiteMemoStore(path)
+            elif backend == "memory":
+                store = MemoryMemoStore(settings.NODE_MEMO_SIZE)
+            else:
+                raise ValueError(f"Unknown NODE_MEMO_BACKEND '{backend}', expected memory, sqlite or off")
+            _memo = NodeMemo(store)
+            add_swap_listener(_memo.on_index_swap)
+    return _memo
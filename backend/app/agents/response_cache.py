@@ -0,0 +1,164 @@
+import json
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from ..config import settings
+from ..rag.retriever import add_swap_listener
+from ..rag.vectorstore import get_embeddings
+from .singleflight import coalesce
+
+
+class ResponseCache:
+    """
+    Semantic cache of final graph states, keyed by concept embedding.
+
+    A lookup returns the stored result of the most similar earlier concept
+    if its cosine similarity is at least `threshold`, it is younger than
+    `ttl` seconds and it was produced under the same scope (the retrieval
+    filters and, for analyze requests, the title name and target regions).
+    Vectors live in one normalized float32 matrix, so a lookup is a single
+    matrix-vector product. When full, the least recently used entry is
+    overwritten.
+    """
+
+    def __init__(self, max_entries: int = 512, threshold: float = 0.97, ttl: float = 3600.0):
+        self.max_entries = max_entries
+        self.threshold = threshold
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._vectors: Optional[np.ndarray] = None
+        self._entries: List[Optional[Dict[str, Any]]] = []
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def _live(self, now: float) -> np.ndarray:
+        return np.fromiter(
+            (i for i, e in enumerate(self._entries) if e is not None and e["expires_at"] > now),
+            dtype=np.int64,
+        )
+
+    def lookup(self, vector: np.ndarray, scope: str) -> Optional[Tuple[Dict[str, Any], float]]:
+        now = time.time()
+        with self._lock:
+            rows = self._live(now) if self._vectors is not None else np.empty(0, dtype=np.int64)
+            rows = rows[[self._entries[r]["scope"] == scope for r in rows]] if len(rows) else rows
+            if len(rows):
+                scores = self._vectors[rows] @ vector
+                best = int(np.argmax(scores))
+                if scores[best] >= self.threshold:
+                    entry = self._entries[rows[best]]
+                    entry["used_at"] = now
+                    self.hits += 1
+                    return entry["result"], float(scores[best])
+            self.misses += 1
+            return None
+
+    def store(self, vector: np.ndarray, scope: str, result: Dict[str, Any]) -> None:
+        now = time.time()
+        entry = {"scope": scope, "result": result, "used_at": now, "expires_at": now + self.ttl}
+        with self._lock:
+            if self._vectors is None:
+                self._vectors = np.zeros((self.max_entries, vector.shape[0]), dtype=np.float32)
+            free = [i for i, e in enumerate(self._entries) if e is None or e["expires_at"] <= now]
+            if free:
+                slot = free[0]
+            elif len(self._entries) < self.max_entries:
+                slot = len(self._entries)
+                self._entries.append(None)
+            else:
+                slot = min(range(len(self._entries)), key=lambda i: self._entries[i]["used_at"])
+                self.evictions += 1
+            self._vectors[slot] = vector
+            self._entries[slot] = entry
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries = []
+            self._vectors = None
+            self.invalidations += 1
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "entries": len(self._live(time.time())) if self._vectors is not None else 0,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "threshold": self.threshold,
+            "ttl": self.ttl,
+        }
+
+
+def _normalize(vector) -> np.ndarray:
+    vec = np.asarray(vector, dtype=np.float32)
+    norm = np.linalg.norm(vec)
+    return vec / norm if norm else vec
+
+
+def _scope(state: Dict[str, Any]) -> str:
+    # analyze requests for different titles never share an answer, however
+    # close their (possibly long, near-identical) descriptions embed; target
+    # regions are not part of the concept text, so they scope it as well
+    return json.dumps(
+        {
+            "filters": state.get("filters") or {},
+            "title_name": state.get("title_name") or "",
+            "target_regions": state.get("target_regions") or [],
+        },
+        sort_keys=True,
+    )
+
+
+async def ainvoke_cached(graph, state: Dict[str, Any]) -> Tuple[Dict[str, Any], Optional[float]]:
+    """
+    graph.ainvoke(state) behind the response cache. Returns (result,
+    similarity) where similarity is None on a miss. The concept embedding
+    goes through the shared embedding cache, so the retrieve node reuses it.
+    Misses are coalesced: identical requests in flight share one graph run
+    (and store its result once).
+    """
+    cache = get_response_cache()
+    # a follow-up in a chat session depends on the earlier turns, not only the concept
+    if cache.threshold > 1 or state.get("conversation"):
+        return await coalesce(state, lambda: graph.ainvoke(state)), None
+
+    vector = _normalize(await get_embeddings().aembed_query(state["concept"]))
+    scope = _scope(state)
+    found = cache.lookup(vector, scope)
+    if found is not None:
+        result, similarity = found
+        return result, similarity
+
+    async def run():
+        result = await graph.ainvoke(state)
+        cache.store(vector, scope, result)
+        return result
+
+    return await coalesce(state, run), None
+
+
+_cache: Optional[ResponseCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> ResponseCache:
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = ResponseCache(
+                    max_entries=settings.RESPONSE_CACHE_SIZE,
+                    threshold=settings.RESPONSE_CACHE_THRESHOLD,
+                    ttl=settings.RESPONSE_CACHE_TTL,
+                )
+                # answers were grounded in the old catalog; drop them on rebuild
+                add_swap_listener(_cache.clear)
+    return _cache
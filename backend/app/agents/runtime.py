@@ -0,0 +1,212 @@
+import logging
+import threading
+import time
+from typing import TYPE_CHECKING, Any, Dict, Optional, Tuple
+from uuid import UUID
+
+import httpx
+from langchain_core.callbacks import BaseCallbackHandler
+
+from ..config import settings
+from ..utils.limiter import get_limiter, limited_clients
+from ..utils.metrics import LLM_SECONDS, LLM_TOKENS
+
+if TYPE_CHECKING:
+    from langchain_openai import ChatOpenAI
+
+logger = logging.getLogger(__name__)
+
+
+class LLMMetricsHandler(BaseCallbackHandler):
+    """
+    Records latency and prompt / completion token counts of every chat
+    model call. Runs inline: it only touches in-memory counters.
+    """
+
+    run_inline = True
+
+    def __init__(self):
+        self._started: Dict[UUID, Tuple[float, str]] = {}
+
+    def on_chat_model_start(self, serialized, messages, *, run_id: UUID, **kwargs: Any) -> None:
+        params = kwargs.get("invocation_params") or {}
+        model = params.get("model_name") or params.get("model") or "unknown"
+        self._started[run_id] = (time.perf_counter(), model)
+
+    def on_llm_end(self, response, *, run_id: UUID, **kwargs: Any) -> None:
+        t0, model = self._started.pop(run_id, (None, "unknown"))
+        elapsed = time.perf_counter() - t0 if t0 is not None else 0.0
+        LLM_SECONDS.observe(elapsed, model=model, outcome="ok")
+
+        prompt_tokens, completion_tokens = _token_usage(response)
+        LLM_TOKENS.inc(prompt_tokens, model=model, kind="prompt")
+        LLM_TOKENS.inc(completion_tokens, model=model, kind="completion")
+        logger.debug(
+            "llm call model=%s %.3fs prompt_tokens=%d completion_tokens=%d",
+            model, elapsed, prompt_tokens, completion_tokens,
+        )
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        t0, model = self._started.pop(run_id, (None, "unknown"))
+        if t0 is not None:
+            LLM_SECONDS.observe(time.perf_counter() - t0, model=model, outcome="error")
+
+
+def _token_usage(response) -> Tuple[int, int]:
+    usage = (response.llm_output or {}).get("token_usage") or {}
+    if usage:
+        return int(usage.get("prompt_tokens", 0)), int(usage.get("completion_tokens", 0))
+    # newer langchain-openai releases report usage on the message instead;
+    # with the pinned 0.1.x, streamed calls report none and count as 0
+    for generations in response.generations:
+        for gen in generations:
+            meta = getattr(getattr(gen, "message", None), "usage_metadata", None) or {}
+            if meta:
+                return int(meta.get("input_tokens", 0)), int(meta.get("output_tokens", 0))
+    return 0, 0
+
+
+class AgentRuntime:
+    """
+    Process-lifetime state shared by every request:
+    - the compiled LangGraph pipeline (built once, not per request)
+    - the pre-parsed prompt templates of each agent
+    - pooled ChatOpenAI clients keyed by (model, temperature), all sharing
+      one keep-alive HTTP connection pool so we skip repeated TLS handshakes;
+      every request on it is admitted by the shared "chat" rate limiter
+    """
+
+    def __init__(self, scheduling: Optional[str] = None):
+        limits = httpx.Limits(
+            max_connections=settings.LLM_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.LLM_MAX_KEEPALIVE,
+        )
+        self._http_client, self._http_async_client = limited_clients(
+            get_limiter("chat"), limits, settings.LLM_TIMEOUT
+        )
+
+        self._llms: Dict[Tuple[str, float], "ChatOpenAI"] = {}
+        self._lock = threading.Lock()
+        self._llm_metrics = LLMMetricsHandler()
+
+        self.scheduling = scheduling or settings.GRAPH_SCHEDULING
+        self._graph = None
+        self._prompts: Optional[Dict[str, Any]] = None
+
+    @property
+    def graph(self):
+        # Imported lazily: the agent modules themselves import this module.
+        if self._graph is None:
+            from .graph import build_streamintel_graph
+
+            self._graph = build_streamintel_graph(self.scheduling)
+        return self._graph
+
+    @property
+    def prompts(self) -> Dict[str, Any]:
+        if self._prompts is None:
+            from . import audience_fit, competitive, content_scout, executive_summary
+
+            self._prompts = {
+                "content_scout": content_scout.prompt,
+                "audience_fit": audience_fit.prompt,
+                "competitive": competitive.prompt,
+                "executive_summary": executive_summary.prompt,
+            }
+        return self._prompts
+
+    def get_llm(self, model: str, temperature: float) -> "ChatOpenAI":
+        key = (model, float(temperature))
+        llm = self._llms.get(key)
+        if llm is None:
+            with self._lock:
+                llm = self._llms.get(key)
+                if llm is None:
+                    # ~1s of imports (openai, tiktoken); paid by warmup, not at import
+                    from langchain_openai import ChatOpenAI
+
+                    llm = ChatOpenAI(
+                        model=model,
+                        temperature=temperature,
+                        http_client=self._http_client,
+                        http_async_client=self._http_async_client,
+                        callbacks=[self._llm_metrics],
+                    )
+                    self._llms[key] = llm
+        return llm
+
+    def warm(self) -> None:
+        """
+        Compile the graph and create the pooled client of every agent now,
+        so the first request pays for neither (nor for their imports).
+        """
+        from . import audience_fit, competitive, content_scout, executive_summary
+
+        self.graph
+        for module in (content_scout, audience_fit, competitive, executive_summary):
+            self.get_llm(settings.CHAT_MODEL, module.TEMPERATURE)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "graph_compiled": self._graph is not None,
+            "scheduling": self.scheduling,
+            "llm_clients": len(self._llms),
+            "llm_client_keys": [f"{m}@{t}" for m, t in self._llms],
+            "http_connections": {
+                "sync": _pool_size(self._http_client),
+                "async": _pool_size(self._http_async_client),
+            },
+        }
+
+    async def aclose(self) -> None:
+        self._http_client.close()
+        await self._http_async_client.aclose()
+
+
+def _pool_size(client) -> int:
+    """
+    Number of open connections in an httpx client's pool (0 if unknown).
+    """
+    transport = getattr(client, "_transport", None)
+    # unwrap the rate-limited transport
+    transport = getattr(transport, "inner", transport)
+    pool = getattr(transport, "_pool", None)
+    return len(getattr(pool, "connections", []) or [])
+
+
+_runtime: Optional[AgentRuntime] = None
+_runtime_lock = threading.Lock()
+
+
+def init_runtime(scheduling: Optional[str] = None) -> AgentRuntime:
+    """
+    Create the shared runtime and compile the graph eagerly.
+    Called from the FastAPI lifespan.
+    """
+    global _runtime
+    with _runtime_lock:
+        if _runtime is None:
+            _runtime = AgentRuntime(scheduling)
+        _runtime.graph
+    return _runtime
+
+
+def get_runtime() -> AgentRuntime:
+    """
+    Return the shared runtime, creating it on first use (scripts, notebooks).
+    """
+    if _runtime is None:
+        return init_runtime()
+    return _runtime
+
+
+async def shutdown_runtime() -> None:
+    global _runtime
+    with _runtime_lock:
+        runtime, _runtime = _runtime, None
+    if runtime is not None:
+        await runtime.aclose()
+
+
+def get_llm(model: str, temperature: float) -> "ChatOpenAI":
+    return get_runtime().get_llm(model, temperature)
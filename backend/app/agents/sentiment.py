@@ -0,0 +1,165 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from ..config import settings
+
+
+def default_model_path() -> Path:
+    backend_dir = Path(__file__).resolve().parents[2]  # .../StreamIntel360/backend
+    default = backend_dir / ".." / "models" / "imdb_sentiment_pipeline.joblib"
+    return Path(settings.SENTIMENT_MODEL_PATH or default).resolve()
+
+
+def _load_pipeline(path: Path):
+    # joblib / scikit-learn are only needed when sentiment scoring is used
+    import joblib
+
+    return joblib.load(path)
+
+
+def _positive_column(pipeline) -> int:
+    classes = [str(c).lower() for c in pipeline.classes_]
+    for label in ("positive", "pos", "1"):
+        if label in classes:
+            return classes.index(label)
+    raise ValueError(f"Sentiment pipeline has no positive class: {classes}")
+
+
+def _positive_proba(pipeline, column: int, texts: Sequence[str]) -> np.ndarray:
+    return pipeline.predict_proba(list(texts))[:, column].astype(np.float32)
+
+
+# ---------- process-pool workers: each loads the pipeline once ----------
+
+_worker_pipeline = None
+_worker_column = 0
+
+
+def _init_worker(path: str) -> None:
+    global _worker_pipeline, _worker_column
+    _worker_pipeline = _load_pipeline(Path(path))
+    _worker_column = _positive_column(_worker_pipeline)
+
+
+def _worker_score(texts: List[str]) -> np.ndarray:
+    return _positive_proba(_worker_pipeline, _worker_column, texts)
+
+
+class SentimentModel:
+    """
+    The bundled IMDB sentiment pipeline (TF-IDF + logistic regression),
+    loaded once per process and shared by every request.
+
+    score() runs the whole batch through one vectorized predict_proba.
+    Batches of at least SENTIMENT_POOL_MIN texts are split across a
+    process pool of the requested size (default SENTIMENT_WORKERS, else
+    the CPU count) whose workers each hold their own copy of the
+    pipeline; TF-IDF tokenization is pure Python and does not scale with
+    threads. One pool is kept per size, started on first use.
+    """
+
+    def __init__(self, path: Optional[Path] = None):
+        self.path = Path(path or default_model_path())
+        self.pipeline = _load_pipeline(self.path)
+        self._positive = _positive_column(self.pipeline)
+        self._smoke_test()
+        self._pools: Dict[int, ProcessPoolExecutor] = {}
+        self._pool_lock = threading.Lock()
+
+    def _smoke_test(self) -> None:
+        """
+        Score one text now: a pipeline pickled by a newer scikit-learn can
+        unpickle cleanly and still fail on its first predict (NotFittedError).
+        """
+        try:
+            _positive_proba(self.pipeline, self._positive, ["a smoke test review"])
+        except Exception as exc:
+            raise ValueError(
+                f"Sentiment pipeline at {self.path} cannot score ({type(exc).__name__}: {exc}); "
+                "check that the installed scikit-learn matches the one it was saved with"
+            ) from exc
+
+    @property
+    def workers(self) -> int:
+        return settings.SENTIMENT_WORKERS or os.cpu_count() or 1
+
+    def _get_pool(self, workers: int) -> ProcessPoolExecutor:
+        with self._pool_lock:
+            pool = self._pools.get(workers)
+            if pool is None:
+                # spawn, not fork: the server process is multi-threaded
+                pool = self._pools[workers] = ProcessPoolExecutor(
+                    max_workers=workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker,
+                    initargs=(str(self.path),),
+                )
+        return pool
+
+    def positive_proba(self, texts: Sequence[str], workers: Optional[int] = None) -> np.ndarray:
+        """
+        P(positive) for each text, as a float32 array.
+        """
+        texts = [t if isinstance(t, str) else "" for t in texts]
+        if not texts:
+            return np.empty(0, dtype=np.float32)
+
+        workers = self.workers if workers is None else workers
+        if workers <= 1 or len(texts) < settings.SENTIMENT_POOL_MIN:
+            return _positive_proba(self.pipeline, self._positive, texts)
+
+        pool = self._get_pool(workers)
+        step = -(-len(texts) // (workers * 4))
+        chunks = [texts[i:i + step] for i in range(0, len(texts), step)]
+        return np.concatenate(list(pool.map(_worker_score, chunks)))
+
+    def score(self, texts: Sequence[str], workers: Optional[int] = None) -> List[Dict[str, Any]]:
+        proba = self.positive_proba(texts, workers)
+        return [
+            {"label": "positive" if p >= 0.5 else "negative", "positive": round(float(p), 4)}
+            for p in proba
+        ]
+
+    def close(self) -> None:
+        with self._pool_lock:
+            for pool in self._pools.values():
+                pool.shutdown(cancel_futures=True)
+            self._pools.clear()
+
+
+_model: Optional[SentimentModel] = None
+_model_lock = threading.Lock()
+
+
+def get_sentiment_model() -> SentimentModel:
+    global _model
+    if _model is None:
+        with _model_lock:
+            if _model is None:
+                _model = SentimentModel()
+    return _model
+
+
+def load_sentiment_model() -> Optional[SentimentModel]:
+    """
+    Startup hook: load the pipeline if possible, otherwise warn and leave
+    sentiment scoring disabled instead of failing the whole app.
+    """
+    try:
+        model = get_sentiment_model()
+    except (ImportError, OSError, ValueError) as exc:
+        print(f"[WARN] Sentiment model unavailable ({type(exc).__name__}: {exc}); /api/sentiment is disabled.")
+        return None
+    print(f"[INFO] Sentiment model loaded from {model.path}")
+    return model
+
+
+def shutdown_sentiment_model() -> None:
+    if _model is not None:
+        _model.close()
@@ -0,0 +1,348 @@
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+from ..config import settings
+from ..rag.vectorstore import get_data_root
+from .context import count_tokens, truncate_tokens, trim_text
+
+_RECOMMENDATION = re.compile(r"^[ \t*#>-]*Recommend(?:ation|ed):.*$", re.MULTILINE)
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+
+def _gist(answer: str, budget: int) -> str:
+    """
+    One line standing for an old answer: its recommendation line if it has
+    one, else its first sentence.
+    """
+    found = _RECOMMENDATION.search(answer or "")
+    line = found.group(0) if found else _SENTENCE_END.split(" ".join((answer or "").split()), 1)[0]
+    return truncate_tokens(line.strip(" *#-"), budget)
+
+
+@dataclass
+class Session:
+    """
+    Server-side conversation state.
+
+    Only the last `keep_turns` exchanges are kept verbatim; older ones are
+    folded into `summary`, one short line per exchange, itself capped in
+    tokens (the opening line is kept, the oldest of the rest go first). A
+    session's size is therefore bounded however long it runs.
+    """
+
+    session_id: str
+    created_at: float = field(default_factory=time.time)
+    updated_at: float = field(default_factory=time.time)
+    summary: List[str] = field(default_factory=list)
+    turns: List[Dict[str, str]] = field(default_factory=list)
+    total_turns: int = 0
+
+    def add_turn(self, user: str, assistant: str, keep_turns: int, summary_tokens: int) -> None:
+        self.turns.append({"user": user, "assistant": assistant})
+        self.total_turns += 1
+        self.updated_at = time.time()
+        while len(self.turns) > keep_turns:
+            old = self.turns.pop(0)
+            self.summary.append(f"- {truncate_tokens(old['user'], 40)} -> {_gist(old['assistant'], 40)}")
+        while len(self.summary) > 1 and count_tokens("\n".join(self.summary)) > summary_tokens:
+            del self.summary[1]
+
+    def context(self, budget: int) -> str:
+        """
+        The conversation so far as prompt text (empty for a new session):
+        the rolling summary, then the recent turns with their answers
+        trimmed so the whole fits in `budget` tokens.
+        """
+        parts = []
+        if self.summary:
+            parts.append("Earlier turns (summarized):\n" + "\n".join(self.summary))
+        if self.turns:
+            left = max(0, budget - count_tokens("\n\n".join(parts)))
+            per_turn = max(48, left // len(self.turns))
+            recent = []
+            for turn in self.turns:
+                user = truncate_tokens(turn["user"], per_turn // 3)
+                answer = trim_text(turn["assistant"], per_turn - count_tokens(user))
+                recent.append(f"User: {user}\nAssistant: {answer}")
+            parts.append("Recent turns:\n" + "\n\n".join(recent))
+        return "\n\n".join(parts)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Session":
+        return cls(**data)
+
+
+class SQLiteSessionSpill:
+    """
+    Overflow tier: sessions evicted from memory (or still live at shutdown)
+    are written here and moved back on their next request.
+    """
+
+    def __init__(self, db_path: Path):
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(db_path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS chat_sessions ("
+            " session_id TEXT PRIMARY KEY, updated_at REAL NOT NULL, data TEXT NOT NULL)"
+        )
+        self._conn.commit()
+
+    def save(self, sessions: Sequence[Session]) -> None:
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO chat_sessions (session_id, updated_at, data) VALUES (?, ?, ?)",
+                [(s.session_id, s.updated_at, json.dumps(s.to_dict(), ensure_ascii=False)) for s in sessions],
+            )
+            self._conn.commit()
+
+    def pop(self, session_id: str) -> Optional[Session]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data FROM chat_sessions WHERE session_id = ?", (session_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute("DELETE FROM chat_sessions WHERE session_id = ?", (session_id,))
+            self._conn.commit()
+        return Session.from_dict(json.loads(row[0]))
+
+    def delete(self, session_id: str) -> bool:
+        with self._lock:
+            cur = self._conn.execute("DELETE FROM chat_sessions WHERE session_id = ?", (session_id,))
+            self._conn.commit()
+        return cur.rowcount > 0
+
+    def expire(self, before: float) -> int:
+        with self._lock:
+            cur = self._conn.execute("DELETE FROM chat_sessions WHERE updated_at < ?", (before,))
+            self._conn.commit()
+        return cur.rowcount
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM chat_sessions")
+            self._conn.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM chat_sessions").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class SessionStore:
+    """
+    Chat sessions in a bounded in-memory LRU with an idle TTL. When full,
+    the least recently used session is spilled to SQLite if a spill is
+    configured, otherwise dropped.
+    """
+
+    def __init__(
+        self,
+        max_sessions: int = 1000,
+        ttl: float = 6 * 3600,
+        keep_turns: int = 4,
+        summary_tokens: int = 400,
+        spill: Optional[SQLiteSessionSpill] = None,
+    ):
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self.keep_turns = keep_turns
+        self.summary_tokens = summary_tokens
+        self.spill = spill
+        self._sessions: "OrderedDict[str, Session]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.created = 0
+        self.expired = 0
+        self.evicted = 0
+        self.spilled = 0
+        self.restored = 0
+
+    def _expired(self, session: Session, now: float) -> bool:
+        return now - session.updated_at > self.ttl
+
+    def _insert(self, session: Session) -> None:
+        """
+        Caller holds the lock.
+        """
+        self._sessions[session.session_id] = session
+        self._sessions.move_to_end(session.session_id)
+        overflow = []
+        while len(self._sessions) > self.max_sessions:
+            _, old = self._sessions.popitem(last=False)
+            overflow.append(old)
+        if overflow:
+            if self.spill is not None:
+                self.spill.save(overflow)
+                self.spilled += len(overflow)
+            else:
+                self.evicted += len(overflow)
+
+    def create(self, history: Optional[Sequence[str]] = None) -> Session:
+        """
+        Start a session. `history` (earlier user messages sent by clients of
+        the stateless API) seeds the rolling summary.
+        """
+        session = Session(session_id=uuid.uuid4().hex)
+        for message in history or []:
+            session.summary.append(f"- {truncate_tokens(message, 40)}")
+        with self._lock:
+            self._insert(session)
+            self.created += 1
+        return session
+
+    def get(self, session_id: str) -> Optional[Session]:
+        now = time.time()
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None and self.spill is not None:
+                session = self.spill.pop(session_id)
+                if session is not None:
+                    self.restored += 1
+                    self._insert(session)
+            if session is None:
+                return None
+            if self._expired(session, now):
+                del self._sessions[session_id]
+                self.expired += 1
+                return None
+            self._sessions.move_to_end(session_id)
+            return session
+
+    def get_or_create(self, session_id: Optional[str], history: Optional[Sequence[str]] = None) -> Session:
+        """
+        The live session `session_id`, or a new one when it is missing,
+        unknown or expired (the response carries the new id).
+        """
+        session = self.get(session_id) if session_id else None
+        return session if session is not None else self.create(history)
+
+    def record(self, session: Session, user: str, assistant: str) -> bool:
+        """
+        Append a turn if the session is still live. One deleted (or expired
+        and dropped) while the turn was in flight stays gone; one spilled
+        meanwhile is taken back out of the spill, so no stale copy remains.
+        Returns whether the turn was recorded.
+        """
+        with self._lock:
+            current = self._sessions.get(session.session_id)
+            if current is None and self.spill is not None and self.spill.pop(session.session_id) is not None:
+                current = session
+            if current is None:
+                return False
+            current.add_turn(user, assistant, self.keep_turns, self.summary_tokens)
+            self._insert(current)
+            return True
+
+    def delete(self, session_id: str) -> bool:
+        # under the lock, so an in-flight record() cannot see the spilled copy
+        # after the in-memory one is gone and bring the session back
+        with self._lock:
+            found = self._sessions.pop(session_id, None) is not None
+            if self.spill is not None:
+                found = self.spill.delete(session_id) or found
+        return found
+
+    def prune(self) -> int:
+        """
+        Drop every expired session, in memory and in the spill.
+        """
+        now = time.time()
+        with self._lock:
+            stale = [sid for sid, s in self._sessions.items() if self._expired(s, now)]
+            for sid in stale:
+                del self._sessions[sid]
+            self.expired += len(stale)
+        if self.spill is not None:
+            self.expired += self.spill.expire(now - self.ttl)
+        return len(stale)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._sessions.clear()
+        if self.spill is not None:
+            self.spill.clear()
+
+    def close(self) -> None:
+        """
+        Spill every live session so a restart can resume them.
+        """
+        if self.spill is None:
+            return
+        with self._lock:
+            live = list(self._sessions.values())
+            self._sessions.clear()
+        if live:
+            self.spill.save(live)
+        self.spill.close()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            in_memory = len(self._sessions)
+        return {
+            "backend": "sqlite" if self.spill is not None else "memory",
+            "sessions": in_memory,
+            "spilled_sessions": len(self.spill) if self.spill is not None else 0,
+            "max_sessions": self.max_sessions,
+            "ttl": self.ttl,
+            "created": self.created,
+            "expired": self.expired,
+            "evicted": self.evicted,
+            "spilled": self.spilled,
+            "restored": self.restored,
+        }
+
+
+_store: Optional[SessionStore] = None
+_store_lock = threading.Lock()
+
+
+def get_session_store() -> SessionStore:
+    """
+    Process-wide SessionStore. SESSION_SPILL="sqlite" adds the SQLite tier
+    at DATA_ROOT/chat_sessions.sqlite unless SESSION_SPILL_PATH is set.
+    """
+    global _store
+    with _store_lock:
+        if _store is None:
+            spill_mode = settings.SESSION_SPILL.lower()
+            if spill_mode == "sqlite":
+                path = Path(os.getenv("SESSION_SPILL_PATH", get_data_root() / "chat_sessions.sqlite")).resolve()
+                spill = SQLiteSessionSpill(path)
+            elif spill_mode == "off":
+                spill = None
+            else:
+                raise ValueError(f"Unknown SESSION_SPILL '{spill_mode}', expected sqlite or off")
+            _store = SessionStore(
+                max_sessions=settings.SESSION_MAX,
+                ttl=settings.SESSION_TTL,
+                keep_turns=settings.SESSION_KEEP_TURNS,
+                summary_tokens=settings.SESSION_SUMMARY_TOKENS,
+                spill=spill,
+            )
+    return _store
+
+
+def shutdown_session_store() -> None:
+    global _store
+    with _store_lock:
+        store, _store = _store, None
+    if store is not None:
+        store.close()
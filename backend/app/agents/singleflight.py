@@ -0,0 +1,107 @@
+import asyncio
+import hashlib
+import json
+import threading
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple, TypeVar
+
+from ..config import settings
+from ..utils.metrics import SINGLEFLIGHT_REQUESTS
+
+T = TypeVar("T")
+
+# per-request fields that do not change what the graph computes
+_KEY_IGNORED = ("session_id",)
+
+
+def request_key(state: Dict[str, Any]) -> str:
+    """
+    Coalescing key of a graph input: the concept with case and whitespace
+    normalized, plus every other input field (filters, conversation, ...).
+    """
+    fields = {k: v for k, v in state.items() if k not in _KEY_IGNORED}
+    fields["concept"] = " ".join(str(fields.get("concept", "")).casefold().split())
+    raw = json.dumps(fields, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class SingleFlight:
+    """
+    Collapses concurrent identical calls into one execution.
+
+    The first caller for a key (the leader) starts `fn` as its own task;
+    callers arriving while it runs await the same task and get the same
+    result or exception. Every caller awaits through asyncio.shield, so a
+    cancelled caller (a client that disconnected) only stops waiting: the
+    shared work keeps running for the others. Nothing is kept once the task
+    finishes; repeats after that are the response cache's job.
+    """
+
+    def __init__(self):
+        self._calls: Dict[str, asyncio.Task] = {}
+        self._lock = threading.Lock()
+        self.leaders = 0
+        self.coalesced = 0
+        self.errors = 0
+
+    def _forget(self, key: str, task: asyncio.Task) -> None:
+        with self._lock:
+            if self._calls.get(key) is task:
+                del self._calls[key]
+        if not task.cancelled() and task.exception() is not None:
+            # retrieved here so an error nobody waits for any more is not logged as unhandled
+            self.errors += 1
+
+    async def run(self, key: str, fn: Callable[[], Awaitable[T]]) -> Tuple[T, bool]:
+        """
+        Await fn() shared with any identical call in flight. Returns
+        (result, coalesced) where coalesced is True for followers.
+        """
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            task = self._calls.get(key)
+            # a task of another (e.g. closed test) event loop cannot be awaited here
+            coalesced = task is not None and task.get_loop() is loop
+            if coalesced:
+                self.coalesced += 1
+            else:
+                task = loop.create_task(fn())
+                task.add_done_callback(lambda t: self._forget(key, t))
+                self._calls[key] = task
+                self.leaders += 1
+        SINGLEFLIGHT_REQUESTS.inc(role="coalesced" if coalesced else "leader")
+        return await asyncio.shield(task), coalesced
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.leaders + self.coalesced
+        return {
+            "enabled": settings.SINGLEFLIGHT,
+            "in_flight": len(self._calls),
+            "leaders": self.leaders,
+            "coalesced": self.coalesced,
+            "errors": self.errors,
+            "coalesced_share": round(self.coalesced / total, 4) if total else 0.0,
+        }
+
+
+_flight: Optional[SingleFlight] = None
+_flight_lock = threading.Lock()
+
+
+def get_single_flight() -> SingleFlight:
+    global _flight
+    if _flight is None:
+        with _flight_lock:
+            if _flight is None:
+                _flight = SingleFlight()
+    return _flight
+
+
+async def coalesce(state: Dict[str, Any], fn: Callable[[], Awaitable[T]]) -> T:
+    """
+    fn() for the graph input `state`, shared with identical requests in
+    flight unless SINGLEFLIGHT is disabled.
+    """
+    if not settings.SINGLEFLIGHT:
+        return await fn()
+    result, _ = await get_single_flight().run(request_key(state), fn)
+    return result
@@ -0,0 +1,100 @@
+import time
+from typing import Any, AsyncIterator, Callable, Dict, Optional, Tuple
+
+from ..utils.streaming import normalize_recommendation_text, recommendation_normalizer, sse_event
+
+# which state key each agent node writes; summarize (the executive summary) streams token by token
+NODE_OUTPUTS = {
+    "content_scout": "scout_analysis",
+    "audience_fit": "audience_insights",
+    "competitive": "competitive_insights",
+    "summarize": "executive_summary",
+}
+TOKEN_NODE = "summarize"
+
+
+async def astream_graph(graph, state: Dict[str, Any]) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+    """
+    Run the graph and yield (event, payload) pairs while it executes:
+
+    - ("retrieval", retrieval_stats + sources) once the catalog search is done
+    - ("node", {"node", "output", "elapsed_ms"}) as each agent finishes
+    - ("token", {"text"}) for every executive-summary token, as generated
+    - ("result", final_state) at the end
+
+    Uses LangGraph's combined "updates" + "messages" stream modes, so the
+    chat models inside the nodes stream without any change to the agents.
+    """
+    t0 = time.perf_counter()
+    final: Dict[str, Any] = dict(state)
+
+    async for mode, chunk in graph.astream(state, stream_mode=["updates", "messages"]):
+        if mode == "messages":
+            message, meta = chunk
+            text = message.content if isinstance(message.content, str) else ""
+            if text and meta.get("langgraph_node") == TOKEN_NODE:
+                yield "token", {"text": text}
+            continue
+
+        for node, update in chunk.items():
+            update = update or {}
+            final.update(update)
+            elapsed_ms = round((time.perf_counter() - t0) * 1000, 2)
+            if node == "retrieve":
+                yield "retrieval", {
+                    "sources": final.get("similar_titles") or [],
+                    "retrieval": final.get("retrieval_stats") or {},
+                    "elapsed_ms": elapsed_ms,
+                }
+            elif node in NODE_OUTPUTS:
+                payload: Dict[str, Any] = {"node": node, "elapsed_ms": elapsed_ms}
+                if node != TOKEN_NODE:
+                    payload["output"] = update.get(NODE_OUTPUTS[node], "")
+                yield "node", payload
+
+    yield "result", final
+
+
+async def sse_stream(
+    graph,
+    state: Dict[str, Any],
+    extract_answer: Callable[[Dict[str, Any]], str],
+    on_done: Optional[Callable[[Dict[str, Any], str], None]] = None,
+) -> AsyncIterator[str]:
+    """
+    Server-sent-event body for the streaming chat / analyze endpoints.
+
+    Emits "start" immediately (time-to-first-byte), then "retrieval",
+    "node" and "token" events as the graph runs, and finally "done" with
+    the normalized answer and sources, or "error" if the graph fails.
+    Tokens pass through the same recommendation normalizer as the final
+    answer, incrementally, so the streamed text matches it. `on_done(final_state, answer)` runs before
+    the "done" event (the chat endpoint records the session turn there).
+    """
+    yield sse_event("start", {"nodes": list(NODE_OUTPUTS)})
+
+    normalizer = recommendation_normalizer()
+    try:
+        async for event, payload in astream_graph(graph, state):
+            if event == "token":
+                text = normalizer.feed(payload["text"])
+                if text:
+                    yield sse_event("token", {"text": text})
+            elif event == "result":
+                tail = normalizer.flush()
+                if tail:
+                    yield sse_event("token", {"text": tail})
+                answer = normalize_recommendation_text(extract_answer(payload))
+                if on_done is not None:
+                    on_done(payload, answer)
+                yield sse_event("done", {
+                    "session_id": str(payload.get("session_id") or ""),
+                    "answer": answer,
+                    "sources": payload.get("similar_titles") or [],
+                    "retrieval": payload.get("retrieval_stats") or {},
+                })
+            else:
+                yield sse_event(event, payload)
+    except Exception as exc:
+        print(f"[ERROR] Streaming graph run failed: {exc}")
+        yield sse_event("error", {"error": f"{type(exc).__name__}: {exc}"})
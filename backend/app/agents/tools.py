@@ -1,19 +1,82 @@
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Union
 from langchain_core.tools import tool
-from ..rag.retriever import retrieve_similar_titles
+from .sentiment import get_sentiment_model
+from ..rag.filters import TitleFilters
+from ..rag.retriever import retrieve_similar_titles, aretrieve_similar_titles, aretrieve_many
 
-@tool
-def search_similar_titles(query: str) -> List[Dict[str, Any]]:
-    """
-    Search for titles that are semantically similar to the given query.
-    Returns a list of dicts with 'title', 'doc_id', and 'snippet'.
-    """
-    docs = retrieve_similar_titles(query, k=8)
+
+def _as_filters(filters: Union[TitleFilters, Dict[str, Any], None]) -> Optional[TitleFilters]:
+    if filters is None or isinstance(filters, TitleFilters):
+        return filters
+    return TitleFilters(**filters)
+
+
+def _to_results(docs) -> List[Dict[str, Any]]:
     results = []
     for d in docs:
         results.append({
             "title": d.metadata.get("title", "Unknown"),
-            "doc_id": d.metadata.get("doc_id", ""),
+            "doc_id": d.metadata.get("doc_id") or d.metadata.get("show_id", ""),
+            "type": d.metadata.get("type", ""),
+            "country": d.metadata.get("country", ""),
+            "release_year": d.metadata.get("release_year", ""),
+            "genres": d.metadata.get("genres", ""),
+            "description": d.page_content.partition("Description: ")[2],
             "snippet": d.page_content[:400],
         })
-    return results
\ No newline at end of file
+    return results
+
+
+@tool
+def search_similar_titles(query: str, filters: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+    """
+    Search for titles that are semantically similar to the given query.
+    Optional filters: {"countries": [...], "types": [...], "genres": [...],
+    "year_min": int, "year_max": int}; countries may be regions such as
+    "North America".
+    Returns a list of dicts with 'title', 'doc_id' (the catalog show_id),
+    'type', 'country', 'release_year', 'genres', 'description' and 'snippet'.
+    """
+    docs = retrieve_similar_titles(query, k=8, filters=_as_filters(filters))
+    return _to_results(docs)
+
+
+async def asearch_similar_titles(
+    query: str,
+    filters: Union[TitleFilters, Dict[str, Any], None] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Async counterpart of the search_similar_titles tool, used by the agents.
+    """
+    docs = await aretrieve_similar_titles(query, k=8, filters=_as_filters(filters))
+    return _to_results(docs)
+
+
+async def asearch_many(
+    queries: List[str],
+    filters: Optional[List[Union[TitleFilters, Dict[str, Any], None]]] = None,
+) -> List[List[Dict[str, Any]]]:
+    """
+    Batched asearch_similar_titles: one embedding call for all queries.
+    """
+    filters = [_as_filters(f) for f in (filters or [None] * len(queries))]
+    batches = await aretrieve_many(queries, k=8, filters=filters)
+    return [_to_results(docs) for docs in batches]
+
+
+@tool
+def score_review_sentiment(reviews: List[str]) -> Dict[str, Any]:
+    """
+    Estimate audience sentiment for review or comment texts with the local
+    IMDB sentiment model (no LLM call).
+    Returns 'mean_positive' (0-1), 'positive_share' and per-review
+    'scores' with 'label' and 'positive' probability.
+    """
+    scores = get_sentiment_model().score(reviews)
+    if not scores:
+        return {"mean_positive": 0.0, "positive_share": 0.0, "scores": []}
+    return {
+        "mean_positive": round(sum(s["positive"] for s in scores) / len(scores), 4),
+        "positive_share": round(sum(s["label"] == "positive" for s in scores) / len(scores), 4),
+        "scores": scores,
+    }
@@ -9,5 +9,58 @@ class Settings:
     EMBEDDING_MODEL: str = "text-embedding-3-small"
     CHAT_MODEL: str = "gpt-4.1-mini"
     VECTOR_DB_DIR: str = "data/chroma_index"
+    # "parallel" runs audience_fit / competitive side by side, "sequential" keeps the old chain
+    GRAPH_SCHEDULING: str = os.getenv("GRAPH_SCHEDULING", "parallel")
+    # shared HTTP pool used by every pooled ChatOpenAI client
+    LLM_MAX_CONNECTIONS: int = int(os.getenv("LLM_MAX_CONNECTIONS", "50"))
+    LLM_MAX_KEEPALIVE: int = int(os.getenv("LLM_MAX_KEEPALIVE", "20"))
+    LLM_TIMEOUT: float = float(os.getenv("LLM_TIMEOUT", "60"))
+    # global provider rate limits (requests / tokens per minute, 0 = unlimited) and the
+    # ceiling of the adaptive concurrency limit, which halves on every 429;
+    # LLM_COMPLETION_ESTIMATE is the completion size charged up front per chat call
+    LLM_RPM: float = float(os.getenv("LLM_RPM", "0"))
+    LLM_TPM: float = float(os.getenv("LLM_TPM", "0"))
+    LLM_MAX_CONCURRENCY: int = int(os.getenv("LLM_MAX_CONCURRENCY", "32"))
+    LLM_COMPLETION_ESTIMATE: int = int(os.getenv("LLM_COMPLETION_ESTIMATE", "500"))
+    EMBEDDING_RPM: float = float(os.getenv("EMBEDDING_RPM", "0"))
+    EMBEDDING_TPM: float = float(os.getenv("EMBEDDING_TPM", "0"))
+    EMBEDDING_MAX_CONCURRENCY: int = int(os.getenv("EMBEDDING_MAX_CONCURRENCY", "16"))
+    # /api/analyze_title/batch: graphs in flight at once, and max concepts per call
+    BATCH_CONCURRENCY: int = int(os.getenv("BATCH_CONCURRENCY", "8"))
+    BATCH_MAX_ITEMS: int = int(os.getenv("BATCH_MAX_ITEMS", "500"))
+    # semantic response cache: cosine similarity needed to reuse an answer (>1 disables)
+    RESPONSE_CACHE_THRESHOLD: float = float(os.getenv("RESPONSE_CACHE_THRESHOLD", "0.97"))
+    RESPONSE_CACHE_TTL: float = float(os.getenv("RESPONSE_CACHE_TTL", "3600"))
+    RESPONSE_CACHE_SIZE: int = int(os.getenv("RESPONSE_CACHE_SIZE", "512"))
+    # share one graph run between identical concurrent chat / analyze requests
+    SINGLEFLIGHT: bool = os.getenv("SINGLEFLIGHT", "1").lower() not in ("0", "false", "off")
+    # per-node memoization of agent outputs: "memory", "sqlite" or "off"
+    NODE_MEMO_BACKEND: str = os.getenv("NODE_MEMO_BACKEND", "memory")
+    NODE_MEMO_SIZE: int = int(os.getenv("NODE_MEMO_SIZE", "2048"))
+    # local TF-IDF + logistic-regression sentiment pipeline (models/ at the repo root)
+    SENTIMENT_MODEL_PATH: str | None = os.getenv("SENTIMENT_MODEL_PATH")
+    SENTIMENT_MAX_TEXTS: int = int(os.getenv("SENTIMENT_MAX_TEXTS", "50000"))
+    # batches at least this large are split across SENTIMENT_WORKERS processes
+    SENTIMENT_POOL_MIN: int = int(os.getenv("SENTIMENT_POOL_MIN", "20000"))
+    SENTIMENT_WORKERS: int = int(os.getenv("SENTIMENT_WORKERS", "0"))
+    # token budget of the packed context (retrieved titles / upstream analyses)
+    # each agent's prompt may carry; 0 disables trimming
+    CONTEXT_BUDGET_CONTENT_SCOUT: int = int(os.getenv("CONTEXT_BUDGET_CONTENT_SCOUT", "600"))
+    CONTEXT_BUDGET_COMPETITIVE: int = int(os.getenv("CONTEXT_BUDGET_COMPETITIVE", "450"))
+    CONTEXT_BUDGET_AUDIENCE_FIT: int = int(os.getenv("CONTEXT_BUDGET_AUDIENCE_FIT", "700"))
+    CONTEXT_BUDGET_EXECUTIVE_SUMMARY: int = int(os.getenv("CONTEXT_BUDGET_EXECUTIVE_SUMMARY", "1500"))
+    # server-side chat sessions: LRU size, idle TTL (s), turns kept verbatim,
+    # token caps of the rolling summary and of the whole conversation context;
+    # SESSION_SPILL="sqlite" moves evicted sessions to disk instead of dropping them
+    SESSION_MAX: int = int(os.getenv("SESSION_MAX", "1000"))
+    SESSION_TTL: float = float(os.getenv("SESSION_TTL", "21600"))
+    SESSION_KEEP_TURNS: int = int(os.getenv("SESSION_KEEP_TURNS", "4"))
+    SESSION_SUMMARY_TOKENS: int = int(os.getenv("SESSION_SUMMARY_TOKENS", "400"))
+    SESSION_CONTEXT_TOKENS: int = int(os.getenv("SESSION_CONTEXT_TOKENS", "900"))
+    SESSION_SPILL: str = os.getenv("SESSION_SPILL", "off")
+    # startup warmup (graph, clients, index): "background" lets /healthz answer
+    # while /readyz stays 503 until done, "blocking" finishes it before serving,
+    # "off" keeps everything lazy (first request pays)
+    WARMUP: str = os.getenv("WARMUP", "background")
 
-settings = Settings()
\ No newline at end of file
+settings = Settings()
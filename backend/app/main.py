@@ -1,11 +1,50 @@
-from fastapi import FastAPI
+import asyncio
+import logging
+import time
+import uuid
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from .routes import chat, analyze, admin
+from fastapi.responses import JSONResponse
+from .agents.runtime import shutdown_runtime
+from .agents.sentiment import shutdown_sentiment_model
+from .agents.sessions import shutdown_session_store
+from .config import settings
+from .routes import chat, analyze, admin, catalog, explore, sentiment
+from .utils.logging import setup_logging
+from .utils.metrics import HTTP_REQUEST_SECONDS, HTTP_REQUESTS_IN_FLIGHT, request_id_var
+from .warmup import Warmup
+
+setup_logging()
+logger = logging.getLogger("app.http")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Compile the graph, open the LLM / embedding clients and the vector index
+    # once per process, before traffic arrives (see /readyz)
+    warmup = app.state.warmup = Warmup()
+    task = None
+    if settings.WARMUP == "off":
+        warmup.skip()
+    elif settings.WARMUP == "blocking":
+        await asyncio.to_thread(warmup.run)
+    else:
+        task = asyncio.create_task(asyncio.to_thread(warmup.run))
+    yield
+    if task is not None:
+        await task
+    shutdown_session_store()
+    shutdown_sentiment_model()
+    await shutdown_runtime()
+
 
 app = FastAPI(
     title="StreamIntel360 API",
     description="Multi-agent content intelligence backend for StreamIntel360.",
     version="0.1.0",
+    lifespan=lifespan,
 )
 
 origins = [
@@ -21,6 +60,34 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.middleware("http")
+async def request_context(request: Request, call_next):
+    """
+    Tag the request with an id (client-supplied X-Request-ID or a fresh
+    one) visible in every log line it causes, and record in-flight and
+    latency metrics per route.
+    """
+    request_id = request.headers.get("X-Request-ID") or uuid.uuid4().hex[:16]
+    token = request_id_var.set(request_id)
+    HTTP_REQUESTS_IN_FLIGHT.inc()
+    t0 = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        response.headers["X-Request-ID"] = request_id
+        return response
+    finally:
+        elapsed = time.perf_counter() - t0
+        HTTP_REQUESTS_IN_FLIGHT.dec()
+        # label by route template, not the raw path, to keep cardinality bounded
+        path = request.url.path if request.scope.get("route") is not None else "unmatched"
+        for name, value in request.path_params.items():
+            path = path.replace(str(value), "{" + name + "}")
+        HTTP_REQUEST_SECONDS.observe(elapsed, method=request.method, path=path, status=str(status))
+        logger.info("%s %s -> %d in %.3fs", request.method, request.url.path, status, elapsed)
+        request_id_var.reset(token)
+
 @app.get("/")
 async def read_root():
     return {
@@ -29,7 +96,28 @@ async def read_root():
         "docs": "/docs",
     }
 
+@app.get("/healthz")
+async def healthz():
+    """
+    Liveness: the process is up and the event loop is responsive.
+    """
+    return {"status": "ok"}
+
+@app.get("/readyz")
+async def readyz(request: Request):
+    """
+    Readiness: 200 once the startup warmup has opened the index and the
+    clients, 503 (with per-step timings and errors) until then.
+    """
+    warmup = getattr(request.app.state, "warmup", None)
+    if warmup is None:  # lifespan not run (yet)
+        return JSONResponse({"status": "pending"}, status_code=503)
+    return JSONResponse(warmup.to_dict(), status_code=200 if warmup.ready else 503)
+
 # IMPORTANT: global /api prefix only here
 app.include_router(chat.router, prefix="/api")
 app.include_router(analyze.router, prefix="/api")
-app.include_router(admin.router, prefix="/api")
\ No newline at end of file
+app.include_router(admin.router, prefix="/api")
+app.include_router(sentiment.router, prefix="/api")
+app.include_router(explore.router, prefix="/api")
+app.include_router(catalog.router, prefix="/api")
\ No newline at end of file
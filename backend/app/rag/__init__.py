@@ -9,8 +9,17 @@ This package contains:
 You usually run ingestion with:
 
     python -m app.rag.ingest
+
+ingest.py pulls in pandas, which serving never needs, so `run_ingest` is
+resolved on first access instead of at package import.
 """
 
-from .ingest import run_ingest
+__all__ = ["run_ingest"]
+
+
+def __getattr__(name):
+    if name == "run_ingest":
+        from .ingest import run_ingest
 
-__all__ = ["run_ingest"]
\ No newline at end of file
+        return run_ingest
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
\ No newline at end of file
@@ -0,0 +1,452 @@
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .filters import TitleFilters, expand_countries
+from .neighbours import NeighbourGraph
+from .vectorstore import get_active_collection, get_artifact_path
+
+UNKNOWN = "Unknown"
+# titles whose top-k neighbour similarities are averaged into their density
+DENSITY_K = 10
+# growth compares the last GROWTH_WINDOW release years (ending at the latest
+# year with real catalog volume) with the window before
+GROWTH_WINDOW = 3
+# weights of the saturation score components (renormalized when density is missing)
+SATURATION_WEIGHTS = {"size": 0.5, "density": 0.3, "growth": 0.2}
+SATURATION_LEVELS = ((0.66, "high"), (0.33, "medium"), (0.0, "low"))
+
+_ARRAYS = (
+    "ids", "genre_vocab", "country_vocab", "type_vocab", "genre_bits", "country_bits",
+    "type_codes", "years", "year_axis", "cube", "density",
+)
+
+
+def _terms(value: str) -> List[str]:
+    return [part.strip() for part in str(value or "").split(",") if part.strip()] or [UNKNOWN]
+
+
+def _year(value) -> int:
+    try:
+        return int(float(value))
+    except (TypeError, ValueError):
+        return 0
+
+
+def _percentile(sorted_values: np.ndarray, value: float) -> float:
+    if not len(sorted_values):
+        return 0.0
+    return float(np.searchsorted(sorted_values, value, side="right")) / len(sorted_values)
+
+
+class CatalogAnalytics:
+    """
+    Columnar aggregates of the catalog, built at ingest time so market
+    saturation is computed exactly over every title instead of guessed from
+    a handful of retrieved snippets.
+
+    Per title: genre and country membership bitmaps (n x vocab bool), a
+    type code, the release year and a semantic density (mean similarity of
+    its DENSITY_K nearest titles, from the neighbour graph). Per cell: the
+    genre x country x type x release-year count cube (a title counts once in
+    every genre / country pair it lists). A segment query is a handful of
+    vectorized column ops over these arrays.
+    """
+
+    def __init__(self, ids, genre_vocab, country_vocab, type_vocab, genre_bits, country_bits,
+                 type_codes, years, year_axis, cube, density):
+        self.ids = ids
+        self.genre_vocab = genre_vocab
+        self.country_vocab = country_vocab
+        self.type_vocab = type_vocab
+        self.genre_bits = genre_bits
+        self.country_bits = country_bits
+        self.type_codes = type_codes
+        self.years = years
+        self.year_axis = year_axis
+        self.cube = cube
+        self.density = density
+
+        self.has_density = bool(np.any(density))
+        # growth windows end at the latest release year with real volume, so
+        # a stray future-dated row does not leave the "recent" window empty
+        catalog_by_year = self._by_year(years)
+        busy = np.flatnonzero(catalog_by_year >= 0.05 * catalog_by_year.max()) if len(catalog_by_year) else ()
+        self._anchor = int(busy[-1]) + 1 if len(busy) else 0
+        # reference distributions the saturation components are ranked against;
+        # segment sizes per (filtered dimensions, year range), built on demand
+        self._size_refs: Dict[Tuple[Tuple[str, ...], int, int], np.ndarray] = {}
+        self._size_refs_lock = threading.Lock()
+        self._density_sorted = np.sort(density)
+        self._lower = {
+            "genre": [g.lower() for g in genre_vocab.tolist()],
+            "country": {c.lower(): i for i, c in enumerate(country_vocab.tolist())},
+            "type": {t.lower(): i for i, t in enumerate(type_vocab.tolist())},
+        }
+        self._row_of: Optional[Dict[str, int]] = None
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @classmethod
+    def build(
+        cls,
+        ids: Sequence[str],
+        countries: Sequence[str],
+        types: Sequence[str],
+        genres: Sequence[str],
+        years: Sequence[str],
+        neighbours: Optional[NeighbourGraph] = None,
+    ) -> "CatalogAnalytics":
+        n = len(ids)
+        genre_terms = [_terms(v) for v in genres]
+        country_terms = [_terms(v) for v in countries]
+        type_terms = [str(v or "").strip() or UNKNOWN for v in types]
+
+        genre_vocab = sorted({t for terms in genre_terms for t in terms})
+        country_vocab = sorted({t for terms in country_terms for t in terms})
+        type_vocab = sorted(set(type_terms))
+        genre_slot = {t: i for i, t in enumerate(genre_vocab)}
+        country_slot = {t: i for i, t in enumerate(country_vocab)}
+        type_slot = {t: i for i, t in enumerate(type_vocab)}
+
+        genre_bits = np.zeros((n, len(genre_vocab)), dtype=bool)
+        country_bits = np.zeros((n, len(country_vocab)), dtype=bool)
+        for row, (gs, cs) in enumerate(zip(genre_terms, country_terms)):
+            genre_bits[row, [genre_slot[t] for t in gs]] = True
+            country_bits[row, [country_slot[t] for t in cs]] = True
+        type_codes = np.array([type_slot[t] for t in type_terms], dtype=np.int8)
+        year_values = np.array([_year(y) for y in years], dtype=np.int16)
+
+        known = year_values[year_values > 0]
+        year_axis = np.arange(known.min(), known.max() + 1, dtype=np.int16) if len(known) else np.zeros(0, np.int16)
+        cube = np.zeros((len(genre_vocab), len(country_vocab), len(type_vocab), len(year_axis)), dtype=np.int32)
+        if len(year_axis):
+            g_idx, c_idx, t_idx, y_idx = [], [], [], []
+            for row in np.flatnonzero(year_values > 0):
+                gs = np.flatnonzero(genre_bits[row])
+                cs = np.flatnonzero(country_bits[row])
+                g_idx.extend(np.repeat(gs, len(cs)))
+                c_idx.extend(np.tile(cs, len(gs)))
+                t_idx.extend([type_codes[row]] * (len(gs) * len(cs)))
+                y_idx.extend([year_values[row] - year_axis[0]] * (len(gs) * len(cs)))
+            np.add.at(cube, (g_idx, c_idx, t_idx, y_idx), 1)
+
+        density = np.zeros(n, dtype=np.float32)
+        if neighbours is not None and neighbours.top_n:
+            k = min(DENSITY_K, neighbours.top_n)
+            per_row = neighbours.scores[:, :k].astype(np.float32).mean(axis=1)
+            for row, doc_id in enumerate(ids):
+                graph_row = neighbours.row_of(doc_id)
+                if graph_row is not None:
+                    density[row] = per_row[graph_row]
+
+        return cls(
+            ids=np.array(list(ids), dtype=str),
+            genre_vocab=np.array(genre_vocab, dtype=str),
+            country_vocab=np.array(country_vocab, dtype=str),
+            type_vocab=np.array(type_vocab, dtype=str),
+            genre_bits=genre_bits,
+            country_bits=country_bits,
+            type_codes=type_codes,
+            years=year_values,
+            year_axis=year_axis,
+            cube=cube,
+            density=density,
+        )
+
+    def save(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.name + ".tmp.npz")
+        np.savez_compressed(tmp, **{key: getattr(self, key) for key in _ARRAYS})
+        tmp.replace(path)
+
+    @classmethod
+    def load(cls, path: Path) -> "CatalogAnalytics":
+        with np.load(path, allow_pickle=False) as data:
+            return cls(**{key: data[key] for key in _ARRAYS})
+
+    # ---------- queries ----------
+
+    def _slots(self, filters: TitleFilters) -> Dict[str, Optional[np.ndarray]]:
+        """
+        Vocabulary slots selected per dimension (None = not filtered). Genres
+        match by substring and countries accept regions, as in TitleFilters.
+        """
+        slots: Dict[str, Optional[np.ndarray]] = {"genre": None, "country": None, "type": None}
+        if filters.genres:
+            wanted = [g.strip().lower() for g in filters.genres if g.strip()]
+            slots["genre"] = np.array(
+                [i for i, term in enumerate(self._lower["genre"]) if any(w in term for w in wanted)], dtype=np.int64
+            )
+        if filters.countries:
+            lookup = self._lower["country"]
+            found = {lookup[c.strip().lower()] for c in expand_countries(filters.countries) if c.strip().lower() in lookup}
+            slots["country"] = np.array(sorted(found), dtype=np.int64)
+        if filters.types:
+            lookup = self._lower["type"]
+            slots["type"] = np.array(
+                sorted({lookup[t.strip().lower()] for t in filters.types if t.strip().lower() in lookup}), dtype=np.int64
+            )
+        return slots
+
+    def _year_bounds(self, filters: TitleFilters):
+        lo = filters.year_min if filters.year_min is not None else -1
+        hi = filters.year_max if filters.year_max is not None else np.iinfo(np.int16).max
+        return lo, hi
+
+    def _mask(self, filters: TitleFilters, slots: Dict[str, Optional[np.ndarray]]) -> np.ndarray:
+        mask = np.ones(len(self.ids), dtype=bool)
+        if slots["genre"] is not None:
+            mask &= self.genre_bits[:, slots["genre"]].any(axis=1)
+        if slots["country"] is not None:
+            mask &= self.country_bits[:, slots["country"]].any(axis=1)
+        if slots["type"] is not None:
+            mask &= np.isin(self.type_codes, slots["type"])
+        if filters.year_min is not None or filters.year_max is not None:
+            lo, hi = self._year_bounds(filters)
+            mask &= (self.years >= lo) & (self.years <= hi)
+        return mask
+
+    def rows_for_ids(self, ids: Iterable[str]) -> np.ndarray:
+        if self._row_of is None:
+            self._row_of = {doc_id: i for i, doc_id in enumerate(self.ids.tolist())}
+        row_of = self._row_of
+        return np.fromiter((row_of[i] for i in ids if i in row_of), dtype=np.int64)
+
+    def _by_year(self, years: np.ndarray) -> np.ndarray:
+        if not len(self.year_axis):
+            return np.zeros(0, dtype=np.int64)
+        known = years[years > 0] - self.year_axis[0]
+        return np.bincount(known, minlength=len(self.year_axis))
+
+    def _reference_sizes(self, dims: Tuple[str, ...], lo: int, hi: int) -> np.ndarray:
+        """
+        Sorted title counts of every non-empty segment of the same shape: one
+        value per combination of a single vocabulary term in each filtered
+        dimension, over the same year range. A genre + type segment is ranked
+        against all (genre, type) pairs, not against finer genre x country x
+        type cells, so its size percentile spreads over the whole 0-1 range.
+        """
+        key = (dims, lo, hi)
+        ref = self._size_refs.get(key)
+        if ref is not None:
+            return ref
+        rows = (self.years >= lo) & (self.years <= hi)
+        members = {
+            "genre": self.genre_bits[rows],
+            "country": self.country_bits[rows],
+            "type": self.type_codes[rows, None] == np.arange(len(self.type_vocab)),
+        }
+        if len(dims) == 3:
+            # a title counts once per genre x country x type cell: the cube
+            in_range = (self.year_axis >= lo) & (self.year_axis <= hi)
+            cells = self.cube[..., in_range].sum(axis=3)
+        elif len(dims) == 2:
+            cells = members[dims[0]].T.astype(np.int32) @ members[dims[1]].astype(np.int32)
+        elif len(dims) == 1:
+            cells = members[dims[0]].sum(axis=0)
+        else:
+            cells = np.array([int(rows.sum())])
+        ref = np.sort(cells[cells > 0].ravel()).astype(np.int32)
+        with self._size_refs_lock:
+            self._size_refs[key] = ref
+        return ref
+
+    def _window_counts(self, by_year: np.ndarray):
+        end = self._anchor
+        recent = int(by_year[max(0, end - GROWTH_WINDOW):end].sum())
+        previous = int(by_year[max(0, end - 2 * GROWTH_WINDOW):max(0, end - GROWTH_WINDOW)].sum())
+        return recent, previous
+
+    def _breakdown(self, slots: Dict[str, Optional[np.ndarray]], filters: TitleFilters, top: int) -> List[Dict[str, Any]]:
+        """
+        Largest genre x country x type cells inside the segment, from the cube.
+        """
+        cube = self.cube
+        axes = []
+        for dim, size in (("genre", cube.shape[0]), ("country", cube.shape[1]), ("type", cube.shape[2])):
+            axes.append(slots[dim] if slots[dim] is not None else np.arange(size))
+        if not all(len(a) for a in axes) or not len(self.year_axis):
+            return []
+        lo, hi = self._year_bounds(filters)
+        in_range = (self.year_axis >= lo) & (self.year_axis <= hi)
+        cells = cube[np.ix_(axes[0], axes[1], axes[2], np.flatnonzero(in_range))].sum(axis=3)
+        flat = cells.ravel()
+        nonzero = np.flatnonzero(flat)
+        if not len(nonzero):
+            return []
+        best = nonzero[np.argsort(-flat[nonzero], kind="stable")[:top]]
+        out = []
+        for g, c, t in zip(*np.unravel_index(best, cells.shape)):
+            out.append({
+                "genre": str(self.genre_vocab[axes[0][g]]),
+                "country": str(self.country_vocab[axes[1][c]]),
+                "type": str(self.type_vocab[axes[2][t]]),
+                "titles": int(cells[g, c, t]),
+            })
+        return out
+
+    def segment(
+        self,
+        filters: Optional[TitleFilters] = None,
+        around_ids: Optional[Sequence[str]] = None,
+        top: int = 8,
+    ) -> Dict[str, Any]:
+        """
+        Exact saturation metrics of a catalog segment (the whole catalog when
+        `filters` is empty): size, recent growth against the catalog's own
+        growth, semantic density and a 0-1 saturation score. `around_ids`
+        (e.g. the titles retrieved for a concept) measures density around
+        those titles instead of over the whole segment.
+        """
+        t0 = time.perf_counter()
+        filters = filters or TitleFilters()
+        slots = self._slots(filters)
+        mask = self._mask(filters, slots)
+        titles = int(mask.sum())
+
+        by_year = self._by_year(self.years[mask])
+        recent, previous = self._window_counts(by_year)
+        cat_recent, cat_previous = self._window_counts(self._by_year(self.years))
+        ratio = (recent + 1) / (previous + 1)
+        relative = ratio / ((cat_recent + 1) / (cat_previous + 1))
+
+        density_rows = self.rows_for_ids(around_ids) if around_ids else np.flatnonzero(mask)
+        mean_density = float(self.density[density_rows].mean()) if len(density_rows) and self.has_density else None
+
+        dims = tuple(dim for dim in ("genre", "country", "type") if slots[dim] is not None)
+        components = {
+            "size": _percentile(self._reference_sizes(dims, *self._year_bounds(filters)), titles),
+            "growth": relative / (1 + relative),
+        }
+        if mean_density is not None:
+            components["density"] = _percentile(self._density_sorted, mean_density)
+        weight = sum(SATURATION_WEIGHTS[k] for k in components)
+        score = sum(SATURATION_WEIGHTS[k] * v for k, v in components.items()) / weight
+        level = next(name for floor, name in SATURATION_LEVELS if score >= floor)
+
+        type_counts = np.bincount(self.type_codes[mask], minlength=len(self.type_vocab))
+        trend = slice(max(0, self._anchor - 2 * GROWTH_WINDOW - 4), self._anchor)
+        return {
+            "segment": {
+                "genres": self.genre_vocab[slots["genre"]].tolist() if slots["genre"] is not None else None,
+                "countries": self.country_vocab[slots["country"]].tolist() if slots["country"] is not None else None,
+                "types": self.type_vocab[slots["type"]].tolist() if slots["type"] is not None else None,
+                "year_min": filters.year_min,
+                "year_max": filters.year_max,
+            },
+            "titles": titles,
+            "share": round(titles / len(self.ids), 4) if len(self.ids) else 0.0,
+            "by_type": {str(t): int(c) for t, c in zip(self.type_vocab.tolist(), type_counts) if c},
+            "trend": {
+                "years": self.year_axis[trend].tolist(),
+                "titles": by_year[trend].tolist(),
+            },
+            "growth": {
+                "window_years": GROWTH_WINDOW,
+                "through_year": int(self.year_axis[self._anchor - 1]) if self._anchor else None,
+                "recent": recent,
+                "previous": previous,
+                "ratio": round(ratio, 3),
+                "vs_catalog": round(relative, 3),
+            },
+            "density": {
+                "scope": "around_titles" if around_ids else "segment",
+                "mean_neighbour_similarity": round(mean_density, 4) if mean_density is not None else None,
+                "percentile": round(components["density"], 3) if "density" in components else None,
+            },
+            "saturation": {
+                "score": round(score, 3),
+                "level": level,
+                "components": {k: round(v, 3) for k, v in components.items()},
+            },
+            "breakdown": self._breakdown(slots, filters, top),
+            "elapsed_us": round((time.perf_counter() - t0) * 1e6, 1),
+        }
+
+
+def infer_segment(similar: Sequence[Dict[str, Any]], filters: Optional[TitleFilters] = None) -> TitleFilters:
+    """
+    The segment a concept competes in: the explicit filters where given,
+    otherwise the most common genre and type among its retrieved titles.
+    """
+    filters = filters or TitleFilters()
+    genres = Counter(g for item in similar for g in _terms(item.get("genres")) if g != UNKNOWN)
+    types = Counter(str(item.get("type") or "").strip() for item in similar if item.get("type"))
+    update: Dict[str, Any] = {}
+    if not filters.genres and genres:
+        update["genres"] = [genres.most_common(1)[0][0]]
+    if not filters.types and types:
+        update["types"] = [types.most_common(1)[0][0]]
+    return filters.model_copy(update=update)
+
+
+def render_segment(stats: Dict[str, Any]) -> str:
+    """
+    Compact prompt text of segment() output.
+    """
+    seg = stats["segment"]
+    scope = "; ".join(
+        f"{name}: {', '.join(values)}"
+        for name, values in (("genres", seg["genres"]), ("countries", seg["countries"]), ("types", seg["types"]))
+        if values
+    ) or "whole catalog"
+    growth, density, sat = stats["growth"], stats["density"], stats["saturation"]
+    lines = [
+        f"Segment ({scope}): {stats['titles']} titles ({stats['share']:.1%} of catalog).",
+        f"Releases in the {growth['window_years']} years to {growth['through_year']}: "
+        f"{growth['recent']} vs {growth['previous']} in the {growth['window_years']} before "
+        f"(x{growth['ratio']}, x{growth['vs_catalog']} relative to catalog growth).",
+    ]
+    if density["mean_neighbour_similarity"] is not None:
+        lines.append(f"Semantic density: mean neighbour similarity {density['mean_neighbour_similarity']} "
+                     f"({density['percentile']:.0%} percentile of catalog titles).")
+    lines.append(f"Saturation score: {sat['score']} -> {sat['level'].upper()}.")
+    if stats["breakdown"]:
+        lines.append("Largest cells: " + "; ".join(
+            f"{c['genre']} / {c['country']} / {c['type']}: {c['titles']}" for c in stats["breakdown"][:4]
+        ) + ".")
+    return "\n".join(lines)
+
+
+def build_catalog_analytics(
+    collection_name: str,
+    ids,
+    countries,
+    types,
+    genres,
+    years,
+    neighbours: Optional[NeighbourGraph] = None,
+) -> CatalogAnalytics:
+    analytics = CatalogAnalytics.build(ids, countries, types, genres, years, neighbours=neighbours)
+    analytics.save(get_artifact_path(collection_name, "catalog.npz"))
+    _cache.pop(collection_name, None)
+    return analytics
+
+
+_cache: Dict[str, CatalogAnalytics] = {}
+_cache_lock = threading.Lock()
+
+
+def get_catalog_analytics(collection_name: Optional[str] = None) -> Optional[CatalogAnalytics]:
+    """
+    Lazily load (and cache) the catalog analytics of a collection; None if
+    the collection was ingested before analytics existed.
+    """
+    name = collection_name or get_active_collection()
+    analytics = _cache.get(name)
+    if analytics is None:
+        path = get_artifact_path(name, "catalog.npz")
+        if not path.exists():
+            return None
+        with _cache_lock:
+            analytics = _cache.get(name)
+            if analytics is None:
+                analytics = CatalogAnalytics.load(path)
+                _cache[name] = analytics
+    return analytics
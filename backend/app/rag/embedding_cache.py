@@ -0,0 +1,185 @@
+import asyncio
+import hashlib
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from ..utils.metrics import EMBEDDING_SECONDS, EMBEDDING_TEXTS
+
+
+def _normalize(text: str) -> str:
+    """
+    Collapse whitespace so trivially different copies of a text share a key.
+    """
+    return " ".join(text.split())
+
+
+class EmbeddingCache:
+    """
+    Two-tier cache of embedding vectors keyed by (model name, normalized text):
+    - a bounded in-memory LRU for hot queries
+    - an optional SQLite table on disk that survives restarts and rebuilds
+    """
+
+    def __init__(self, db_path: Optional[Path] = None, max_entries: int = 10_000):
+        self.max_entries = max_entries
+        self._lru: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._conn = None
+        self.db_path = db_path
+        if db_path is not None:
+            db_path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(str(db_path), check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                " key TEXT PRIMARY KEY, model TEXT NOT NULL, vector BLOB NOT NULL)"
+            )
+            self._conn.commit()
+
+    @staticmethod
+    def make_key(model: str, text: str) -> str:
+        payload = f"{model}\x00{_normalize(text)}".encode("utf-8")
+        return hashlib.sha1(payload).hexdigest()
+
+    def _remember(self, key: str, vector: np.ndarray) -> None:
+        self._lru[key] = vector
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.max_entries:
+            self._lru.popitem(last=False)
+            self.evictions += 1
+
+    def get_many(self, keys: List[str]) -> Dict[str, np.ndarray]:
+        found: Dict[str, np.ndarray] = {}
+        with self._lock:
+            missing = []
+            for key in keys:
+                vec = self._lru.get(key)
+                if vec is not None:
+                    self._lru.move_to_end(key)
+                    found[key] = vec
+                else:
+                    missing.append(key)
+            self.hits += len(found)
+
+            if missing and self._conn is not None:
+                # sqlite caps bound parameters, so look up in slices
+                for start in range(0, len(missing), 500):
+                    chunk = missing[start:start + 500]
+                    placeholders = ",".join("?" * len(chunk))
+                    rows = self._conn.execute(
+                        f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})",
+                        chunk,
+                    ).fetchall()
+                    for key, blob in rows:
+                        vec = np.frombuffer(blob, dtype=np.float32)
+                        found[key] = vec
+                        self._remember(key, vec)
+                        self.disk_hits += 1
+
+            self.misses += len(keys) - len(found)
+        return found
+
+    def put_many(self, model: str, items: Dict[str, np.ndarray]) -> None:
+        if not items:
+            return
+        with self._lock:
+            for key, vec in items.items():
+                self._remember(key, vec)
+            if self._conn is not None:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO embeddings (key, model, vector) VALUES (?, ?, ?)",
+                    [(key, model, vec.tobytes()) for key, vec in items.items()],
+                )
+                self._conn.commit()
+
+    def stats(self) -> Dict[str, int]:
+        lookups = self.hits + self.disk_hits + self.misses
+        return {
+            "memory_hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "memory_entries": len(self._lru),
+            "hit_rate": round((self.hits + self.disk_hits) / lookups, 4) if lookups else 0.0,
+        }
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Embeddings wrapper that consults an EmbeddingCache before calling the
+    underlying provider. Only cache misses are sent over the network, in a
+    single batched embed_documents call.
+    """
+
+    def __init__(self, inner: Embeddings, model_name: str, cache: EmbeddingCache):
+        self.inner = inner
+        self.model_name = model_name
+        self.cache = cache
+
+    def _split(self, texts: List[str]):
+        keys = [EmbeddingCache.make_key(self.model_name, t) for t in texts]
+        found = self.cache.get_many(keys)
+        todo = {}
+        for key, text in zip(keys, texts):
+            if key not in found and key not in todo:
+                todo[key] = text
+        return keys, found, todo
+
+    def _store(self, todo: Dict[str, str], vectors: List[List[float]], found: Dict[str, np.ndarray], t0: float, op: str):
+        EMBEDDING_SECONDS.observe(time.perf_counter() - t0, op=op)
+        EMBEDDING_TEXTS.inc(len(todo), op=op)
+        fresh = {
+            key: np.asarray(vec, dtype=np.float32)
+            for key, vec in zip(todo.keys(), vectors)
+        }
+        self.cache.put_many(self.model_name, fresh)
+        found.update(fresh)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys, found, todo = self._split(texts)
+        if todo:
+            t0 = time.perf_counter()
+            self._store(todo, self.inner.embed_documents(list(todo.values())), found, t0, "documents")
+        return [found[k].tolist() for k in keys]
+
+    def embed_query(self, text: str) -> List[float]:
+        keys, found, todo = self._split([text])
+        if todo:
+            t0 = time.perf_counter()
+            self._store(todo, [self.inner.embed_query(text)], found, t0, "query")
+        return found[keys[0]].tolist()
+
+    async def _offload(self, fn, *args):
+        # the SQLite tier reads and commits synchronously; keep it off the event loop
+        if self.cache.db_path is None:
+            return fn(*args)
+        return await asyncio.to_thread(fn, *args)
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys, found, todo = await self._offload(self._split, texts)
+        if todo:
+            t0 = time.perf_counter()
+            vectors = await self.inner.aembed_documents(list(todo.values()))
+            await self._offload(self._store, todo, vectors, found, t0, "documents")
+        return [found[k].tolist() for k in keys]
+
+    async def aembed_query(self, text: str) -> List[float]:
+        keys, found, todo = await self._offload(self._split, [text])
+        if todo:
+            t0 = time.perf_counter()
+            vectors = [await self.inner.aembed_query(text)]
+            await self._offload(self._store, todo, vectors, found, t0, "query")
+        return found[keys[0]].tolist()
@@ -0,0 +1,225 @@
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+from pydantic import BaseModel
+
+from .vectorstore import get_active_collection, get_artifact_path
+
+# Broad regions that show up in target_regions, expanded to catalog countries.
+REGION_COUNTRIES: Dict[str, List[str]] = {
+    "north america": ["United States", "Canada", "Mexico"],
+    "latin america": [
+        "Mexico", "Brazil", "Argentina", "Colombia", "Chile", "Peru",
+        "Venezuela", "Uruguay", "Guatemala", "Cuba", "Puerto Rico",
+    ],
+    "south america": [
+        "Brazil", "Argentina", "Colombia", "Chile", "Peru", "Venezuela",
+        "Uruguay", "Paraguay",
+    ],
+    "europe": [
+        "United Kingdom", "France", "Germany", "Spain", "Italy", "Netherlands",
+        "Belgium", "Sweden", "Norway", "Denmark", "Poland", "Ireland",
+        "Switzerland", "Austria", "Turkey", "Portugal", "Czech Republic",
+        "Finland", "Iceland", "Greece", "Romania", "Hungary", "Russia",
+    ],
+    "asia": [
+        "India", "Japan", "South Korea", "China", "Taiwan", "Hong Kong",
+        "Thailand", "Indonesia", "Philippines", "Singapore", "Malaysia",
+        "Vietnam", "Pakistan",
+    ],
+    "middle east": [
+        "Turkey", "Egypt", "Lebanon", "United Arab Emirates", "Saudi Arabia",
+        "Israel", "Jordan", "Kuwait", "Qatar", "Iran",
+    ],
+    "africa": ["Nigeria", "South Africa", "Egypt", "Kenya", "Ghana", "Morocco"],
+    "oceania": ["Australia", "New Zealand"],
+}
+REGION_COUNTRIES["latam"] = REGION_COUNTRIES["latin america"]
+REGION_COUNTRIES["emea"] = REGION_COUNTRIES["europe"] + REGION_COUNTRIES["middle east"] + REGION_COUNTRIES["africa"]
+REGION_COUNTRIES["apac"] = REGION_COUNTRIES["asia"] + REGION_COUNTRIES["oceania"]
+
+FIELDS = ("country", "type", "genre")
+
+
+class TitleFilters(BaseModel):
+    """
+    Structured retrieval filters. Values within one field are OR-ed,
+    different fields are AND-ed. Countries accept region names
+    (e.g. "North America", "APAC"); genres match by substring
+    ("Dramas" matches both "Dramas" and "TV Dramas").
+    """
+
+    countries: Optional[List[str]] = None
+    types: Optional[List[str]] = None
+    genres: Optional[List[str]] = None
+    year_min: Optional[int] = None
+    year_max: Optional[int] = None
+
+    def is_empty(self) -> bool:
+        return not (self.countries or self.types or self.genres
+                    or self.year_min is not None or self.year_max is not None)
+
+
+def expand_countries(values: Iterable[str]) -> List[str]:
+    out: List[str] = []
+    for value in values:
+        out.extend(REGION_COUNTRIES.get(value.strip().lower(), [value]))
+    return out
+
+
+def _split(value: str) -> List[str]:
+    return [part.strip().lower() for part in str(value or "").split(",") if part.strip()]
+
+
+def _parse_year(value) -> int:
+    try:
+        return int(float(value))
+    except (TypeError, ValueError):
+        return 0
+
+
+class MetadataIndex:
+    """
+    Inverted indexes over catalog metadata, built at ingest time.
+
+    For each field (country, type, genre) we keep a sorted vocabulary and
+    CSR-style postings: offsets[i]:offsets[i+1] slices the int32 row
+    numbers of titles carrying vocab[i]. Release years are a dense int16
+    column. match() returns the show_ids satisfying a TitleFilters, so the
+    vector search only has to score that subset.
+    """
+
+    def __init__(self, ids: np.ndarray, years: np.ndarray, fields: Dict[str, Dict[str, np.ndarray]]):
+        self.ids = ids
+        self.years = years
+        self.fields = fields
+        self._lookup = {
+            name: {term: i for i, term in enumerate(data["vocab"].tolist())}
+            for name, data in fields.items()
+        }
+
+    @classmethod
+    def build(
+        cls,
+        ids: Sequence[str],
+        countries: Sequence[str],
+        types: Sequence[str],
+        genres: Sequence[str],
+        years: Sequence[str],
+    ) -> "MetadataIndex":
+        fields = {}
+        for name, column in (("country", countries), ("type", types), ("genre", genres)):
+            postings: Dict[str, List[int]] = {}
+            for row, value in enumerate(column):
+                for term in _split(value):
+                    postings.setdefault(term, []).append(row)
+            vocab = sorted(postings)
+            lengths = [len(postings[t]) for t in vocab]
+            offsets = np.zeros(len(vocab) + 1, dtype=np.int64)
+            np.cumsum(lengths, out=offsets[1:])
+            flat = np.fromiter(
+                (r for t in vocab for r in postings[t]), dtype=np.int32, count=int(offsets[-1])
+            )
+            fields[name] = {"vocab": np.array(vocab, dtype=str), "offsets": offsets, "postings": flat}
+
+        return cls(
+            ids=np.array(list(ids), dtype=str),
+            years=np.array([_parse_year(y) for y in years], dtype=np.int16),
+            fields=fields,
+        )
+
+    def save(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        arrays = {"ids": self.ids, "years": self.years}
+        for name, data in self.fields.items():
+            for key, arr in data.items():
+                arrays[f"{name}__{key}"] = arr
+        tmp = path.with_name(path.name + ".tmp.npz")
+        np.savez(tmp, **arrays)
+        tmp.replace(path)
+
+    @classmethod
+    def load(cls, path: Path) -> "MetadataIndex":
+        with np.load(path, allow_pickle=False) as data:
+            fields = {
+                name: {key: data[f"{name}__{key}"] for key in ("vocab", "offsets", "postings")}
+                for name in FIELDS
+            }
+            return cls(ids=data["ids"], years=data["years"], fields=fields)
+
+    def _rows_for_terms(self, field: str, terms: List[str], substring: bool = False) -> np.ndarray:
+        data = self.fields[field]
+        lookup = self._lookup[field]
+        wanted = [t.strip().lower() for t in terms if t.strip()]
+        if substring:
+            slots = [i for term, i in lookup.items() if any(w in term for w in wanted)]
+        else:
+            slots = [lookup[w] for w in wanted if w in lookup]
+        offsets, postings = data["offsets"], data["postings"]
+        if not slots:
+            return np.empty(0, dtype=np.int32)
+        return np.unique(np.concatenate([postings[offsets[i]:offsets[i + 1]] for i in slots]))
+
+    def match_rows(self, filters: TitleFilters) -> Optional[np.ndarray]:
+        """
+        Sorted row numbers matching `filters`, or None when nothing is filtered.
+        """
+        if filters.is_empty():
+            return None
+
+        rows: Optional[np.ndarray] = None
+
+        def narrow(current: Optional[np.ndarray], new: np.ndarray) -> np.ndarray:
+            return new if current is None else np.intersect1d(current, new, assume_unique=True)
+
+        if filters.countries:
+            rows = narrow(rows, self._rows_for_terms("country", expand_countries(filters.countries)))
+        if filters.types:
+            rows = narrow(rows, self._rows_for_terms("type", filters.types))
+        if filters.genres:
+            rows = narrow(rows, self._rows_for_terms("genre", filters.genres, substring=True))
+        if filters.year_min is not None or filters.year_max is not None:
+            lo = filters.year_min if filters.year_min is not None else -1
+            hi = filters.year_max if filters.year_max is not None else np.iinfo(np.int16).max
+            in_range = np.flatnonzero((self.years >= lo) & (self.years <= hi)).astype(np.int32)
+            rows = narrow(rows, in_range)
+        return rows
+
+    def match(self, filters: TitleFilters) -> Optional[List[str]]:
+        """
+        show_ids matching `filters`, or None when nothing is filtered.
+        """
+        rows = self.match_rows(filters)
+        return None if rows is None else self.ids[rows].tolist()
+
+
+def build_metadata_index(collection_name: str, ids, countries, types, genres, years) -> MetadataIndex:
+    index = MetadataIndex.build(ids, countries, types, genres, years)
+    index.save(get_artifact_path(collection_name, "metadata.npz"))
+    _cache.pop(collection_name, None)
+    return index
+
+
+_cache: Dict[str, MetadataIndex] = {}
+_cache_lock = threading.Lock()
+
+
+def get_metadata_index(collection_name: Optional[str] = None) -> Optional[MetadataIndex]:
+    """
+    Lazily load (and cache) the metadata index of a collection; None if the
+    collection was ingested before filters existed.
+    """
+    name = collection_name or get_active_collection()
+    index = _cache.get(name)
+    if index is None:
+        path = get_artifact_path(name, "metadata.npz")
+        if not path.exists():
+            return None
+        with _cache_lock:
+            index = _cache.get(name)
+            if index is None:
+                index = MetadataIndex.load(path)
+                _cache[name] = index
+    return index
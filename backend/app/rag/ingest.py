@@ -1,13 +1,31 @@
+import argparse
+import hashlib
 import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from pathlib import Path
-from typing import List
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
 
 import pandas as pd
 from langchain_core.documents import Document
-from langchain_openai import OpenAIEmbeddings
-from langchain_community.vectorstores import Chroma
+from langchain_core.vectorstores import VectorStore
 from dotenv import load_dotenv  # <-- make sure this import exists
 
+from ..utils.limiter import request_priority
+from .analytics import build_catalog_analytics
+from .filters import build_metadata_index
+from .lexical import LexicalIndexBuilder, build_lexical_index
+from .neighbours import build_neighbour_graph
+from .numpy_store import NumpyVectorStore
+from .vectorstore import (
+    build_vectorstore,
+    get_active_collection,
+    get_backend,
+    get_embeddings,
+    get_index_dir,
+)
+
 load_dotenv() 
 
 def _get_paths():
@@ -34,95 +52,419 @@ def _get_paths():
     return raw_dir, chroma_dir
 
 
-def _load_netflix_titles(raw_dir: Path) -> List[Document]:
+class IngestCancelled(Exception):
     """
-    Load netflix_titles.csv from data/raw and turn each row into a Document.
+    Raised inside run_ingest when its cancel_event is set.
     """
-    csv_path = raw_dir / "netflix_titles.csv"
-    if not csv_path.exists():
-        print(f"[ERROR] netflix_titles.csv not found at {csv_path}")
-        return []
 
-    print(f"[INFO] Loading titles from {csv_path} ...")
+
+# Columns we actually render; everything else in the CSV is never loaded.
+TEXT_COLUMNS = ["title", "description", "listed_in", "type", "country"]
+CSV_COLUMNS = ["show_id", *TEXT_COLUMNS, "release_year"]
+
+
+def _content_hash(text: str) -> str:
+    """
+    Stable fingerprint of the rendered document text; a row is re-embedded
+    only when this changes.
+    """
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def _iter_csv_chunks(csv_path: Path, chunksize: int) -> Iterator[pd.DataFrame]:
+    """
+    Stream the CSV in fixed-size chunks. If utf-8 decoding fails part-way,
+    re-read the file from the top with latin-1 and drop the first records
+    that were already yielded. Counting parsed records (not physical lines)
+    keeps the restart aligned when descriptions contain quoted newlines.
+    """
+    read_kwargs = dict(chunksize=chunksize, usecols=lambda c: c in CSV_COLUMNS, dtype=str)
+    yielded = 0
     try:
-        df = pd.read_csv(csv_path)
+        for chunk in pd.read_csv(csv_path, **read_kwargs):
+            yielded += len(chunk)
+            yield chunk
     except UnicodeDecodeError:
         print("[WARN] utf-8 decode failed, retrying with 'latin-1' encoding...")
-        df = pd.read_csv(csv_path, encoding="latin-1")
+        skip = yielded
+        for chunk in pd.read_csv(csv_path, encoding="latin-1", **read_kwargs):
+            if skip >= len(chunk):
+                skip -= len(chunk)
+                continue
+            if skip:
+                chunk = chunk.iloc[skip:]
+                skip = 0
+            yield chunk
 
-    # Fill missing text fields
-    for col in ["title", "description", "listed_in", "type", "country"]:
+
+def _render_chunk(df: pd.DataFrame) -> Tuple[List[str], List[str], List[Dict[str, Any]]]:
+    """
+    Render one CSV chunk into (ids, texts, metadatas) with column-wise string
+    operations instead of a Python loop over rows.
+    """
+    for col in CSV_COLUMNS:
         if col in df.columns:
             df[col] = df[col].fillna("").astype(str)
+        else:
+            df[col] = ""
+    # release_year may come back as "2019.0" from older exports
+    df["release_year"] = df["release_year"].str.replace(r"\.0$", "", regex=True)
 
-    if "release_year" in df.columns:
-        df["release_year"] = df["release_year"].fillna("").astype(str)
+    text = (
+        "Title: " + df["title"]
+        + " | Type: " + df["type"]
+        + " | Genres: " + df["listed_in"]
+        + " | Country: " + df["country"]
+        + " | Year: " + df["release_year"]
+        + " | Description: " + df["description"]
+    )
 
-    docs: List[Document] = []
+    meta = pd.DataFrame({
+        "show_id": df["show_id"],
+        "title": df["title"],
+        "type": df["type"],
+        "genres": df["listed_in"],
+        "country": df["country"],
+        "release_year": df["release_year"],
+        "content_hash": [_content_hash(t) for t in text],
+    })
 
-    for _, row in df.iterrows():
-        parts = [
-            f"Title: {row.get('title', '')}",
-            f"Type: {row.get('type', '')}",
-            f"Genres: {row.get('listed_in', '')}",
-            f"Country: {row.get('country', '')}",
-            f"Year: {row.get('release_year', '')}",
-            f"Description: {row.get('description', '')}",
-        ]
-        text = " | ".join(p for p in parts if p)
-
-        metadata = {
-            "show_id": row.get("show_id", ""),
-            "title": row.get("title", ""),
-            "type": row.get("type", ""),
-            "genres": row.get("listed_in", ""),
-            "country": row.get("country", ""),
-            "release_year": row.get("release_year", ""),
-        }
-
-        docs.append(Document(page_content=text, metadata=metadata))
+    return df["show_id"].tolist(), text.tolist(), meta.to_dict("records")
+
+
+def _iter_rendered(
+    raw_dir: Path,
+    chunksize: int,
+    timings: Dict[str, float],
+) -> Iterator[Tuple[List[str], List[str], List[Dict[str, Any]]]]:
+    csv_path = raw_dir / "netflix_titles.csv"
+    if not csv_path.exists():
+        print(f"[ERROR] netflix_titles.csv not found at {csv_path}")
+        return
+
+    print(f"[INFO] Streaming titles from {csv_path} in chunks of {chunksize} ...")
+    chunks = _iter_csv_chunks(csv_path, chunksize)
+    while True:
+        t0 = time.perf_counter()
+        df = next(chunks, None)
+        timings["read"] += time.perf_counter() - t0
+        if df is None:
+            return
+
+        t0 = time.perf_counter()
+        rendered = _render_chunk(df)
+        timings["render"] += time.perf_counter() - t0
+        yield rendered
+
+
+def _load_netflix_titles(raw_dir: Path) -> List[Document]:
+    """
+    Load netflix_titles.csv from data/raw and turn each row into a Document.
+    Convenience for notebooks; run_ingest streams instead of calling this.
+    """
+    timings = {"read": 0.0, "render": 0.0}
+    docs: List[Document] = []
+    for _, texts, metadatas in _iter_rendered(raw_dir, _env_int("INGEST_CHUNK_SIZE", 2000), timings):
+        docs.extend(Document(page_content=t, metadata=m) for t, m in zip(texts, metadatas))
 
     print(f"[INFO] Loaded {len(docs)} documents from netflix_titles.csv")
     return docs
 
-def run_ingest():
+
+def _env_int(name: str, default: int) -> int:
+    return int(os.getenv(name, str(default)))
+
+
+def _is_transient(exc: Exception) -> bool:
     """
-    Main ingestion pipeline:
-    - resolve paths
-    - load netflix_titles.csv as Documents
-    - embed with OpenAIEmbeddings
-    - save to Chroma vector store
+    Rate limits, 5xx responses, timeouts and dropped connections are worth
+    retrying; anything else (bad key, bad input) is not.
     """
-    raw_dir, chroma_dir = _get_paths()
-    chroma_dir.mkdir(parents=True, exist_ok=True)
+    status = getattr(exc, "status_code", None)
+    if status is not None:
+        return status == 429 or status >= 500
+    name = type(exc).__name__
+    return (
+        isinstance(exc, (TimeoutError, ConnectionError))
+        or "Timeout" in name
+        or "Connection" in name
+        or "RateLimit" in name
+    )
 
-    docs = _load_netflix_titles(raw_dir)
-    if not docs:
-        print("[ERROR] No documents loaded. Aborting ingestion.")
+
+def _embed_with_retry(embeddings, texts: List[str], max_retries: int) -> Tuple[List[List[float]], float]:
+    """
+    Embed one batch, retrying transient failures with exponential backoff.
+    Returns the vectors and the time spent embedding. Runs at "ingest"
+    priority, so live queries are admitted by the rate limiter first.
+    """
+    t0 = time.perf_counter()
+    delay = 1.0
+    for attempt in range(max_retries + 1):
+        try:
+            with request_priority("ingest"):
+                return embeddings.embed_documents(texts), time.perf_counter() - t0
+        except Exception as exc:
+            if attempt == max_retries or not _is_transient(exc):
+                raise
+            print(f"[WARN] Embedding batch failed ({type(exc).__name__}), "
+                  f"retry {attempt + 1}/{max_retries} in {delay:.1f}s ...")
+            time.sleep(delay)
+            delay = min(delay * 2, 30.0)
+
+
+def _write_batch(
+    vectordb: VectorStore,
+    ids: List[str],
+    texts: List[str],
+    vectors: List[List[float]],
+    metadatas: List[Dict[str, Any]],
+) -> None:
+    if isinstance(vectordb, NumpyVectorStore):
+        vectordb.upsert_embeddings(ids, texts, vectors, metadatas)
         return
+    # The LangChain Chroma wrapper always re-embeds in add_texts; we already
+    # have the vectors, so upsert straight into the underlying collection.
+    vectordb._collection.upsert(
+        ids=ids,
+        embeddings=vectors,
+        documents=texts,
+        metadatas=metadatas,
+    )
+
+
+def _existing_hashes(vectordb: VectorStore, page_size: int | None = None) -> Dict[str, str]:
+    """
+    show_id -> content_hash for everything currently stored in the collection.
+    Metadata is read a page at a time (EXISTING_PAGE_SIZE rows), so only the
+    id/hash pairs are held in memory, never the whole collection's metadata.
+    """
+    page_size = page_size or _env_int("EXISTING_PAGE_SIZE", 5000)
+    hashes: Dict[str, str] = {}
+    offset = 0
+    while True:
+        page = vectordb.get(include=["metadatas"], limit=page_size, offset=offset)
+        ids = page.get("ids", [])
+        for doc_id, meta in zip(ids, page.get("metadatas", [])):
+            hashes[doc_id] = (meta or {}).get("content_hash", "")
+        if len(ids) < page_size:
+            return hashes
+        offset += len(ids)
+
+
+def run_ingest(
+    incremental: bool = True,
+    chunk_size: int | None = None,
+    batch_size: int | None = None,
+    concurrency: int | None = None,
+    collection_name: str | None = None,
+    progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+    cancel_event: Optional[threading.Event] = None,
+) -> Dict[str, Any]:
+    """
+    Main ingestion pipeline (streaming, so memory stays flat with catalog size):
+    - resolve paths
+    - read netflix_titles.csv in chunks and render text/metadata per chunk
+    - diff rows against the stored collection by show_id + content hash
+    - embed new / changed rows in fixed-size batches on a bounded thread
+      pool (OpenAIEmbeddings through the shared embedding cache), retrying
+      transient errors, and upsert each batch as soon as it completes
+    - delete rows that disappeared from the CSV
+    - rebuild the side indexes: metadata postings for filtered retrieval
+      and the BM25 inverted index for lexical / hybrid retrieval
+    - precompute the title neighbour graph from the stored embeddings
+      (explore / compare lookups; NEIGHBOURS_TOP_N=0 skips it) and the
+      catalog analytics aggregates behind the saturation metrics
+
+    With incremental=False the collection is dropped and rebuilt from scratch.
+    Sizes default to INGEST_CHUNK_SIZE / EMBED_BATCH_SIZE / EMBED_CONCURRENCY.
+    collection_name defaults to the active collection. `progress` is called
+    with running counts after every chunk and batch; setting `cancel_event`
+    stops the run with IngestCancelled. Returns the diff summary
+    (added / updated / removed / unchanged) plus per-stage timings.
+    """
+    chunk_size = chunk_size or _env_int("INGEST_CHUNK_SIZE", 2000)
+    batch_size = batch_size or _env_int("EMBED_BATCH_SIZE", 256)
+    concurrency = concurrency or _env_int("EMBED_CONCURRENCY", 4)
+    max_retries = _env_int("EMBED_MAX_RETRIES", 5)
+
+    raw_dir, _ = _get_paths()
+    index_dir = get_index_dir()
+    index_dir.mkdir(parents=True, exist_ok=True)
 
     embedding_model_name = os.getenv("EMBEDDING_MODEL", "text-embedding-3-small")
     print(f"[INFO] Using embedding model: {embedding_model_name}")
 
-    embeddings = OpenAIEmbeddings(model=embedding_model_name)
+    embeddings = get_embeddings()
 
-    print(f"[INFO] Building Chroma index in {chroma_dir} ...")
-    vectordb = Chroma.from_documents(
-        documents=docs,
-        embedding=embeddings,
-        collection_name="netflix_catalog",
-        persist_directory=str(chroma_dir),
-    )
+    collection_name = collection_name or get_active_collection()
+    print(f"[INFO] Target collection: {collection_name} ({get_backend()} backend)")
+    vectordb = build_vectorstore(collection_name)
+    if not incremental:
+        print("[INFO] Full rebuild requested, dropping existing collection ...")
+        vectordb.delete_collection()
+        vectordb = build_vectorstore(collection_name)
 
-    vectordb.persist()
+    timings = {"read": 0.0, "render": 0.0, "diff": 0.0, "embed": 0.0, "write": 0.0, "delete": 0.0}
+    t_start = time.perf_counter()
 
+    t0 = time.perf_counter()
+    existing = _existing_hashes(vectordb)
+    timings["diff"] += time.perf_counter() - t0
+
+    counts = {"added": 0, "updated": 0, "removed": 0, "unchanged": 0, "duplicates": 0}
+    seen = set()
+    # compact columns for the metadata filter index, one entry per kept row
+    meta_columns: Dict[str, List[str]] = {
+        "ids": [], "countries": [], "types": [], "genres": [], "years": [],
+    }
+    lexical = LexicalIndexBuilder()
+    pending: Tuple[List[str], List[str], List[Dict[str, Any]]] = ([], [], [])
+    in_flight: Dict[Any, Tuple[List[str], List[str], List[Dict[str, Any]]]] = {}
+    written = 0
+
+    def report() -> None:
+        if cancel_event is not None and cancel_event.is_set():
+            raise IngestCancelled(f"Ingest into {collection_name} was cancelled")
+        if progress is not None:
+            progress({
+                "rows_seen": len(seen) + counts["duplicates"],
+                "to_embed": counts["added"] + counts["updated"],
+                "embedded": written,
+                "unchanged": counts["unchanged"],
+            })
+
+    def drain(block: bool) -> None:
+        nonlocal written
+        if not in_flight:
+            return
+        if block:
+            done, _ = wait(list(in_flight), return_when=FIRST_COMPLETED)
+        else:
+            done = [f for f in in_flight if f.done()]
+        for fut in done:
+            ids, texts, metadatas = in_flight.pop(fut)
+            vectors, secs = fut.result()
+            timings["embed"] += secs
+            t0 = time.perf_counter()
+            _write_batch(vectordb, ids, texts, vectors, metadatas)
+            timings["write"] += time.perf_counter() - t0
+            written += len(ids)
+            report()
+
+    def submit(pool: ThreadPoolExecutor) -> None:
+        nonlocal pending
+        texts = pending[1]
+        while len(in_flight) >= concurrency:
+            drain(block=True)
+        in_flight[pool.submit(_embed_with_retry, embeddings, texts, max_retries)] = pending
+        pending = ([], [], [])
+
+    print(f"[INFO] Updating vector index in {index_dir} "
+          f"(batch {batch_size}, concurrency {concurrency}) ...")
+    pool = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="ingest-embed")
+    try:
+        for ids, texts, metadatas in _iter_rendered(raw_dir, chunk_size, timings):
+            t0 = time.perf_counter()
+            for doc_id, text, meta in zip(ids, texts, metadatas):
+                if doc_id in seen:
+                    counts["duplicates"] += 1
+                    continue
+                seen.add(doc_id)
+                meta_columns["ids"].append(doc_id)
+                meta_columns["countries"].append(meta["country"])
+                meta_columns["types"].append(meta["type"])
+                meta_columns["genres"].append(meta["genres"])
+                meta_columns["years"].append(meta["release_year"])
+                lexical.add(doc_id, text)
+
+                old_hash = existing.get(doc_id)
+                if old_hash == meta["content_hash"]:
+                    counts["unchanged"] += 1
+                    continue
+                counts["added" if old_hash is None else "updated"] += 1
+
+                pending[0].append(doc_id)
+                pending[1].append(text)
+                pending[2].append(meta)
+                if len(pending[0]) >= batch_size:
+                    timings["diff"] += time.perf_counter() - t0
+                    submit(pool)
+                    t0 = time.perf_counter()
+            timings["diff"] += time.perf_counter() - t0
+            drain(block=False)
+            report()
+
+        if pending[0]:
+            submit(pool)
+        while in_flight:
+            drain(block=True)
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+    if not seen:
+        print("[ERROR] No documents loaded. Aborting ingestion.")
+        return {}
+
+    t0 = time.perf_counter()
+    removed = [doc_id for doc_id in existing if doc_id not in seen]
+    if removed:
+        vectordb.delete(ids=removed)
+    counts["removed"] = len(removed)
+    timings["delete"] += time.perf_counter() - t0
+
+    if isinstance(vectordb, NumpyVectorStore):
+        t0 = time.perf_counter()
+        vectordb.flush()
+        timings["write"] += time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    build_metadata_index(collection_name, **meta_columns)
+    build_lexical_index(collection_name, lexical)
+    timings["side_indexes"] = time.perf_counter() - t0
+
+    neighbours = None
+    if _env_int("NEIGHBOURS_TOP_N", 50) > 0:
+        t0 = time.perf_counter()
+        neighbours = build_neighbour_graph(collection_name, vectordb)
+        timings["neighbours"] = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    build_catalog_analytics(collection_name, **meta_columns, neighbours=neighbours)
+    timings["analytics"] = time.perf_counter() - t0
+    timings["total"] = time.perf_counter() - t_start
+
+    print("=== Ingest diff ===")
+    print(f"Added       : {counts['added']}")
+    print(f"Updated     : {counts['updated']}")
+    print(f"Removed     : {counts['removed']}")
+    print(f"Unchanged   : {counts['unchanged']}")
+    if counts["duplicates"]:
+        print(f"Duplicates  : {counts['duplicates']} (repeated show_id, first row kept)")
+    print("Timings     : " + " | ".join(f"{k} {v:.2f}s" for k, v in timings.items()))
+    print("===================")
+
+    print(f"[INFO] Embedding cache: {embeddings.cache.stats()}")
     print("[INFO] Ingestion complete.")
-    print(f"[INFO] Stored approximately {len(docs)} embeddings in Chroma at {chroma_dir}")
+    print(f"[INFO] Collection {collection_name} now holds {len(seen)} titles in {index_dir}")
+    return {
+        **counts,
+        "rows": len(seen) + counts["duplicates"],
+        "collection": collection_name,
+        "timings": timings,
+    }
 
 
 def main():
-    run_ingest()
+    parser = argparse.ArgumentParser(description="Ingest netflix_titles.csv into the vector store.")
+    parser.add_argument(
+        "--full",
+        action="store_true",
+        help="drop the collection and re-embed every row instead of applying a diff",
+    )
+    args = parser.parse_args()
+    run_ingest(incremental=not args.full)
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
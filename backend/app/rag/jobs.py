@@ -0,0 +1,160 @@
+import threading
+import time
+import traceback
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from .retriever import swap_vectorstore
+from .vectorstore import (
+    DEFAULT_COLLECTION,
+    build_vectorstore,
+    drop_collection,
+    get_active_collection,
+    list_collections,
+    set_active_collection,
+)
+
+
+@dataclass
+class RebuildJob:
+    job_id: str
+    collection: str
+    status: str = "queued"  # queued | running | succeeded | failed | cancelled
+    progress: Dict[str, Any] = field(default_factory=dict)
+    summary: Dict[str, Any] = field(default_factory=dict)
+    error: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    cancel_event: threading.Event = field(default_factory=threading.Event, repr=False)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.job_id,
+            "collection": self.collection,
+            "status": self.status,
+            "progress": dict(self.progress),
+            "summary": self.summary,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class RebuildJobManager:
+    """
+    Runs index rebuilds on a background thread, one at a time.
+
+    Every rebuild goes into a fresh versioned collection
+    (netflix_catalog_v<timestamp>) while the retriever keeps serving the
+    active one. On success the ACTIVE_COLLECTION pointer is flipped and the
+    retriever swaps to the new store in one assignment; the previous
+    collection is kept for in-flight queries / rollback and anything older
+    is dropped. Failed or cancelled builds are deleted.
+    """
+
+    def __init__(self, max_history: int = 20):
+        self._jobs: Dict[str, RebuildJob] = {}
+        self._lock = threading.Lock()
+        self._current: Optional[RebuildJob] = None
+        self.max_history = max_history
+
+    def submit(self) -> RebuildJob:
+        """
+        Start a rebuild, or return the one already running.
+        """
+        with self._lock:
+            if self._current is not None and self._current.status in ("queued", "running"):
+                return self._current
+
+            version = time.strftime("%Y%m%d%H%M%S")
+            job = RebuildJob(
+                job_id=uuid.uuid4().hex[:12],
+                collection=f"{DEFAULT_COLLECTION}_v{version}",
+            )
+            self._jobs[job.job_id] = job
+            self._current = job
+            self._prune_history()
+
+        thread = threading.Thread(target=self._run, args=(job,), name=f"rebuild-{job.job_id}", daemon=True)
+        thread.start()
+        return job
+
+    def get(self, job_id: str) -> Optional[RebuildJob]:
+        return self._jobs.get(job_id)
+
+    def list(self) -> List[RebuildJob]:
+        return sorted(self._jobs.values(), key=lambda j: j.created_at, reverse=True)
+
+    def cancel(self, job_id: str) -> Optional[RebuildJob]:
+        job = self._jobs.get(job_id)
+        if job is not None and job.status in ("queued", "running"):
+            job.cancel_event.set()
+        return job
+
+    def _prune_history(self) -> None:
+        finished = [j for j in self.list() if j.status not in ("queued", "running")]
+        for job in finished[self.max_history:]:
+            self._jobs.pop(job.job_id, None)
+
+    def _run(self, job: RebuildJob) -> None:
+        # pandas & co. are only loaded once a rebuild actually runs
+        from .ingest import IngestCancelled, run_ingest
+
+        job.status = "running"
+        job.started_at = time.time()
+        previous = get_active_collection()
+        try:
+            job.summary = run_ingest(
+                incremental=True,  # the new collection starts empty, so this embeds everything
+                collection_name=job.collection,
+                progress=job.progress.update,
+                cancel_event=job.cancel_event,
+            )
+            if not job.summary:
+                raise RuntimeError("Ingest loaded no documents")
+
+            new_store = build_vectorstore(job.collection)
+            set_active_collection(job.collection)
+            swap_vectorstore(new_store)
+            job.status = "succeeded"
+
+            _drop_collections(keep={job.collection, previous})
+        except IngestCancelled:
+            job.status = "cancelled"
+            _drop_collections(only={job.collection})
+        except Exception as exc:
+            job.status = "failed"
+            job.error = f"{type(exc).__name__}: {exc}"
+            traceback.print_exc()
+            _drop_collections(only={job.collection})
+        finally:
+            job.finished_at = time.time()
+
+
+def _drop_collections(keep: Optional[set] = None, only: Optional[set] = None) -> None:
+    """
+    Delete versioned catalog collections: either exactly `only`, or every
+    catalog collection not in `keep`.
+    """
+    try:
+        for name in list_collections():
+            if only is not None and name not in only:
+                continue
+            if keep is not None and name in keep:
+                continue
+            drop_collection(name)
+    except Exception as exc:  # cleanup must never fail the job
+        print(f"[WARN] Could not prune old collections: {exc}")
+
+
+_manager: Optional[RebuildJobManager] = None
+
+
+def get_job_manager() -> RebuildJobManager:
+    global _manager
+    if _manager is None:
+        _manager = RebuildJobManager()
+    return _manager
@@ -0,0 +1,184 @@
+import re
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from .vectorstore import get_active_collection, get_artifact_path
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+# Field labels from the rendered document text plus the most common English
+# function words; everything else is indexed.
+STOPWORDS = frozenset("""
+title type genres country year description
+a an and are as at be by for from has he her his in is it its of on or she
+that the their them they this to was were will with who when while into
+after about
+""".split())
+
+
+def tokenize(text: str) -> List[str]:
+    tokens = _TOKEN.findall(text.lower())
+    return [t for t in tokens if t not in STOPWORDS]
+
+
+class LexicalIndexBuilder:
+    """
+    Accumulates postings document by document so ingest can feed it while
+    streaming, without keeping the rendered texts around.
+    """
+
+    def __init__(self):
+        self.ids: List[str] = []
+        self.doc_len: List[int] = []
+        self._postings: Dict[str, Tuple[List[int], List[int]]] = {}
+
+    def add(self, doc_id: str, text: str) -> None:
+        row = len(self.ids)
+        self.ids.append(doc_id)
+        tokens = tokenize(text)
+        self.doc_len.append(len(tokens))
+        counts: Dict[str, int] = {}
+        for tok in tokens:
+            counts[tok] = counts.get(tok, 0) + 1
+        for tok, tf in counts.items():
+            rows, tfs = self._postings.setdefault(tok, ([], []))
+            rows.append(row)
+            tfs.append(tf)
+
+    def build(self) -> "LexicalIndex":
+        vocab = sorted(self._postings)
+        lengths = np.fromiter((len(self._postings[t][0]) for t in vocab), dtype=np.int64, count=len(vocab))
+        offsets = np.zeros(len(vocab) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        total = int(offsets[-1])
+        docs = np.fromiter((r for t in vocab for r in self._postings[t][0]), dtype=np.int32, count=total)
+        tfs = np.fromiter((f for t in vocab for f in self._postings[t][1]), dtype=np.uint16, count=total)
+        return LexicalIndex(
+            ids=np.array(self.ids, dtype=str),
+            vocab=np.array(vocab, dtype=str),
+            offsets=offsets,
+            docs=docs,
+            tfs=tfs,
+            doc_len=np.array(self.doc_len, dtype=np.float32),
+        )
+
+
+class LexicalIndex:
+    """
+    Okapi BM25 over a compact inverted index.
+
+    vocab[i]'s postings are docs[offsets[i]:offsets[i+1]] (int32 row
+    numbers) with matching term frequencies in tfs (uint16). A query
+    touches only the postings of its own terms and accumulates scores into
+    one dense float32 array, so it needs no network and no embedding.
+    """
+
+    def __init__(self, ids, vocab, offsets, docs, tfs, doc_len, k1: float = 1.5, b: float = 0.75):
+        self.ids = ids
+        self.vocab = vocab
+        self.offsets = offsets
+        self.docs = docs
+        self.tfs = tfs
+        self.doc_len = doc_len
+        self.k1 = k1
+        self.b = b
+
+        n_docs = len(ids)
+        df = np.diff(offsets).astype(np.float32)
+        self.idf = np.log1p((n_docs - df + 0.5) / (df + 0.5)).astype(np.float32)
+        avg_len = float(doc_len.mean()) if n_docs else 0.0
+        # per-document BM25 length normalisation, precomputed once; an empty
+        # index (or one whose documents all tokenized to nothing) has no
+        # average length to normalise against
+        if avg_len > 0:
+            self._norm = (k1 * (1 - b + b * doc_len / avg_len)).astype(np.float32)
+        else:
+            self._norm = np.full(len(doc_len), k1 * (1 - b), dtype=np.float32)
+        self._term_slot = {term: i for i, term in enumerate(vocab.tolist())}
+        self._row_of: Optional[Dict[str, int]] = None
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def save(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.name + ".tmp.npz")
+        np.savez(
+            tmp,
+            ids=self.ids, vocab=self.vocab, offsets=self.offsets,
+            docs=self.docs, tfs=self.tfs, doc_len=self.doc_len,
+        )
+        tmp.replace(path)
+
+    @classmethod
+    def load(cls, path: Path) -> "LexicalIndex":
+        with np.load(path, allow_pickle=False) as data:
+            return cls(**{key: data[key] for key in ("ids", "vocab", "offsets", "docs", "tfs", "doc_len")})
+
+    def rows_for_ids(self, ids: Iterable[str]) -> np.ndarray:
+        if self._row_of is None:
+            self._row_of = {doc_id: i for i, doc_id in enumerate(self.ids.tolist())}
+        row_of = self._row_of
+        return np.fromiter((row_of[i] for i in ids if i in row_of), dtype=np.int64)
+
+    def search(self, query: str, k: int = 10, ids: Optional[Iterable[str]] = None) -> List[Tuple[str, float]]:
+        """
+        Top-k (show_id, bm25 score) for `query`, optionally restricted to `ids`.
+        """
+        slots = [self._term_slot[t] for t in set(tokenize(query)) if t in self._term_slot]
+        if not slots or not len(self.ids):
+            return []
+
+        scores = np.zeros(len(self.ids), dtype=np.float32)
+        for slot in slots:
+            start, end = self.offsets[slot], self.offsets[slot + 1]
+            docs = self.docs[start:end]
+            tf = self.tfs[start:end].astype(np.float32)
+            scores[docs] += self.idf[slot] * tf * (self.k1 + 1) / (tf + self._norm[docs])
+
+        if ids is not None:
+            allowed = self.rows_for_ids(ids)
+            masked = np.zeros_like(scores)
+            masked[allowed] = scores[allowed]
+            scores = masked
+
+        candidates = np.flatnonzero(scores)
+        if not len(candidates):
+            return []
+        k = min(k, len(candidates))
+        top = candidates[np.argpartition(-scores[candidates], k - 1)[:k]]
+        top = top[np.argsort(-scores[top])]
+        return [(str(self.ids[r]), float(scores[r])) for r in top]
+
+
+def build_lexical_index(collection_name: str, builder: LexicalIndexBuilder) -> LexicalIndex:
+    index = builder.build()
+    index.save(get_artifact_path(collection_name, "lexical.npz"))
+    _cache.pop(collection_name, None)
+    return index
+
+
+_cache: Dict[str, LexicalIndex] = {}
+_cache_lock = threading.Lock()
+
+
+def get_lexical_index(collection_name: Optional[str] = None) -> Optional[LexicalIndex]:
+    """
+    Lazily load (and cache) the lexical index of a collection; None if the
+    collection was ingested before lexical retrieval existed.
+    """
+    name = collection_name or get_active_collection()
+    index = _cache.get(name)
+    if index is None:
+        path = get_artifact_path(name, "lexical.npz")
+        if not path.exists():
+            return None
+        with _cache_lock:
+            index = _cache.get(name)
+            if index is None:
+                index = LexicalIndex.load(path)
+                _cache[name] = index
+    return index
@@ -0,0 +1,255 @@
+import argparse
+import difflib
+import os
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from langchain_core.vectorstores import VectorStore
+
+from .vectorstore import build_vectorstore, get_active_collection, get_artifact_path
+
+_PUNCT = re.compile(r"[^\w\s]")
+
+
+def normalize_title(title: str) -> str:
+    return " ".join(_PUNCT.sub(" ", str(title or "").casefold()).split())
+
+
+class NeighbourGraph:
+    """
+    Precomputed top-N title-to-title neighbours of a catalog collection.
+
+    Row r of `neighbours` holds the int32 rows of the N titles most similar
+    to ids[r] (cosine over the stored embeddings, best first), and row r of
+    `scores` their similarities as float16. A lookup is two array slices:
+    explore / compare never embed anything at query time. `titles` lets a
+    title name be resolved to its row.
+    """
+
+    def __init__(self, ids: np.ndarray, titles: np.ndarray, neighbours: np.ndarray, scores: np.ndarray):
+        self.ids = ids
+        self.titles = titles
+        self.neighbours = neighbours
+        self.scores = scores
+        self._row_of: Optional[Dict[str, int]] = None
+        self._rows_of_title: Optional[Dict[str, List[int]]] = None
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def top_n(self) -> int:
+        return self.neighbours.shape[1] if self.neighbours.ndim == 2 else 0
+
+    @classmethod
+    def build(
+        cls,
+        ids: Sequence[str],
+        titles: Sequence[str],
+        matrix: np.ndarray,
+        top_n: int = 50,
+        block_rows: int = 1024,
+    ) -> "NeighbourGraph":
+        """
+        All-pairs top-N by blocked matrix multiplication: `block_rows` query
+        rows are scored against the whole matrix per step, so peak memory is
+        block_rows x n float32 scores instead of n x n. Rows are normalized
+        on the fly (no normalized copy of the matrix is made).
+        """
+        n = matrix.shape[0]
+        top_n = max(0, min(top_n, n - 1))
+        neighbours = np.empty((n, top_n), dtype=np.int32)
+        scores = np.empty((n, top_n), dtype=np.float16)
+        if top_n:
+            norms = np.linalg.norm(matrix, axis=1).astype(np.float32)
+            norms[norms == 0] = 1.0
+            inv = 1.0 / norms
+            for start in range(0, n, block_rows):
+                stop = min(start + block_rows, n)
+                block = np.asarray(matrix[start:stop], dtype=np.float32)
+                sims = block @ np.asarray(matrix, dtype=np.float32).T
+                sims *= inv[start:stop, None]
+                sims *= inv[None, :]
+                # a title is not its own neighbour
+                sims[np.arange(stop - start), np.arange(start, stop)] = -np.inf
+                part = np.argpartition(-sims, top_n - 1, axis=1)[:, :top_n]
+                part_scores = np.take_along_axis(sims, part, axis=1)
+                order = np.argsort(-part_scores, axis=1)
+                neighbours[start:stop] = np.take_along_axis(part, order, axis=1)
+                scores[start:stop] = np.take_along_axis(part_scores, order, axis=1)
+        return cls(
+            ids=np.array(list(ids), dtype=str),
+            titles=np.array([str(t or "") for t in titles], dtype=str),
+            neighbours=neighbours,
+            scores=scores,
+        )
+
+    def save(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.name + ".tmp.npz")
+        np.savez(tmp, ids=self.ids, titles=self.titles, neighbours=self.neighbours, scores=self.scores)
+        tmp.replace(path)
+
+    @classmethod
+    def load(cls, path: Path) -> "NeighbourGraph":
+        with np.load(path, allow_pickle=False) as data:
+            return cls(**{key: data[key] for key in ("ids", "titles", "neighbours", "scores")})
+
+    # ---------- lookups ----------
+
+    def row_of(self, doc_id: str) -> Optional[int]:
+        if self._row_of is None:
+            self._row_of = {doc_id: i for i, doc_id in enumerate(self.ids.tolist())}
+        return self._row_of.get(doc_id)
+
+    def rows_of_title(self, title: str) -> List[int]:
+        """
+        Rows whose title matches `title` ignoring case and punctuation (a
+        film and a series may share a name).
+        """
+        if self._rows_of_title is None:
+            index: Dict[str, List[int]] = {}
+            for row, name in enumerate(self.titles.tolist()):
+                index.setdefault(normalize_title(name), []).append(row)
+            self._rows_of_title = index
+        return self._rows_of_title.get(normalize_title(title), [])
+
+    def suggest(self, title: str, limit: int = 5) -> List[str]:
+        """
+        Closest catalog titles to an unknown name, for "did you mean".
+        """
+        self.rows_of_title("")
+        matches = difflib.get_close_matches(normalize_title(title), list(self._rows_of_title), n=limit, cutoff=0.6)
+        return [str(self.titles[self._rows_of_title[m][0]]) for m in matches]
+
+    def neighbours_of(
+        self,
+        row: int,
+        k: int = 10,
+        allowed: Optional[set] = None,
+    ) -> List[Tuple[int, float]]:
+        """
+        Up to k (row, score) neighbours of `row`, best first. `allowed`
+        (show_ids) post-filters within the stored top-N, so a narrow filter
+        can return fewer than k.
+        """
+        out = []
+        for nb, score in zip(self.neighbours[row].tolist(), self.scores[row].tolist()):
+            if allowed is not None and str(self.ids[nb]) not in allowed:
+                continue
+            out.append((nb, score))
+            if len(out) >= k:
+                break
+        return out
+
+    def similarity(self, a: int, b: int) -> Optional[float]:
+        """
+        Stored similarity of two titles if either is in the other's top-N,
+        else None (it is then at most floor(a, b)).
+        """
+        for src, dst in ((a, b), (b, a)):
+            hit = np.flatnonzero(self.neighbours[src] == dst)
+            if len(hit):
+                return float(self.scores[src, hit[0]])
+        return None
+
+    def floor(self, a: int, b: int) -> float:
+        """
+        Upper bound of the similarity of two titles that are not in each
+        other's top-N: the lower of their N-th neighbour scores.
+        """
+        if not self.top_n:
+            return 1.0
+        return float(min(self.scores[a, -1], self.scores[b, -1]))
+
+    def shared(self, a: int, b: int, k: int = 10) -> List[Tuple[int, float]]:
+        """
+        Titles in both neighbour lists, ranked by their combined score.
+        """
+        score_a = dict(zip(self.neighbours[a].tolist(), self.scores[a].tolist()))
+        both = [
+            (nb, (score_a[nb] + score) / 2)
+            for nb, score in zip(self.neighbours[b].tolist(), self.scores[b].tolist())
+            if nb in score_a and nb not in (a, b)
+        ]
+        both.sort(key=lambda item: -item[1])
+        return both[:k]
+
+
+def _stored_embeddings(vectordb: VectorStore) -> Tuple[List[str], List[str], np.ndarray]:
+    """
+    ids, titles and the embedding matrix of a collection, in store order.
+    """
+    stored = vectordb.get(include=["embeddings", "metadatas"])
+    matrix = stored.get("embeddings")
+    matrix = np.asarray(matrix if matrix is not None else [], dtype=np.float32)
+    titles = [(meta or {}).get("title", "") for meta in stored.get("metadatas", [])]
+    return list(stored.get("ids", [])), titles, matrix
+
+
+def build_neighbour_graph(
+    collection_name: str,
+    vectordb: Optional[VectorStore] = None,
+    top_n: Optional[int] = None,
+    block_rows: Optional[int] = None,
+) -> NeighbourGraph:
+    """
+    Offline stage run after ingest: compute every title's top-N neighbours
+    (NEIGHBOURS_TOP_N, default 50) from the stored embeddings and save the
+    graph next to the collection's other side indexes.
+    """
+    top_n = top_n if top_n is not None else int(os.getenv("NEIGHBOURS_TOP_N", "50"))
+    block_rows = block_rows or int(os.getenv("NEIGHBOURS_BLOCK_ROWS", "1024"))
+    vectordb = vectordb if vectordb is not None else build_vectorstore(collection_name)
+
+    ids, titles, matrix = _stored_embeddings(vectordb)
+    graph = NeighbourGraph.build(ids, titles, matrix, top_n=top_n, block_rows=block_rows)
+    graph.save(get_artifact_path(collection_name, "neighbours.npz"))
+    _cache.pop(collection_name, None)
+    return graph
+
+
+_cache: Dict[str, NeighbourGraph] = {}
+_cache_lock = threading.Lock()
+
+
+def get_neighbour_graph(collection_name: Optional[str] = None) -> Optional[NeighbourGraph]:
+    """
+    Lazily load (and cache) the neighbour graph of a collection; None if the
+    collection was ingested before the graph stage existed.
+    """
+    name = collection_name or get_active_collection()
+    graph = _cache.get(name)
+    if graph is None:
+        path = get_artifact_path(name, "neighbours.npz")
+        if not path.exists():
+            return None
+        with _cache_lock:
+            graph = _cache.get(name)
+            if graph is None:
+                graph = NeighbourGraph.load(path)
+                _cache[name] = graph
+    return graph
+
+
+def main():
+    parser = argparse.ArgumentParser(description="(Re)build the title neighbour graph of a collection.")
+    parser.add_argument("--collection", help="defaults to the active collection")
+    parser.add_argument("--top-n", type=int, help="neighbours kept per title (NEIGHBOURS_TOP_N)")
+    parser.add_argument("--block-rows", type=int, help="rows scored per matrix product (NEIGHBOURS_BLOCK_ROWS)")
+    args = parser.parse_args()
+
+    collection = args.collection or get_active_collection()
+    t0 = time.perf_counter()
+    graph = build_neighbour_graph(collection, top_n=args.top_n, block_rows=args.block_rows)
+    size = graph.neighbours.nbytes + graph.scores.nbytes
+    print(f"[INFO] Neighbour graph of {collection}: {len(graph)} titles x top {graph.top_n} "
+          f"({size / 1e6:.1f} MB) in {time.perf_counter() - t0:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,355 @@
+import json
+import os
+import shutil
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+
+
+class NumpyVectorStore(VectorStore):
+    """
+    In-process vector index: one contiguous float32 matrix of L2-normalized
+    embeddings, searched with a single matrix-vector (or matrix-matrix for
+    batched queries) product plus argpartition top-k.
+
+    On disk a collection is a directory holding
+    - embeddings.npy -> (n, dim) float32, memory-mapped on load
+    - table.json     -> columnar ids / documents / metadata
+
+    Writes go to memory and are made durable with flush(), which replaces
+    the files atomically. Searches read a snapshot of the matrix, so a
+    concurrent flush never exposes a half-written index.
+    """
+
+    def __init__(self, path: Path, embedding: Embeddings):
+        self.path = Path(path)
+        self._embedding = embedding
+        self._lock = threading.Lock()
+
+        # rows [0, _n) of _buf are live; _buf grows by doubling so streaming
+        # ingest appends are amortized O(1) per row
+        self._buf = np.zeros((0, 0), dtype=np.float32)
+        self._n = 0
+        self._ids: List[str] = []
+        self._documents: List[str] = []
+        self._metadatas: List[Dict[str, Any]] = []
+        self._row_of: Dict[str, int] = {}
+        self._dirty = False
+
+        self._load()
+
+    # ---------- persistence ----------
+
+    def _load(self) -> None:
+        matrix_path = self.path / "embeddings.npy"
+        table_path = self.path / "table.json"
+        if not (matrix_path.exists() and table_path.exists()):
+            return
+
+        self._buf = np.load(matrix_path, mmap_mode="r")
+        self._n = self._buf.shape[0]
+        with open(table_path, "r", encoding="utf-8") as f:
+            table = json.load(f)
+
+        self._ids = table["ids"]
+        self._documents = table["documents"]
+        columns = table["metadata"]
+        self._metadatas = [
+            {col: values[i] for col, values in columns.items()}
+            for i in range(len(self._ids))
+        ]
+        self._row_of = {doc_id: i for i, doc_id in enumerate(self._ids)}
+
+    def flush(self) -> None:
+        """
+        Write pending changes to disk (temp files + os.replace).
+        """
+        with self._lock:
+            if not self._dirty:
+                return
+            matrix = np.ascontiguousarray(self._buf[:self._n], dtype=np.float32)
+            columns: Dict[str, List[Any]] = {}
+            for col in sorted({k for m in self._metadatas for k in m}):
+                columns[col] = [m.get(col, "") for m in self._metadatas]
+            table = {"ids": self._ids, "documents": self._documents, "metadata": columns}
+            self._dirty = False
+
+        self.path.mkdir(parents=True, exist_ok=True)
+        tmp_matrix = self.path / "embeddings.tmp.npy"
+        tmp_table = self.path / "table.tmp.json"
+        np.save(tmp_matrix, matrix)
+        with open(tmp_table, "w", encoding="utf-8") as f:
+            json.dump(table, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp_matrix, self.path / "embeddings.npy")
+        os.replace(tmp_table, self.path / "table.json")
+
+    def delete_collection(self) -> None:
+        with self._lock:
+            self._buf = np.zeros((0, 0), dtype=np.float32)
+            self._n = 0
+            self._ids, self._documents, self._metadatas = [], [], []
+            self._row_of = {}
+            self._dirty = False
+        shutil.rmtree(self.path, ignore_errors=True)
+
+    # ---------- writes ----------
+
+    def upsert_embeddings(
+        self,
+        ids: Sequence[str],
+        texts: Sequence[str],
+        vectors: Sequence[Sequence[float]],
+        metadatas: Optional[Sequence[Dict[str, Any]]] = None,
+    ) -> None:
+        """
+        Insert or replace rows with precomputed embeddings.
+        """
+        vecs = _normalize(np.asarray(vectors, dtype=np.float32))
+        metadatas = metadatas or [{} for _ in ids]
+        with self._lock:
+            new_rows = [i for i, doc_id in enumerate(ids) if doc_id not in self._row_of]
+            self._reserve(self._n + len(new_rows), vecs.shape[1])
+
+            for i, doc_id in enumerate(ids):
+                row = self._row_of.get(doc_id)
+                if row is None:
+                    row = self._n
+                    self._n += 1
+                    self._row_of[doc_id] = row
+                    self._ids.append(doc_id)
+                    self._documents.append(texts[i])
+                    self._metadatas.append(dict(metadatas[i]))
+                else:
+                    self._documents[row] = texts[i]
+                    self._metadatas[row] = dict(metadatas[i])
+                self._buf[row] = vecs[i]
+            self._dirty = True
+
+    def _reserve(self, rows: int, dim: int) -> None:
+        """
+        Make _buf writable (a memory-mapped load is read-only) with room
+        for `rows` rows. Caller holds the lock.
+        """
+        buf = self._buf
+        if buf.size and buf.shape[1] != dim:
+            raise ValueError(f"Embedding dimension {dim} does not match index dimension {buf.shape[1]}")
+        if buf.flags.writeable and buf.shape[0] >= rows and buf.size:
+            return
+        capacity = max(rows, 2 * buf.shape[0], 1024)
+        grown = np.empty((capacity, dim), dtype=np.float32)
+        if self._n:
+            grown[:self._n] = buf[:self._n]
+        self._buf = grown
+
+    def add_texts(
+        self,
+        texts: Iterable[str],
+        metadatas: Optional[List[dict]] = None,
+        ids: Optional[List[str]] = None,
+        **kwargs: Any,
+    ) -> List[str]:
+        texts = list(texts)
+        ids = list(ids) if ids else [str(len(self._ids) + i) for i in range(len(texts))]
+        vectors = self._embedding.embed_documents(texts)
+        self.upsert_embeddings(ids, texts, vectors, metadatas)
+        return ids
+
+    def delete(self, ids: Optional[List[str]] = None, **kwargs: Any) -> Optional[bool]:
+        if not ids:
+            return False
+        with self._lock:
+            drop = {self._row_of[i] for i in ids if i in self._row_of}
+            if not drop:
+                return False
+            keep = [r for r in range(len(self._ids)) if r not in drop]
+            self._buf = np.asarray(self._buf[:self._n])[keep]
+            self._n = len(keep)
+            self._ids = [self._ids[r] for r in keep]
+            self._documents = [self._documents[r] for r in keep]
+            self._metadatas = [self._metadatas[r] for r in keep]
+            self._row_of = {doc_id: i for i, doc_id in enumerate(self._ids)}
+            self._dirty = True
+        return True
+
+    # ---------- reads ----------
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def get(
+        self,
+        ids: Optional[List[str]] = None,
+        include: Optional[List[str]] = None,
+        limit: Optional[int] = None,
+        offset: Optional[int] = None,
+        **kwargs: Any,
+    ) -> Dict[str, Any]:
+        """
+        Chroma-compatible subset of `get`, used by ingest to page through the
+        stored hashes and by the neighbour-graph stage to read the stored
+        vectors (with ids=None and no paging, "embeddings" is a view of the
+        matrix, not a copy).
+        """
+        with self._lock:
+            rows = range(len(self._ids)) if ids is None else [self._row_of[i] for i in ids if i in self._row_of]
+            paged = limit is not None or bool(offset)
+            if paged:
+                start = offset or 0
+                rows = rows[start:None if limit is None else start + limit]
+            out: Dict[str, Any] = {"ids": [self._ids[r] for r in rows]}
+            include = include or ["metadatas", "documents"]
+            if "metadatas" in include:
+                out["metadatas"] = [self._metadatas[r] for r in rows]
+            if "documents" in include:
+                out["documents"] = [self._documents[r] for r in rows]
+            if "embeddings" in include:
+                matrix = self._buf[:self._n]
+                out["embeddings"] = matrix if ids is None and not paged else matrix[list(rows)]
+        return out
+
+    def _snapshot(self) -> Tuple[np.ndarray, List[str], List[Dict[str, Any]]]:
+        with self._lock:
+            return self._buf[:self._n], self._documents, self._metadatas
+
+    def warm(self) -> None:
+        """
+        Read the whole memory-mapped matrix once so its pages are resident
+        before the first query instead of being faulted in by it.
+        """
+        matrix, _, _ = self._snapshot()
+        if matrix.size:
+            np.add.reduce(matrix, axis=None)
+
+    def _top_k(self, scores: np.ndarray, k: int) -> np.ndarray:
+        k = min(k, scores.shape[-1])
+        if k <= 0:
+            return np.empty(scores.shape[:-1] + (0,), dtype=np.int64)
+        part = np.argpartition(-scores, k - 1, axis=-1)[..., :k]
+        order = np.take_along_axis(scores, part, axis=-1).argsort(axis=-1)[..., ::-1]
+        return np.take_along_axis(part, order, axis=-1)
+
+    def _rows_for_ids(self, ids: Iterable[str]) -> np.ndarray:
+        row_of = self._row_of
+        return np.fromiter((row_of[i] for i in ids if i in row_of), dtype=np.int64)
+
+    def similarity_search_by_vectors_with_score(
+        self,
+        embeddings: Sequence[Sequence[float]],
+        k: int = 4,
+        ids: Optional[Iterable[str]] = None,
+    ) -> List[List[Tuple[Document, float]]]:
+        """
+        Batched search: all queries are scored with one matrix product.
+        `ids` restricts the search to those documents (pre-filtering), so
+        only the matching rows are ever scored.
+        """
+        matrix, documents, metadatas = self._snapshot()
+        if not len(documents):
+            return [[] for _ in embeddings]
+
+        rows = None
+        if ids is not None:
+            rows = self._rows_for_ids(ids)
+            if not len(rows):
+                return [[] for _ in embeddings]
+            matrix = matrix[rows]
+
+        queries = _normalize(np.asarray(embeddings, dtype=np.float32))
+        scores = queries @ matrix.T
+        top = self._top_k(scores, k)
+
+        results = []
+        for qi, positions in enumerate(top):
+            hits = []
+            for pos in positions:
+                r = pos if rows is None else rows[pos]
+                hits.append((
+                    Document(page_content=documents[r], metadata=dict(metadatas[r])),
+                    float(scores[qi, pos]),
+                ))
+            results.append(hits)
+        return results
+
+    def similarity_search_by_vectors(
+        self,
+        embeddings: Sequence[Sequence[float]],
+        k: int = 4,
+        ids: Optional[Iterable[str]] = None,
+    ) -> List[List[Document]]:
+        return [
+            [doc for doc, _ in hits]
+            for hits in self.similarity_search_by_vectors_with_score(embeddings, k, ids=ids)
+        ]
+
+    def similarity_search_by_vector(
+        self,
+        embedding: List[float],
+        k: int = 4,
+        ids: Optional[Iterable[str]] = None,
+        **kwargs: Any,
+    ) -> List[Document]:
+        return self.similarity_search_by_vectors([embedding], k, ids=ids)[0]
+
+    def similarity_search_with_score(
+        self,
+        query: str,
+        k: int = 4,
+        ids: Optional[Iterable[str]] = None,
+        **kwargs: Any,
+    ) -> List[Tuple[Document, float]]:
+        vector = self._embedding.embed_query(query)
+        return self.similarity_search_by_vectors_with_score([vector], k, ids=ids)[0]
+
+    def similarity_search(
+        self,
+        query: str,
+        k: int = 4,
+        ids: Optional[Iterable[str]] = None,
+        **kwargs: Any,
+    ) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score(query, k, ids=ids)]
+
+    async def asimilarity_search(
+        self,
+        query: str,
+        k: int = 4,
+        ids: Optional[Iterable[str]] = None,
+        **kwargs: Any,
+    ) -> List[Document]:
+        # only the embedding call does I/O; the dot product is microseconds
+        vector = await self._embedding.aembed_query(query)
+        return self.similarity_search_by_vector(vector, k, ids=ids)
+
+    @property
+    def embeddings(self) -> Embeddings:
+        return self._embedding
+
+    @classmethod
+    def from_texts(
+        cls,
+        texts: List[str],
+        embedding: Embeddings,
+        metadatas: Optional[List[dict]] = None,
+        ids: Optional[List[str]] = None,
+        path: Optional[Path] = None,
+        **kwargs: Any,
+    ) -> "NumpyVectorStore":
+        if path is None:
+            raise ValueError("NumpyVectorStore.from_texts needs a `path` to persist to")
+        store = cls(path, embedding)
+        store.add_texts(texts, metadatas=metadatas, ids=ids)
+        store.flush()
+        return store
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    if vectors.ndim == 1:
+        vectors = vectors[None, :]
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
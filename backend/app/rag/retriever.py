@@ -1,16 +1,366 @@
-from .vectorstore import build_vectorstore
+import asyncio
+import math
+import os
+import threading
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from langchain_core.documents import Document
+
+from .analytics import get_catalog_analytics
+from .filters import TitleFilters, get_metadata_index
+from .lexical import get_lexical_index
+from .neighbours import get_neighbour_graph
+from .numpy_store import NumpyVectorStore
+from .vectorstore import build_vectorstore, get_active_collection, refresh_active_collection
+from ..utils.metrics import VECTOR_SEARCH_SECONDS
+
+RETRIEVAL_MODES = ("dense", "lexical", "hybrid")
+# reciprocal-rank-fusion constant; 60 is the value from the original RRF paper
+RRF_K = 60
 
 _vectordb = None
+_vectordb_lock = threading.Lock()
+# called after every swap, e.g. to drop answers computed against the old index;
+# the active-collection pointer is re-read first so later listeners see the new one
+_swap_listeners: List[Callable[[], None]] = [refresh_active_collection]
 
 
 def get_vectorstore():
     global _vectordb
     if _vectordb is None:
-        _vectordb = build_vectorstore()
+        with _vectordb_lock:
+            if _vectordb is None:
+                _vectordb = build_vectorstore()
     return _vectordb
 
 
-def retrieve_similar_titles(query: str, k: int = 5):
+def swap_vectorstore(vectordb) -> None:
+    """
+    Atomically replace the store used for retrieval. Queries that already
+    hold the previous store finish against it; new queries see the new one.
+    """
+    global _vectordb
+    with _vectordb_lock:
+        _vectordb = vectordb
+    for listener in list(_swap_listeners):
+        try:
+            listener()
+        except Exception as exc:
+            print(f"[WARN] Vector store swap listener failed: {exc}")
+
+
+def add_swap_listener(listener: Callable[[], None]) -> None:
+    if listener not in _swap_listeners:
+        _swap_listeners.append(listener)
+
+
+def warm_index() -> Dict[str, Any]:
+    """
+    Open the active collection and load its side indexes now instead of on
+    the first query. Raises RuntimeError when nothing has been ingested, so
+    readiness fails loudly rather than serving empty retrievals.
+    """
     vectordb = get_vectorstore()
-    docs = vectordb.similarity_search(query, k=k)
-    return docs
\ No newline at end of file
+    if isinstance(vectordb, NumpyVectorStore):
+        vectordb.warm()
+        documents = len(vectordb)
+    else:
+        documents = vectordb._collection.count()
+    collection = get_active_collection()
+    if not documents:
+        raise RuntimeError(f"Collection '{collection}' is empty; run python -m app.rag.ingest first")
+
+    lexical = get_lexical_index()
+    if lexical is not None:
+        lexical.rows_for_ids(())  # builds the id -> row map used by filtered queries
+    neighbours = get_neighbour_graph()
+    if neighbours is not None:
+        neighbours.row_of("")
+        neighbours.rows_of_title("")
+    return {
+        "collection": collection,
+        "documents": documents,
+        "lexical_index": lexical is not None,
+        "metadata_index": get_metadata_index() is not None,
+        "neighbour_graph": neighbours is not None,
+        "catalog_analytics": get_catalog_analytics() is not None,
+    }
+
+
+def _resolve_mode(mode: Optional[str]) -> str:
+    """
+    Requested mode, else RETRIEVAL_MODE (default "dense", so existing
+    endpoints keep their results until a deployment opts in to "hybrid").
+    Lexical and hybrid quietly fall back to dense when the collection has
+    no lexical index yet.
+    """
+    mode = (mode or os.getenv("RETRIEVAL_MODE", "dense")).lower()
+    if mode not in RETRIEVAL_MODES:
+        raise ValueError(f"Unknown retrieval mode '{mode}', expected one of {RETRIEVAL_MODES}")
+    if mode != "dense" and get_lexical_index() is None:
+        return "dense"
+    return mode
+
+
+def _filtered_ids(filters: Optional[TitleFilters]) -> Tuple[bool, Optional[List[str]]]:
+    """
+    (filtered, ids): ids is None for an unfiltered search, otherwise the
+    show_ids allowed by the precomputed metadata index (possibly empty).
+    """
+    if filters is None or filters.is_empty():
+        return False, None
+    index = get_metadata_index()
+    if index is None:
+        print("[WARN] No metadata index for the active collection; re-run ingest to enable filters.")
+        return False, None
+    return True, index.match(filters) or []
+
+
+def _in_filter_cap() -> int:
+    """
+    Largest allow-list sent to Chroma as a show_id $in filter (DENSE_IN_MAX_IDS).
+    """
+    return int(os.getenv("DENSE_IN_MAX_IDS", "500"))
+
+
+def _wide_filter(vectordb, ids: Optional[List[str]]) -> bool:
+    """
+    True when a Chroma query's allow-list is too large to ship as $in (a
+    broad region like North America matches thousands of titles); such
+    queries search unfiltered and keep only the allowed hits instead.
+    """
+    return ids is not None and not isinstance(vectordb, NumpyVectorStore) and len(ids) > _in_filter_cap()
+
+
+def _dense_kwargs(vectordb, ids: Optional[List[str]]) -> Dict[str, Any]:
+    if ids is None or _wide_filter(vectordb, ids):
+        return {}
+    if isinstance(vectordb, NumpyVectorStore):
+        return {"ids": ids}
+    return {"filter": {"show_id": {"$in": ids}}}
+
+
+def _overfetch_sizes(vectordb, k: int, ids: List[str]) -> Iterator[int]:
+    """
+    Unfiltered fetch sizes for a wide filter: start at the size where k
+    allowed hits are expected (twice over), then grow 4x up to the whole
+    collection.
+    """
+    total = vectordb._collection.count()
+    if not total:
+        return
+    n = min(total, max(k, math.ceil(2 * k * total / max(len(ids), 1))))
+    while True:
+        yield n
+        if n >= total:
+            return
+        n = min(total, n * 4)
+
+
+def _dense_search_by_vector(vectordb, vector, k: int, ids: Optional[List[str]]) -> List[Document]:
+    if not _wide_filter(vectordb, ids):
+        return vectordb.similarity_search_by_vector(vector, k=k, **_dense_kwargs(vectordb, ids))
+    allowed = set(ids)
+    kept: List[Document] = []
+    for n in _overfetch_sizes(vectordb, k, ids):
+        kept = [d for d in vectordb.similarity_search_by_vector(vector, k=n) if d.metadata.get("show_id") in allowed]
+        if len(kept) >= k:
+            break
+    return kept[:k]
+
+
+def _dense_search(vectordb, query: str, k: int, ids: Optional[List[str]]) -> List[Document]:
+    if not _wide_filter(vectordb, ids):
+        return vectordb.similarity_search(query, k=k, **_dense_kwargs(vectordb, ids))
+    return _dense_search_by_vector(vectordb, vectordb.embeddings.embed_query(query), k, ids)
+
+
+async def _adense_search(vectordb, query: str, k: int, ids: Optional[List[str]]) -> List[Document]:
+    if not _wide_filter(vectordb, ids):
+        return await vectordb.asimilarity_search(query, k=k, **_dense_kwargs(vectordb, ids))
+    vector = await vectordb.embeddings.aembed_query(query)
+    return await asyncio.to_thread(_dense_search_by_vector, vectordb, vector, k, ids)
+
+
+def _fetch_documents(vectordb, ids: List[str]) -> Dict[str, Document]:
+    if not ids:
+        return {}
+    stored = vectordb.get(ids=ids, include=["metadatas", "documents"])
+    return {
+        doc_id: Document(page_content=text, metadata=meta or {})
+        for doc_id, meta, text in zip(stored["ids"], stored["metadatas"], stored["documents"])
+    }
+
+
+def _lexical_search(vectordb, query: str, k: int, ids: Optional[List[str]]) -> List[Document]:
+    hits = get_lexical_index().search(query, k=k, ids=ids)
+    docs = _fetch_documents(vectordb, [doc_id for doc_id, _ in hits])
+    return [docs[doc_id] for doc_id, _ in hits if doc_id in docs]
+
+
+def _doc_key(doc: Document) -> str:
+    """
+    Fusion key of a dense hit: its show_id (the key lexical hits use), else
+    the stored document id, else the text itself for legacy documents
+    ingested without either.
+    """
+    return doc.metadata.get("show_id") or getattr(doc, "id", None) or doc.page_content
+
+
+def _fuse(vectordb, dense: List[Document], lexical: List[Tuple[str, float]], k: int) -> List[Document]:
+    """
+    Reciprocal-rank fusion of dense documents and lexical (show_id, score) hits.
+    """
+    scores: Dict[str, float] = {}
+    by_id: Dict[str, Document] = {}
+    for rank, doc in enumerate(dense):
+        doc_id = _doc_key(doc)
+        by_id[doc_id] = doc
+        scores[doc_id] = scores.get(doc_id, 0.0) + 1.0 / (RRF_K + rank + 1)
+    for rank, (doc_id, _) in enumerate(lexical):
+        scores[doc_id] = scores.get(doc_id, 0.0) + 1.0 / (RRF_K + rank + 1)
+
+    ranked = sorted(scores, key=scores.get, reverse=True)[:k]
+    by_id.update(_fetch_documents(vectordb, [i for i in ranked if i not in by_id]))
+    return [by_id[i] for i in ranked if i in by_id]
+
+
+def _search(vectordb, query: str, k: int, ids: Optional[List[str]], mode: str) -> List[Document]:
+    if mode == "lexical":
+        return _lexical_search(vectordb, query, k, ids)
+
+    if mode == "dense":
+        return _dense_search(vectordb, query, k, ids)
+
+    fetch_k = max(4 * k, 20)
+    dense = _dense_search(vectordb, query, fetch_k, ids)
+    lexical = get_lexical_index().search(query, k=fetch_k, ids=ids)
+    return _fuse(vectordb, dense, lexical, k)
+
+
+async def _asearch(vectordb, query: str, k: int, ids: Optional[List[str]], mode: str) -> List[Document]:
+    if mode == "lexical":
+        return _lexical_search(vectordb, query, k, ids)
+
+    fetch_k = k if mode == "dense" else max(4 * k, 20)
+    search = _adense_search(vectordb, query, fetch_k, ids)
+    timeout = float(os.getenv("DENSE_TIMEOUT_S", "0"))
+    if timeout > 0 and get_lexical_index() is not None:
+        try:
+            dense = await asyncio.wait_for(search, timeout)
+        except asyncio.TimeoutError:
+            print(f"[WARN] Dense retrieval exceeded {timeout}s; answering from the lexical index.")
+            return _lexical_search(vectordb, query, k, ids)
+    else:
+        dense = await search
+    if mode == "dense":
+        return dense
+
+    lexical = get_lexical_index().search(query, k=fetch_k, ids=ids)
+    return _fuse(vectordb, dense, lexical, k)
+
+
+def retrieve_similar_titles(
+    query: str,
+    k: int = 5,
+    filters: Optional[TitleFilters] = None,
+    mode: Optional[str] = None,
+):
+    """
+    Top-k catalog titles for `query`.
+
+    mode: "dense" (embedding search), "lexical" (BM25, no network call) or
+    "hybrid" (both, merged by reciprocal-rank fusion).
+    """
+    vectordb = get_vectorstore()
+    filtered, ids = _filtered_ids(filters)
+    if filtered and not ids:
+        return []
+
+    mode = _resolve_mode(mode)
+    with VECTOR_SEARCH_SECONDS.time(mode=mode):
+        return _search(vectordb, query, k, ids, mode)
+
+
+async def aretrieve_similar_titles(
+    query: str,
+    k: int = 5,
+    filters: Optional[TitleFilters] = None,
+    mode: Optional[str] = None,
+):
+    """
+    Async variant of retrieve_similar_titles so the FastAPI event loop is
+    not blocked while the query is embedded and searched. The lexical side
+    is pure in-memory NumPy and runs inline; with DENSE_TIMEOUT_S set, a
+    slow embedding call is abandoned in favour of lexical-only results.
+    """
+    vectordb = get_vectorstore()
+    filtered, ids = _filtered_ids(filters)
+    if filtered and not ids:
+        return []
+
+    mode = _resolve_mode(mode)
+    with VECTOR_SEARCH_SECONDS.time(mode=mode):
+        return await _asearch(vectordb, query, k, ids, mode)
+
+
+def _dense_many(vectordb, vectors, k: int, allowed: List[Optional[List[str]]]) -> List[List[Document]]:
+    """
+    Dense search for many precomputed query vectors. On the NumPy backend
+    all unfiltered queries are scored with one matrix product.
+    """
+    results: List[List[Document]] = [[] for _ in vectors]
+    unfiltered = [i for i, ids in enumerate(allowed) if ids is None]
+    if isinstance(vectordb, NumpyVectorStore) and unfiltered:
+        batched = vectordb.similarity_search_by_vectors([vectors[i] for i in unfiltered], k=k)
+        for i, docs in zip(unfiltered, batched):
+            results[i] = docs
+        unfiltered = []
+    for i in unfiltered + [i for i, ids in enumerate(allowed) if ids is not None]:
+        results[i] = _dense_search_by_vector(vectordb, vectors[i], k, allowed[i])
+    return results
+
+
+async def aretrieve_many(
+    queries: List[str],
+    k: int = 5,
+    filters: Optional[List[Optional[TitleFilters]]] = None,
+    mode: Optional[str] = None,
+) -> List[List[Document]]:
+    """
+    Multi-query variant of aretrieve_similar_titles for batch analysis:
+    every query is embedded in a single batched call and the searches run
+    together off the event loop. `filters` is aligned with `queries`.
+    """
+    vectordb = get_vectorstore()
+    filters = filters or [None] * len(queries)
+    results: List[List[Document]] = [[] for _ in queries]
+
+    # queries whose filters match nothing keep an empty result
+    todo: List[int] = []
+    allowed: List[Optional[List[str]]] = []
+    for i, f in enumerate(filters):
+        filtered, ids = _filtered_ids(f)
+        if not (filtered and not ids):
+            todo.append(i)
+            allowed.append(ids)
+    if not todo:
+        return results
+
+    mode = _resolve_mode(mode)
+    if mode == "lexical":
+        for i, ids in zip(todo, allowed):
+            results[i] = _lexical_search(vectordb, queries[i], k, ids)
+        return results
+
+    fetch_k = k if mode == "dense" else max(4 * k, 20)
+    with VECTOR_SEARCH_SECONDS.time(mode=f"{mode}_batch"):
+        vectors = await vectordb.embeddings.aembed_documents([queries[i] for i in todo])
+        dense = await asyncio.to_thread(_dense_many, vectordb, vectors, fetch_k, allowed)
+    for i, ids, docs in zip(todo, allowed, dense):
+        if mode == "dense":
+            results[i] = docs
+        else:
+            lexical = get_lexical_index().search(queries[i], k=fetch_k, ids=ids)
+            results[i] = _fuse(vectordb, docs, lexical, k)
+    return results
@@ -1,13 +1,27 @@
 import os
+import threading
 from pathlib import Path
-from typing import Tuple
+from typing import List, Tuple
 
 from dotenv import load_dotenv
-from langchain_openai import OpenAIEmbeddings
-from langchain_community.vectorstores import Chroma
+from langchain_core.vectorstores import VectorStore
+
+from .embedding_cache import CachedEmbeddings, EmbeddingCache
+from .numpy_store import NumpyVectorStore
 
 load_dotenv()
 
+DEFAULT_COLLECTION = "netflix_catalog"
+VECTOR_BACKENDS = ("chroma", "numpy")
+
+_embeddings = None
+_embeddings_lock = threading.Lock()
+# chromadb's shared client registry is not safe to initialise from several
+# threads at once (background rebuilds run next to live queries)
+_chroma_lock = threading.Lock()
+# (pointer file, collection name) last read or written; see get_active_collection
+_active_collection: Tuple[Path, str] | None = None
+
 
 def _get_paths() -> Tuple[Path, Path]:
     """
@@ -23,22 +37,189 @@ def _get_paths() -> Tuple[Path, Path]:
     return data_root, chroma_dir
 
 
-def build_vectorstore() -> Chroma:
+def get_data_root() -> Path:
+    return _get_paths()[0]
+
+
+def get_embeddings() -> CachedEmbeddings:
+    """
+    Process-wide OpenAIEmbeddings wrapped in the two-tier embedding cache.
+    Its HTTP clients go through the shared "embeddings" rate limiter.
+
+    Shared by query-time retrieval and run_ingest, so a rebuild reuses the
+    vectors of every catalog text that has not changed. The on-disk tier
+    lives in DATA_ROOT/embedding_cache.sqlite unless EMBEDDING_CACHE_PATH is
+    set; EMBEDDING_CACHE_SIZE bounds the in-memory LRU.
+    """
+    global _embeddings
+    with _embeddings_lock:
+        if _embeddings is None:
+            import httpx
+            from langchain_openai import OpenAIEmbeddings
+
+            from ..config import settings
+            from ..utils.limiter import get_limiter, limited_clients
+
+            data_root, _ = _get_paths()
+            cache_path = Path(
+                os.getenv("EMBEDDING_CACHE_PATH", data_root / "embedding_cache.sqlite")
+            ).resolve()
+            cache = EmbeddingCache(
+                db_path=cache_path,
+                max_entries=int(os.getenv("EMBEDDING_CACHE_SIZE", "10000")),
+            )
+            embedding_model_name = os.getenv("EMBEDDING_MODEL", "text-embedding-3-small")
+            http_client, http_async_client = limited_clients(
+                get_limiter("embeddings"),
+                httpx.Limits(max_connections=settings.EMBEDDING_MAX_CONCURRENCY),
+                settings.LLM_TIMEOUT,
+            )
+            _embeddings = CachedEmbeddings(
+                OpenAIEmbeddings(
+                    model=embedding_model_name,
+                    http_client=http_client,
+                    http_async_client=http_async_client,
+                ),
+                model_name=embedding_model_name,
+                cache=cache,
+            )
+    return _embeddings
+
+
+def get_backend() -> str:
+    """
+    Vector-store backend selected by VECTOR_BACKEND:
+    - "chroma" -> persistent Chroma collections (default)
+    - "numpy"  -> in-process NumpyVectorStore over memory-mapped .npy files
     """
-    Connect to the existing Chroma vector store that was built by ingest.py.
+    backend = os.getenv("VECTOR_BACKEND", "chroma").lower()
+    if backend not in VECTOR_BACKENDS:
+        raise ValueError(f"Unknown VECTOR_BACKEND '{backend}', expected one of {VECTOR_BACKENDS}")
+    return backend
+
+
+def get_index_dir() -> Path:
+    """
+    Directory holding the collections of the selected backend
+    (CHROMA_DIR, or NUMPY_INDEX_DIR defaulting to DATA_ROOT/numpy_index).
+    """
+    data_root, chroma_dir = _get_paths()
+    if get_backend() == "numpy":
+        return Path(os.getenv("NUMPY_INDEX_DIR", data_root / "numpy_index")).resolve()
+    return chroma_dir
+
+
+def get_artifact_path(collection_name: str, kind: str) -> Path:
+    """
+    Path of a per-collection side index built at ingest time (metadata
+    postings, lexical index, ...). Dropped together with the collection.
+    """
+    return get_index_dir() / "artifacts" / f"{collection_name}.{kind}"
+
+
+def _active_collection_file() -> Path:
+    return get_index_dir() / "ACTIVE_COLLECTION"
+
+
+def _read_active_collection(path: Path) -> str:
+    if path.exists():
+        name = path.read_text(encoding="utf-8").strip()
+        if name:
+            return name
+    return DEFAULT_COLLECTION
+
+
+def get_active_collection() -> str:
+    """
+    Name of the collection queries are served from. Background rebuilds
+    write into a fresh versioned collection and flip this pointer when done.
+
+    The pointer is read once and kept in memory (it is consulted on every
+    retrieval and memo key); set_active_collection and the retriever's
+    swap listener refresh it.
+    """
+    global _active_collection
+    path = _active_collection_file()
+    cached = _active_collection
+    if cached is None or cached[0] != path:
+        cached = _active_collection = (path, _read_active_collection(path))
+    return cached[1]
+
+
+def refresh_active_collection() -> None:
+    """
+    Re-read ACTIVE_COLLECTION, e.g. after another process repointed it.
+    """
+    global _active_collection
+    path = _active_collection_file()
+    _active_collection = (path, _read_active_collection(path))
+
+
+def set_active_collection(name: str) -> None:
+    """
+    Atomically repoint ACTIVE_COLLECTION (write a temp file, then rename).
+    """
+    global _active_collection
+    path = _active_collection_file()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(name, encoding="utf-8")
+    os.replace(tmp, path)
+    _active_collection = (path, name)
+
+
+def build_vectorstore(collection_name: str | None = None) -> VectorStore:
+    """
+    Connect to the existing vector store that was built by ingest.py.
 
     This does NOT rebuild embeddings – it only loads the persisted index
-    from disk using the same embedding model.
+    from disk using the same embedding model. Defaults to the active
+    collection of the configured backend.
     """
     _, chroma_dir = _get_paths()
 
-    embedding_model_name = os.getenv("EMBEDDING_MODEL", "text-embedding-3-small")
-    embeddings = OpenAIEmbeddings(model=embedding_model_name)
+    embeddings = get_embeddings()
+    collection_name = collection_name or get_active_collection()
+
+    if get_backend() == "numpy":
+        return NumpyVectorStore(get_index_dir() / collection_name, embedding=embeddings)
+
+    from langchain_community.vectorstores import Chroma
+
+    with _chroma_lock:
+        vectordb = Chroma(
+            collection_name=collection_name,
+            embedding_function=embeddings,
+            persist_directory=str(chroma_dir),
+        )
+
+    return vectordb
+
+
+def _chroma_client():
+    import chromadb
+
+    _, chroma_dir = _get_paths()
+    with _chroma_lock:
+        return chromadb.PersistentClient(path=str(chroma_dir))
+
+
+def list_collections() -> List[str]:
+    """
+    Names of every catalog collection (active, previous and versioned builds).
+    """
+    if get_backend() == "numpy":
+        index_dir = get_index_dir()
+        names = [p.name for p in index_dir.iterdir() if p.is_dir()] if index_dir.exists() else []
+    else:
+        names = [getattr(c, "name", c) for c in _chroma_client().list_collections()]
+    return sorted(n for n in names if n.startswith(DEFAULT_COLLECTION))
 
-    vectordb = Chroma(
-        collection_name="netflix_catalog",
-        embedding_function=embeddings,
-        persist_directory=str(chroma_dir),
-    )
 
-    return vectordb
\ No newline at end of file
+def drop_collection(name: str) -> None:
+    if get_backend() == "numpy":
+        NumpyVectorStore(get_index_dir() / name, embedding=get_embeddings()).delete_collection()
+    else:
+        _chroma_client().delete_collection(name)
+    for artifact in (get_index_dir() / "artifacts").glob(f"{name}.*"):
+        artifact.unlink(missing_ok=True)
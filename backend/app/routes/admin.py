@@ -1,12 +1,189 @@
-from fastapi import APIRouter
-from ..rag.ingest import run_ingest
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import PlainTextResponse
+from ..agents.memo import get_node_memo
+from ..agents.response_cache import get_response_cache
+from ..agents.runtime import get_runtime
+from ..agents.sessions import get_session_store
+from ..agents.singleflight import get_single_flight
+from ..rag.jobs import get_job_manager
+from ..rag.vectorstore import get_active_collection, get_embeddings
+from ..utils.limiter import get_limiter
+from ..utils.metrics import REGISTRY, render_metrics
 
 router = APIRouter(
     prefix="/admin",
     tags=["admin"],
 )
 
-@router.post("/rebuild_index")
+
+def _cache_metrics():
+    """
+    Scrape-time view of the caches' own counters.
+    """
+    emb = get_embeddings().cache.stats()
+    yield ("streamintel_embedding_cache_lookups_total", "counter", "Embedding cache lookups by result.", [
+        ({"result": "memory_hit"}, emb["memory_hits"]),
+        ({"result": "disk_hit"}, emb["disk_hits"]),
+        ({"result": "miss"}, emb["misses"]),
+    ])
+    resp = get_response_cache().stats()
+    yield ("streamintel_response_cache_lookups_total", "counter", "Semantic response cache lookups by result.", [
+        ({"result": "hit"}, resp["hits"]),
+        ({"result": "miss"}, resp["misses"]),
+    ])
+    yield ("streamintel_response_cache_entries", "gauge", "Live semantic response cache entries.", [
+        ({}, resp["entries"]),
+    ])
+    memo = get_node_memo()
+    if memo is not None:
+        nodes = memo.stats()["nodes"]
+        yield ("streamintel_node_memo_lookups_total", "counter", "Node memo lookups by node and result.", [
+            ({"node": node, "result": result}, s[key])
+            for node, s in nodes.items()
+            for result, key in (("hit", "hits"), ("miss", "misses"))
+        ])
+    sessions = get_session_store().stats()
+    yield ("streamintel_chat_sessions", "gauge", "Chat sessions held in memory and in the SQLite spill.", [
+        ({"tier": "memory"}, sessions["sessions"]),
+        ({"tier": "spill"}, sessions["spilled_sessions"]),
+    ])
+    runtime = get_runtime().stats()
+    yield ("streamintel_llm_http_connections", "gauge", "Open connections in the shared LLM HTTP pools.", [
+        ({"client": name}, count) for name, count in runtime["http_connections"].items()
+    ])
+    limiters = {kind: get_limiter(kind).stats() for kind in ("chat", "embeddings")}
+    yield ("streamintel_limiter_concurrency_limit", "gauge", "Current adaptive concurrency limit per provider.", [
+        ({"limiter": kind}, s["limit"]) for kind, s in limiters.items()
+    ])
+    yield ("streamintel_limiter_in_flight", "gauge", "Provider calls admitted and not yet finished.", [
+        ({"limiter": kind}, s["in_flight"]) for kind, s in limiters.items()
+    ])
+    yield ("streamintel_limiter_queued", "gauge", "Provider calls waiting for admission by priority.", [
+        ({"limiter": kind, "priority": priority}, count)
+        for kind, s in limiters.items()
+        for priority, count in s["queued"].items()
+    ])
+
+
+REGISTRY.add_collector(_cache_metrics)
+
+@router.post("/rebuild_index", status_code=202)
 async def rebuild_index():
-    run_ingest()
-    return {"status": "ok", "message": "Index rebuilt"}
\ No newline at end of file
+    """
+    Start a background rebuild into a fresh versioned collection.
+    Returns immediately with a job id; queries keep using the current index
+    until the build succeeds and the retriever switches over.
+    """
+    job = get_job_manager().submit()
+    return {"status": job.status, "job_id": job.job_id, "collection": job.collection}
+
+@router.get("/rebuild_index")
+async def list_rebuild_jobs():
+    return {
+        "active_collection": get_active_collection(),
+        "jobs": [job.to_dict() for job in get_job_manager().list()],
+    }
+
+@router.get("/rebuild_index/{job_id}")
+async def rebuild_status(job_id: str):
+    job = get_job_manager().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown rebuild job '{job_id}'")
+    return job.to_dict()
+
+@router.post("/rebuild_index/{job_id}/cancel")
+async def cancel_rebuild(job_id: str):
+    job = get_job_manager().cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown rebuild job '{job_id}'")
+    return job.to_dict()
+
+@router.get("/runtime")
+async def runtime_stats():
+    """
+    Pooled LLM clients and open HTTP connections held by the shared runtime.
+    """
+    return get_runtime().stats()
+
+@router.get("/embedding_cache")
+async def embedding_cache_stats():
+    """
+    Hit / miss / eviction counters of the shared query-embedding cache.
+    """
+    return get_embeddings().cache.stats()
+
+@router.get("/response_cache")
+async def response_cache_stats():
+    """
+    Hit / miss counters of the semantic response cache.
+    """
+    return get_response_cache().stats()
+
+@router.delete("/response_cache")
+async def clear_response_cache():
+    cache = get_response_cache()
+    cache.clear()
+    return cache.stats()
+
+@router.get("/node_memo")
+async def node_memo_stats():
+    """
+    Per-agent hit rates of the node memoization layer.
+    """
+    memo = get_node_memo()
+    return memo.stats() if memo is not None else {"backend": "off"}
+
+@router.delete("/node_memo")
+async def clear_node_memo():
+    memo = get_node_memo()
+    if memo is None:
+        return {"backend": "off"}
+    memo.clear()
+    return memo.stats()
+
+@router.get("/singleflight")
+async def singleflight_stats():
+    """
+    Requests that shared an identical in-flight graph run instead of
+    starting their own.
+    """
+    return get_single_flight().stats()
+
+@router.get("/limiter")
+async def limiter_stats():
+    """
+    Provider rate limiters: adaptive concurrency limit, in-flight and queued
+    calls per priority, 429s seen and mean admission wait.
+    """
+    return {kind: get_limiter(kind).stats() for kind in ("chat", "embeddings")}
+
+@router.get("/sessions")
+async def session_stats():
+    """
+    Size and churn (created / expired / evicted / spilled / restored) of the
+    chat session store.
+    """
+    return get_session_store().stats()
+
+@router.post("/sessions/prune")
+async def prune_sessions():
+    """
+    Drop expired sessions from memory and from the SQLite spill.
+    """
+    store = get_session_store()
+    store.prune()
+    return store.stats()
+
+@router.delete("/sessions")
+async def clear_sessions():
+    store = get_session_store()
+    store.clear()
+    return store.stats()
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """
+    Prometheus text exposition: request / node / LLM / embedding / search
+    latency histograms, token counters, cache hit counters, in-flight gauges.
+    """
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
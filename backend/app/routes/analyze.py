@@ -1,7 +1,20 @@
-from fastapi import APIRouter
-from pydantic import BaseModel
-from typing import List, Optional
-from ..agents.graph import build_streamintel_graph, StreamIntelState
+import json
+import time
+from fastapi import APIRouter, Response
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+from typing import TYPE_CHECKING, Any, AsyncIterator, Dict, List, Optional
+from ..agents.batch import arun_batch
+from ..agents.response_cache import ainvoke_cached
+from ..agents.runtime import get_runtime
+from ..agents.streaming import sse_stream
+from ..config import settings
+from ..rag.filters import TitleFilters
+from ..utils.streaming import normalize_recommendation_text
+
+if TYPE_CHECKING:
+    # the graph (and langgraph) is compiled by the lifespan warmup, not at import
+    from ..agents.graph import StreamIntelState
 
 router = APIRouter(
     prefix="/analyze_title",   # final path: /api/analyze_title
@@ -12,16 +25,25 @@ router = APIRouter(
 class TitleAnalysisRequest(BaseModel):
     title_name: str
     description: Optional[str] = None
+    # read by the audience-fit agent only; use filters.countries to narrow retrieval
     target_regions: Optional[List[str]] = None
+    filters: Optional[TitleFilters] = None
 
 
 class TitleAnalysisResponse(BaseModel):
     session_id: str
     answer: str
     sources: List[dict]
+    retrieval: Dict[str, Any] = {}
 
 
-def _extract_analysis_answer(result: StreamIntelState) -> str:
+class BatchAnalysisRequest(BaseModel):
+    items: List[TitleAnalysisRequest] = Field(..., min_length=1, max_length=settings.BATCH_MAX_ITEMS)
+    # graphs in flight at once; defaults to BATCH_CONCURRENCY
+    concurrency: Optional[int] = Field(None, ge=1, le=64)
+
+
+def _extract_analysis_answer(result: "StreamIntelState") -> str:
     """
     For title analysis we again prefer a dedicated 'analysis' key if it
     ever exists, otherwise we use 'executive_summary'.
@@ -37,56 +59,114 @@ def _extract_analysis_answer(result: StreamIntelState) -> str:
     return "The graph ran, but did not return a final analysis field."
 
 
-def _normalize_recommendation_text(answer: str) -> str:
-    """
-    Clean up the 'Recommended: Pilot' phrasing so we surface a single,
-    polished recommendation line to the frontend.
-    """
-    if not isinstance(answer, str) or not answer:
-        return answer
-
-    replacement = (
-        "Recommendation: Greenlight a pilot; strong fit with target audience."
-    )
-
-    patterns = [
-        "Recommendation:\n\nRecommended: Pilot",
-        "Recommendation:\r\n\r\nRecommended: Pilot",
-        "Recommendation:\nRecommended: Pilot",
-        "Recommendation:\r\nRecommended: Pilot",
-    ]
-
-    for pat in patterns:
-        if pat in answer:
-            return answer.replace(pat, replacement)
-
-    if "Recommended: Pilot" in answer:
-        return answer.replace("Recommended: Pilot", replacement)
-
-    return answer
-
-
-@router.post("", response_model=TitleAnalysisResponse)
-async def analyze_title(request: TitleAnalysisRequest):
-    graph = build_streamintel_graph()
-
+def build_analysis_state(request: TitleAnalysisRequest) -> "StreamIntelState":
     prompt = f"Title: {request.title_name}\n\n"
     if request.description:
         prompt += f"Description: {request.description}\n\n"
-    if request.target_regions:
-        prompt += f"Target regions: {', '.join(request.target_regions)}\n\n"
+
+    # regions stay out of the concept and the filters, so changing only the
+    # regions re-runs audience_fit (and the summary) but not retrieval,
+    # content_scout or competitive
+    filters = request.filters or TitleFilters()
 
     state: StreamIntelState = {
         "concept": prompt,
+        "title_name": request.title_name,
         "history": [],
     }
+    if request.target_regions:
+        state["target_regions"] = list(request.target_regions)
+    if not filters.is_empty():
+        state["filters"] = filters.model_dump(exclude_none=True)
+    return state
 
-    result = await graph.ainvoke(state)
+
+def to_analysis_response(result: "StreamIntelState") -> TitleAnalysisResponse:
     answer = _extract_analysis_answer(result)
-    answer = _normalize_recommendation_text(answer)
+    answer = normalize_recommendation_text(answer)
 
     return TitleAnalysisResponse(
-        session_id=str(result.get("session_id", "")),
+        session_id=str(result.get("session_id") or ""),
         answer=answer,
-        sources=result.get("sources", []),
-    )
\ No newline at end of file
+        sources=result.get("similar_titles") or [],
+        retrieval=result.get("retrieval_stats") or {},
+    )
+
+
+async def batch_events(
+    requests: List[TitleAnalysisRequest],
+    concurrency: Optional[int] = None,
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    One event per request in completion order, then a closing summary
+    event ({"done": true, ...}). Shared by the batch route and the CLI.
+    """
+    t0 = time.perf_counter()
+    succeeded = failed = 0
+    states = [build_analysis_state(r) for r in requests]
+
+    async for item in arun_batch(states, concurrency):
+        event: Dict[str, Any] = {
+            "index": item["index"],
+            "title_name": requests[item["index"]].title_name,
+            "status": "ok" if item["ok"] else "error",
+            "queued_ms": item["queued_ms"],
+            "elapsed_ms": item["elapsed_ms"],
+        }
+        if item["ok"]:
+            succeeded += 1
+            event["result"] = to_analysis_response(item["result"]).model_dump()
+        else:
+            failed += 1
+            event["error"] = item["error"]
+        yield event
+
+    yield {
+        "done": True,
+        "total": len(requests),
+        "succeeded": succeeded,
+        "failed": failed,
+        "elapsed_ms": round((time.perf_counter() - t0) * 1000, 2),
+    }
+
+
+@router.post("", response_model=TitleAnalysisResponse)
+async def analyze_title(request: TitleAnalysisRequest, response: Response):
+    graph = get_runtime().graph
+    result, similarity = await ainvoke_cached(graph, build_analysis_state(request))
+    response.headers["X-Cache"] = "MISS" if similarity is None else "HIT"
+    if similarity is not None:
+        response.headers["X-Cache-Similarity"] = f"{similarity:.4f}"
+    return to_analysis_response(result)
+
+
+@router.post("/stream")
+async def analyze_title_stream(request: TitleAnalysisRequest):
+    """
+    Server-sent-events variant of /api/analyze_title (see /api/chat/stream).
+    """
+    body = sse_stream(
+        get_runtime().graph,
+        build_analysis_state(request),
+        extract_answer=_extract_analysis_answer,
+    )
+    return StreamingResponse(
+        body,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.post("/batch")
+async def analyze_title_batch(request: BatchAnalysisRequest):
+    """
+    Analyze a slate of concepts in one call. All concepts are embedded and
+    searched together, then the agent graph runs with bounded concurrency.
+    Streams NDJSON: one line per concept as it completes (with timing or
+    the error), followed by a summary line.
+    """
+    async def lines():
+        async for event in batch_events(request.items, request.concurrency):
+            yield json.dumps(event, ensure_ascii=False) + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
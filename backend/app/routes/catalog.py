@@ -0,0 +1,40 @@
+from fastapi import APIRouter, HTTPException, Query
+from typing import List, Optional
+from ..rag.analytics import get_catalog_analytics
+from ..rag.filters import TitleFilters
+
+router = APIRouter(
+    prefix="/catalog",   # final path: /api/catalog
+    tags=["catalog"],
+)
+
+
+@router.get("/stats")
+async def catalog_stats(
+    genres: Optional[List[str]] = Query(None),
+    countries: Optional[List[str]] = Query(None),
+    types: Optional[List[str]] = Query(None),
+    year_min: Optional[int] = None,
+    year_max: Optional[int] = None,
+    show_ids: Optional[List[str]] = Query(None),
+    top: int = Query(8, ge=0, le=50),
+):
+    """
+    Exact saturation metrics of a catalog segment from the ingest-time
+    aggregates: title count and share, release trend and growth vs the
+    catalog, semantic density, saturation score and the largest genre x
+    country x type cells. Filters follow TitleFilters (repeat a parameter
+    for several values; countries accept regions, genres match by
+    substring); no filter describes the whole catalog. `show_ids` measures
+    density around those titles instead of over the segment.
+    """
+    analytics = get_catalog_analytics()
+    if analytics is None:
+        raise HTTPException(
+            status_code=503,
+            detail="Catalog analytics not built for the active collection; run python -m app.rag.ingest",
+        )
+    filters = TitleFilters(
+        genres=genres, countries=countries, types=types, year_min=year_min, year_max=year_max,
+    )
+    return analytics.segment(filters, around_ids=show_ids, top=top)
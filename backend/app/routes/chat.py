@@ -1,7 +1,20 @@
-from fastapi import APIRouter
+import re
+from fastapi import APIRouter, HTTPException, Response
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from typing import List, Optional
-from ..agents.graph import build_streamintel_graph, StreamIntelState
+from typing import TYPE_CHECKING, Any, Dict, List, Literal, Optional
+from ..agents.response_cache import ainvoke_cached
+from ..agents.runtime import get_runtime
+from ..agents.sessions import Session, get_session_store
+from ..agents.streaming import sse_stream
+from ..config import settings
+from ..rag.filters import TitleFilters
+from ..utils.streaming import normalize_recommendation_text
+from .explore import compare_titles, explore_title, render_compare, render_explore
+
+if TYPE_CHECKING:
+    # the graph (and langgraph) is compiled by the lifespan warmup, not at import
+    from ..agents.graph import StreamIntelState
 
 router = APIRouter(
     prefix="/chat",   # final path: /api/chat
@@ -11,16 +24,24 @@ router = APIRouter(
 
 class ChatRequest(BaseModel):
     message: str
+    # omit to start a session; unknown or expired ids start a new one
+    session_id: Optional[str] = None
+    # legacy client-side history, only used to seed a new session
     history: Optional[List[str]] = []
+    filters: Optional[TitleFilters] = None
+    # explore: message is a title ("titles like X"); compare: "X vs Y".
+    # Both are answered from the neighbour graph without running the agents.
+    mode: Literal["content_intel", "explore", "compare"] = "content_intel"
 
 
 class ChatResponse(BaseModel):
     session_id: str
     answer: str
     sources: List[dict]
+    retrieval: Dict[str, Any] = {}
 
 
-def _extract_chat_answer(result: StreamIntelState) -> str:
+def _extract_chat_answer(result: "StreamIntelState") -> str:
     """
     Prefer a proper 'answer' key if the graph provides it.
     Otherwise, fall back to 'executive_summary', which is already
@@ -38,56 +59,105 @@ def _extract_chat_answer(result: StreamIntelState) -> str:
     return "The graph ran, but did not return a final answer field."
 
 
-def _normalize_recommendation_text(answer: str) -> str:
-    """
-    Clean up the slightly clunky 'Recommended: Pilot' phrasing coming
-    from the prompt/template so the user sees a single, clear line like:
+def _build_chat_state(request: ChatRequest, session: Session) -> "StreamIntelState":
+    state: StreamIntelState = {
+        "concept": request.message,
+        "session_id": session.session_id,
+        "conversation": session.context(settings.SESSION_CONTEXT_TOKENS),
+    }
+    if request.filters is not None and not request.filters.is_empty():
+        state["filters"] = request.filters.model_dump(exclude_none=True)
+    return state
 
-        Recommendation: Greenlight a pilot; strong fit with target audience.
 
-    We handle a few common newline patterns just to be safe.
+_VERSUS = re.compile(r"\s+(?:vs\.?|versus)\s+", re.IGNORECASE)
+
+
+def _lookup_answer(request: ChatRequest) -> Dict[str, Any]:
+    """
+    Answer an explore / compare chat message from the neighbour graph.
     """
-    if not isinstance(answer, str) or not answer:
-        return answer
+    if request.mode == "explore":
+        result = explore_title(request.message, filters=request.filters)
+        return {"answer": render_explore(result), "sources": result["neighbours"]}
 
-    replacement = (
-        "Recommendation: Greenlight a pilot; strong fit with target audience."
-    )
+    parts = _VERSUS.split(request.message.strip(), maxsplit=1)
+    if len(parts) != 2:
+        raise HTTPException(status_code=400, detail="compare mode expects a message like 'X vs Y'")
+    result = compare_titles(parts[0], parts[1])
+    return {"answer": render_compare(result), "sources": [result["left"], result["right"]]}
 
-    # Most likely pattern from the current template
-    patterns = [
-        "Recommendation:\n\nRecommended: Pilot",
-        "Recommendation:\r\n\r\nRecommended: Pilot",
-        "Recommendation:\nRecommended: Pilot",
-        "Recommendation:\r\nRecommended: Pilot",
-    ]
 
-    for pat in patterns:
-        if pat in answer:
-            return answer.replace(pat, replacement)
+@router.post("", response_model=ChatResponse)
+async def chat_endpoint(request: ChatRequest, response: Response):
+    store = get_session_store()
+    session = store.get_or_create(request.session_id, request.history)
+    if request.mode != "content_intel":
+        lookup = _lookup_answer(request)
+        store.record(session, request.message, lookup["answer"])
+        return ChatResponse(
+            session_id=session.session_id,
+            answer=lookup["answer"],
+            sources=lookup["sources"],
+            retrieval={"mode": "neighbour_graph"},
+        )
+
+    graph = get_runtime().graph
+
+    result, similarity = await ainvoke_cached(graph, _build_chat_state(request, session))
+    response.headers["X-Cache"] = "MISS" if similarity is None else "HIT"
+    if similarity is not None:
+        response.headers["X-Cache-Similarity"] = f"{similarity:.4f}"
+    answer = _extract_chat_answer(result)
+    answer = normalize_recommendation_text(answer)
+    store.record(session, request.message, answer)
 
-    # Fallback: if we only see the bare line, still upgrade it
-    if "Recommended: Pilot" in answer:
-        return answer.replace("Recommended: Pilot", replacement)
+    return ChatResponse(
+        session_id=session.session_id,
+        answer=answer,
+        sources=result.get("similar_titles") or [],
+        retrieval=result.get("retrieval_stats") or {},
+    )
 
-    return answer
 
+@router.post("/stream")
+async def chat_stream(request: ChatRequest):
+    """
+    Server-sent-events variant of /api/chat: one event per finished agent,
+    the executive summary token by token, then a final "done" event with
+    the same fields as ChatResponse.
+    """
+    if request.mode != "content_intel":
+        raise HTTPException(status_code=400, detail=f"mode '{request.mode}' is a lookup; use POST /api/chat")
+    store = get_session_store()
+    session = store.get_or_create(request.session_id, request.history)
+    body = sse_stream(
+        get_runtime().graph,
+        _build_chat_state(request, session),
+        extract_answer=_extract_chat_answer,
+        on_done=lambda _, answer: store.record(session, request.message, answer),
+    )
+    return StreamingResponse(
+        body,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
-@router.post("", response_model=ChatResponse)
-async def chat_endpoint(request: ChatRequest):
-    graph = build_streamintel_graph()
 
-    state: StreamIntelState = {
-        "concept": request.message,
-        "history": request.history or [],
-    }
+@router.get("/sessions/{session_id}")
+async def get_session(session_id: str):
+    """
+    A session's rolling summary and its most recent turns (older turns only
+    survive as summary lines).
+    """
+    session = get_session_store().get(session_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail=f"Unknown or expired session '{session_id}'")
+    return session.to_dict()
 
-    result = await graph.ainvoke(state)
-    answer = _extract_chat_answer(result)
-    answer = _normalize_recommendation_text(answer)
 
-    return ChatResponse(
-        session_id=str(result.get("session_id", "")),
-        answer=answer,
-        sources=result.get("sources", []),
-    )
\ No newline at end of file
+@router.delete("/sessions/{session_id}")
+async def delete_session(session_id: str):
+    if not get_session_store().delete(session_id):
+        raise HTTPException(status_code=404, detail=f"Unknown or expired session '{session_id}'")
+    return {"session_id": session_id, "deleted": True}
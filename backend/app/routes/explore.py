@@ -0,0 +1,186 @@
+from fastapi import APIRouter, HTTPException
+from pydantic import BaseModel, Field
+from typing import Any, Dict, List, Optional, Tuple
+from ..rag.filters import TitleFilters, get_metadata_index
+from ..rag.neighbours import NeighbourGraph, get_neighbour_graph
+from ..rag.retriever import get_vectorstore
+
+router = APIRouter(
+    tags=["explore"],   # final paths: /api/explore, /api/compare
+)
+
+
+class ExploreRequest(BaseModel):
+    # catalog title (case / punctuation insensitive) or show_id
+    title: str
+    k: int = Field(10, ge=1, le=50)
+    # applied within the precomputed top-N, so narrow filters may return fewer than k
+    filters: Optional[TitleFilters] = None
+
+
+class CompareRequest(BaseModel):
+    left: str
+    right: str
+    k: int = Field(5, ge=1, le=50)
+
+
+def _graph() -> NeighbourGraph:
+    graph = get_neighbour_graph()
+    if graph is None:
+        raise HTTPException(
+            status_code=503,
+            detail="Neighbour graph not built for the active collection; run python -m app.rag.neighbours",
+        )
+    return graph
+
+
+def _resolve(graph: NeighbourGraph, name: str) -> Tuple[int, List[int]]:
+    """
+    Row of a title name or show_id, plus the other rows sharing that name.
+    """
+    row = graph.row_of(name.strip())
+    if row is not None:
+        return row, []
+    rows = graph.rows_of_title(name)
+    if not rows:
+        raise HTTPException(
+            status_code=404,
+            detail={"message": f"No catalog title matches '{name}'", "suggestions": graph.suggest(name)},
+        )
+    return rows[0], rows[1:]
+
+
+def _describe(graph: NeighbourGraph, scored: List[Tuple[int, Optional[float]]]) -> List[Dict[str, Any]]:
+    """
+    Catalog metadata of graph rows, fetched by id from the vector store (no
+    embedding involved).
+    """
+    ids = [str(graph.ids[row]) for row, _ in scored]
+    stored = get_vectorstore().get(ids=ids, include=["metadatas"]) if ids else {"ids": [], "metadatas": []}
+    meta_of = dict(zip(stored["ids"], stored["metadatas"]))
+    out = []
+    for doc_id, (_, score) in zip(ids, scored):
+        meta = meta_of.get(doc_id) or {}
+        item = {
+            "show_id": doc_id,
+            "title": meta.get("title", ""),
+            "type": meta.get("type", ""),
+            "release_year": meta.get("release_year", ""),
+            "country": meta.get("country", ""),
+            "genres": meta.get("genres", ""),
+        }
+        if score is not None:
+            item["score"] = round(score, 4)
+        out.append(item)
+    return out
+
+
+def _terms(value: str) -> List[str]:
+    return [part.strip() for part in str(value or "").split(",") if part.strip()]
+
+
+def _overlap(left: str, right: str) -> Dict[str, List[str]]:
+    a, b = _terms(left), _terms(right)
+    return {
+        "shared": [t for t in a if t in b],
+        "left_only": [t for t in a if t not in b],
+        "right_only": [t for t in b if t not in a],
+    }
+
+
+def explore_title(title: str, k: int = 10, filters: Optional[TitleFilters] = None) -> Dict[str, Any]:
+    """
+    "Titles like X": the stored neighbour list of X, optionally filtered.
+    """
+    graph = _graph()
+    row, others = _resolve(graph, title)
+
+    allowed = None
+    if filters is not None and not filters.is_empty():
+        index = get_metadata_index()
+        if index is None:
+            raise HTTPException(status_code=503, detail="Metadata index not built; filters are unavailable")
+        allowed = set(index.match(filters))
+
+    return {
+        "title": _describe(graph, [(row, None)])[0],
+        "same_name": _describe(graph, [(r, None) for r in others]),
+        "neighbours": _describe(graph, graph.neighbours_of(row, k, allowed)),
+        "top_n": graph.top_n,
+    }
+
+
+def compare_titles(left: str, right: str, k: int = 5) -> Dict[str, Any]:
+    """
+    "Compare X vs Y": their stored similarity (or its upper bound when
+    neither is in the other's top-N), shared neighbours and metadata overlap.
+    """
+    graph = _graph()
+    a, _ = _resolve(graph, left)
+    b, _ = _resolve(graph, right)
+    left_item, right_item = _describe(graph, [(a, None), (b, None)])
+
+    similarity = graph.similarity(a, b)
+    years = [left_item["release_year"], right_item["release_year"]]
+    return {
+        "left": left_item,
+        "right": right_item,
+        "similarity": round(similarity, 4) if similarity is not None else None,
+        "similarity_upper_bound": None if similarity is not None else round(graph.floor(a, b), 4),
+        "shared_neighbours": _describe(graph, graph.shared(a, b, k)),
+        "genres": _overlap(left_item["genres"], right_item["genres"]),
+        "countries": _overlap(left_item["country"], right_item["country"]),
+        "same_type": left_item["type"] == right_item["type"],
+        "year_gap": abs(int(years[0]) - int(years[1])) if all(str(y).isdigit() for y in years) else None,
+    }
+
+
+def _label(item: Dict[str, Any]) -> str:
+    return f"{item['title']} ({item['type']}, {item['release_year']})"
+
+
+def render_explore(result: Dict[str, Any]) -> str:
+    lines = [f"Titles like {_label(result['title'])}:"]
+    for i, item in enumerate(result["neighbours"], 1):
+        lines.append(f"{i}. {_label(item)} - {item['genres']} [similarity {item['score']:.2f}]")
+    if not result["neighbours"]:
+        lines.append(f"No neighbour in its top {result['top_n']} matches the filters.")
+    return "\n".join(lines)
+
+
+def render_compare(result: Dict[str, Any]) -> str:
+    left, right = result["left"], result["right"]
+    if result["similarity"] is not None:
+        similarity = f"similarity {result['similarity']:.2f}"
+    else:
+        similarity = f"not in each other's closest titles (similarity below {result['similarity_upper_bound']:.2f})"
+    genres = result["genres"]
+    lines = [
+        f"{_label(left)} vs {_label(right)}: {similarity}.",
+        f"Shared genres: {', '.join(genres['shared']) or 'none'}; "
+        f"only {left['title']}: {', '.join(genres['left_only']) or 'none'}; "
+        f"only {right['title']}: {', '.join(genres['right_only']) or 'none'}.",
+    ]
+    if result["year_gap"] is not None:
+        lines.append(f"Released {result['year_gap']} year(s) apart; same format: {'yes' if result['same_type'] else 'no'}.")
+    if result["shared_neighbours"]:
+        lines.append("Close to both: " + "; ".join(_label(item) for item in result["shared_neighbours"]) + ".")
+    return "\n".join(lines)
+
+
+@router.post("/explore")
+async def explore(request: ExploreRequest):
+    """
+    Titles most similar to a catalog title, straight from the precomputed
+    neighbour graph (no embedding call, no vector search).
+    """
+    return explore_title(request.title, request.k, request.filters)
+
+
+@router.post("/compare")
+async def compare(request: CompareRequest):
+    """
+    Side-by-side of two catalog titles from the neighbour graph and their
+    metadata.
+    """
+    return compare_titles(request.left, request.right, request.k)
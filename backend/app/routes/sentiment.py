@@ -0,0 +1,51 @@
+import time
+from fastapi import APIRouter, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from pydantic import BaseModel, Field
+from typing import Any, Dict, List, Optional
+from ..agents.sentiment import get_sentiment_model
+from ..config import settings
+
+router = APIRouter(
+    prefix="/sentiment",   # final path: /api/sentiment
+    tags=["sentiment"],
+)
+
+
+class SentimentBatchRequest(BaseModel):
+    texts: List[str] = Field(..., min_length=1, max_length=settings.SENTIMENT_MAX_TEXTS)
+    # process-pool size for large batches (default SENTIMENT_WORKERS / CPU count);
+    # 1 forces in-process scoring
+    workers: Optional[int] = Field(None, ge=1, le=64)
+
+
+class SentimentBatchResponse(BaseModel):
+    count: int
+    mean_positive: float
+    results: List[Dict[str, Any]]
+    elapsed_ms: float
+    texts_per_sec: float
+
+
+@router.post("/batch", response_model=SentimentBatchResponse)
+async def sentiment_batch(request: SentimentBatchRequest):
+    """
+    Score review texts with the local sentiment pipeline in one vectorized
+    predict_proba call (process-pool fan-out for very large batches).
+    """
+    try:
+        model = get_sentiment_model()
+    except (ImportError, OSError, ValueError) as exc:
+        raise HTTPException(status_code=503, detail=f"Sentiment model unavailable: {exc}")
+
+    t0 = time.perf_counter()
+    results = await run_in_threadpool(model.score, request.texts, request.workers)
+    elapsed = time.perf_counter() - t0
+
+    return SentimentBatchResponse(
+        count=len(results),
+        mean_positive=round(sum(r["positive"] for r in results) / len(results), 4),
+        results=results,
+        elapsed_ms=round(elapsed * 1000, 2),
+        texts_per_sec=round(len(results) / elapsed, 1) if elapsed else 0.0,
+    )
@@ -0,0 +1,478 @@
+import asyncio
+import heapq
+import itertools
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+from ..config import settings
+from .metrics import LIMITER_RATE_LIMITED, LIMITER_WAIT_SECONDS
+
+# lower rank is served first; interactive chat / analyze outranks batch jobs and ingest
+PRIORITIES = {"interactive": 0, "batch": 1, "ingest": 2}
+
+# priority class of the provider calls made by the current request / job
+priority_var: ContextVar[str] = ContextVar("llm_priority", default="interactive")
+
+
+@contextmanager
+def request_priority(priority: str):
+    """
+    Run the enclosed provider calls (and tasks created inside) at `priority`.
+    """
+    if priority not in PRIORITIES:
+        raise ValueError(f"Unknown priority '{priority}', expected one of {tuple(PRIORITIES)}")
+    token = priority_var.set(priority)
+    try:
+        yield
+    finally:
+        priority_var.reset(token)
+
+
+class TokenBucket:
+    """
+    Continuous-refill bucket holding up to `per_minute` units (one minute of
+    burst). A rate of 0 means unlimited. Caller holds the limiter lock.
+    """
+
+    def __init__(self, per_minute: float):
+        self.per_minute = per_minute
+        self.capacity = per_minute
+        self.level = per_minute
+        self._stamp = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self._stamp) * self.per_minute / 60.0)
+        self._stamp = now
+
+    def wait(self, amount: float, now: float) -> float:
+        """
+        Seconds until `amount` units are available (0 if they are now).
+        """
+        if not self.per_minute:
+            return 0.0
+        self._refill(now)
+        amount = min(amount, self.capacity)
+        return 0.0 if self.level >= amount else (amount - self.level) * 60.0 / self.per_minute
+
+    def take(self, amount: float) -> None:
+        if self.per_minute:
+            self.level -= min(amount, self.capacity)
+
+    def drain(self) -> None:
+        self.level = min(self.level, 0.0)
+
+
+class _Ticket:
+    __slots__ = ("rank", "seq", "priority", "tokens", "enqueued", "granted", "cancelled", "loop", "event")
+
+    def __init__(self, rank: int, seq: int, priority: str, tokens: float):
+        self.rank = rank
+        self.seq = seq
+        self.priority = priority
+        self.tokens = tokens
+        self.enqueued = time.monotonic()
+        self.granted = False
+        self.cancelled = False
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.event: Optional[asyncio.Event] = None
+
+    def __lt__(self, other: "_Ticket") -> bool:
+        return (self.rank, self.seq) < (other.rank, other.seq)
+
+
+class Permit:
+    """
+    One admitted provider call; release() frees its concurrency slot.
+    """
+
+    def __init__(self, limiter: "AdaptiveLimiter"):
+        self._limiter = limiter
+        self._released = False
+
+    def release(self) -> None:
+        if not self._released:
+            self._released = True
+            self._limiter._release()
+
+
+class AdaptiveLimiter:
+    """
+    Process-wide admission control for one provider endpoint family.
+
+    A call is admitted when a concurrency slot is free and both token
+    buckets (requests/min and tokens/min) can cover it; waiting calls are
+    served strictly by priority class, FIFO within a class. The concurrency
+    limit adapts AIMD-style: it starts at `initial_concurrency` and doubles
+    after every `limit` successes until the first 429 (slow start), then
+    grows by one per `limit` successes up to `max_concurrency`; every 429
+    halves it (once per cooldown window) and pauses admissions for the
+    Retry-After delay. Works for threads (sync clients, ingest workers) and
+    coroutines alike.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        rpm: float = 0,
+        tpm: float = 0,
+        max_concurrency: int = 32,
+        min_concurrency: int = 1,
+        initial_concurrency: int = 4,
+        completion_tokens: int = 0,
+    ):
+        self.name = name
+        self.max_concurrency = max(1, max_concurrency)
+        self.min_concurrency = max(1, min(min_concurrency, self.max_concurrency))
+        self.completion_tokens = completion_tokens
+        self._requests = TokenBucket(rpm)
+        self._tokens = TokenBucket(tpm)
+        self._cond = threading.Condition()
+        self._queue: List[_Ticket] = []
+        self._seq = itertools.count()
+
+        self.limit = max(self.min_concurrency, min(initial_concurrency, self.max_concurrency))
+        self._slow_start = True
+        self.in_flight = 0
+        self._successes = 0
+        self._cooldown_until = 0.0
+        self._backoff = 1.0
+
+        self.admitted = 0
+        self.rate_limited = 0
+        self._waited: Dict[str, List[float]] = {p: [0, 0.0] for p in PRIORITIES}
+
+    # ---------- admission ----------
+
+    def _grant(self, caller: Optional[_Ticket] = None) -> Optional[float]:
+        """
+        Admit queued tickets in priority order while capacity allows.
+        Returns the seconds until the head ticket could be admitted if a
+        bucket or a cooldown blocks it (None if only concurrency does). The
+        blocked head's waiter (unless it is the caller's own `ticket`) is
+        woken to sleep out that delay itself, since no release may come to
+        re-check. Caller holds the lock.
+        """
+        woke_sync = False
+        try:
+            while self._queue:
+                head = self._queue[0]
+                if head.cancelled:
+                    heapq.heappop(self._queue)
+                    continue
+                if self.in_flight >= self.limit:
+                    return None
+                now = time.monotonic()
+                wait = max(
+                    self._cooldown_until - now,
+                    self._requests.wait(1, now),
+                    self._tokens.wait(head.tokens, now),
+                )
+                if wait > 0:
+                    if head is not caller:
+                        woke_sync = self._wake(head) or woke_sync
+                    return wait
+                heapq.heappop(self._queue)
+                self._requests.take(1)
+                self._tokens.take(head.tokens)
+                self.in_flight += 1
+                self.admitted += 1
+                head.granted = True
+
+                waited = now - head.enqueued
+                stats = self._waited[head.priority]
+                stats[0] += 1
+                stats[1] += waited
+                LIMITER_WAIT_SECONDS.observe(waited, limiter=self.name, priority=head.priority)
+                woke_sync = self._wake(head) or woke_sync
+            return None
+        finally:
+            if woke_sync:
+                self._cond.notify_all()
+
+    @staticmethod
+    def _wake(ticket: _Ticket) -> bool:
+        """
+        Wake an async waiter directly; returns True for a sync one (the
+        caller notifies the condition once).
+        """
+        if ticket.loop is None:
+            return True
+        ticket.loop.call_soon_threadsafe(ticket.event.set)
+        return False
+
+    def _enqueue(self, tokens: float, priority: Optional[str]) -> _Ticket:
+        priority = priority or priority_var.get()
+        ticket = _Ticket(PRIORITIES.get(priority, 0), next(self._seq), priority, tokens)
+        heapq.heappush(self._queue, ticket)
+        return ticket
+
+    def acquire(self, tokens: float = 0, priority: Optional[str] = None) -> Permit:
+        """
+        Block the calling thread until the call may start.
+        """
+        with self._cond:
+            ticket = self._enqueue(tokens, priority)
+            while True:
+                hint = self._grant(ticket)
+                if ticket.granted:
+                    return Permit(self)
+                self._cond.wait(timeout=hint)
+
+    async def aacquire(self, tokens: float = 0, priority: Optional[str] = None) -> Permit:
+        """
+        Wait (without blocking the event loop) until the call may start.
+        Cancelling the waiter withdraws it from the queue.
+        """
+        with self._cond:
+            ticket = self._enqueue(tokens, priority)
+            ticket.loop = asyncio.get_running_loop()
+            ticket.event = asyncio.Event()
+        try:
+            while True:
+                with self._cond:
+                    hint = self._grant(ticket)
+                    if ticket.granted:
+                        return Permit(self)
+                try:
+                    await asyncio.wait_for(ticket.event.wait(), timeout=hint)
+                except asyncio.TimeoutError:
+                    pass
+                if not ticket.granted:
+                    ticket.event.clear()
+        except BaseException:
+            with self._cond:
+                ticket.cancelled = True
+                granted = ticket.granted
+            if granted:
+                self._release()
+            raise
+
+    def _release(self) -> None:
+        with self._cond:
+            self.in_flight -= 1
+            self._grant()
+            self._cond.notify_all()
+
+    # ---------- feedback ----------
+
+    def observe(self, status_code: int, retry_after: Optional[float] = None) -> None:
+        """
+        Adapt to a provider response: back off on 429, probe upwards on success.
+        """
+        with self._cond:
+            now = time.monotonic()
+            if status_code == 429:
+                self.rate_limited += 1
+                LIMITER_RATE_LIMITED.inc(limiter=self.name)
+                self._slow_start = False
+                if now >= self._cooldown_until:
+                    # one decrease per window: a burst of 429s is one congestion signal
+                    self.limit = max(self.min_concurrency, self.limit // 2)
+                    self._backoff = min(self._backoff * 2, 30.0) if self._cooldown_until else 1.0
+                self._cooldown_until = max(self._cooldown_until, now + (retry_after or self._backoff))
+                self._requests.drain()
+                self._successes = 0
+            elif status_code < 400:
+                self._successes += 1
+                if self._successes >= self.limit:
+                    self._successes = 0
+                    if self.limit < self.max_concurrency:
+                        self.limit = min(self.max_concurrency, self.limit * 2 if self._slow_start else self.limit + 1)
+                        self._grant()
+                if now >= self._cooldown_until:
+                    self._backoff = 1.0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            queued: Dict[str, int] = {p: 0 for p in PRIORITIES}
+            for ticket in self._queue:
+                if not ticket.cancelled:
+                    queued[ticket.priority] = queued.get(ticket.priority, 0) + 1
+            return {
+                "limit": self.limit,
+                "slow_start": self._slow_start,
+                "max_concurrency": self.max_concurrency,
+                "in_flight": self.in_flight,
+                "queued": queued,
+                "admitted": self.admitted,
+                "rate_limited": self.rate_limited,
+                "cooldown_s": round(max(0.0, self._cooldown_until - time.monotonic()), 3),
+                "mean_wait_ms": {
+                    p: round(total / count * 1000, 2) if count else 0.0
+                    for p, (count, total) in self._waited.items()
+                },
+                "rpm": self._requests.per_minute,
+                "tpm": self._tokens.per_minute,
+            }
+
+
+# ---------- httpx transports ----------
+
+def _retry_after(response: httpx.Response) -> Optional[float]:
+    for header in ("retry-after-ms", "retry-after"):
+        value = response.headers.get(header)
+        if value:
+            try:
+                seconds = float(value)
+            except ValueError:
+                continue
+            return seconds / 1000 if header == "retry-after-ms" else seconds
+    return None
+
+
+def _request_tokens(limiter: AdaptiveLimiter, request: httpx.Request) -> float:
+    # ~4 bytes of JSON per token, plus the completion the call may generate
+    try:
+        size = len(request.content)
+    except httpx.RequestNotRead:
+        size = 0
+    return size / 4 + limiter.completion_tokens
+
+
+class _ReleasingStream(httpx.SyncByteStream):
+    def __init__(self, stream, permit: Permit):
+        self._stream = stream
+        self._permit = permit
+
+    def __iter__(self):
+        yield from self._stream
+
+    def close(self) -> None:
+        try:
+            self._stream.close()
+        finally:
+            self._permit.release()
+
+
+class _AsyncReleasingStream(httpx.AsyncByteStream):
+    def __init__(self, stream, permit: Permit):
+        self._stream = stream
+        self._permit = permit
+
+    async def __aiter__(self):
+        async for chunk in self._stream:
+            yield chunk
+
+    async def aclose(self) -> None:
+        try:
+            await self._stream.aclose()
+        finally:
+            self._permit.release()
+
+
+class LimitedTransport(httpx.BaseTransport):
+    """
+    httpx transport that admits every request through `limiter` and holds
+    the slot until the response body is closed (streamed completions
+    included). A 429 is fed back to the limiter and the request re-queued
+    (up to `retries` times), so it waits out the cooldown at its own
+    priority instead of surfacing to the OpenAI client's blind backoff.
+    """
+
+    def __init__(self, limiter: AdaptiveLimiter, inner: httpx.BaseTransport, retries: int = 3):
+        self.limiter = limiter
+        self.inner = inner
+        self.retries = retries
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        tokens = _request_tokens(self.limiter, request)
+        for attempt in range(self.retries + 1):
+            permit = self.limiter.acquire(tokens)
+            try:
+                response = self.inner.handle_request(request)
+                self.limiter.observe(response.status_code, _retry_after(response))
+                if response.status_code == 429 and attempt < self.retries:
+                    response.read()
+                    response.close()
+                    permit.release()
+                    continue
+            except BaseException:
+                permit.release()
+                raise
+            response.stream = _ReleasingStream(response.stream, permit)
+            return response
+
+    def close(self) -> None:
+        self.inner.close()
+
+
+class AsyncLimitedTransport(httpx.AsyncBaseTransport):
+    """
+    Async counterpart of LimitedTransport.
+    """
+
+    def __init__(self, limiter: AdaptiveLimiter, inner: httpx.AsyncBaseTransport, retries: int = 3):
+        self.limiter = limiter
+        self.inner = inner
+        self.retries = retries
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        tokens = _request_tokens(self.limiter, request)
+        for attempt in range(self.retries + 1):
+            permit = await self.limiter.aacquire(tokens)
+            try:
+                response = await self.inner.handle_async_request(request)
+                self.limiter.observe(response.status_code, _retry_after(response))
+                if response.status_code == 429 and attempt < self.retries:
+                    await response.aread()
+                    await response.aclose()
+                    permit.release()
+                    continue
+            except BaseException:
+                permit.release()
+                raise
+            response.stream = _AsyncReleasingStream(response.stream, permit)
+            return response
+
+    async def aclose(self) -> None:
+        await self.inner.aclose()
+
+
+def limited_clients(limiter: AdaptiveLimiter, limits: httpx.Limits, timeout: float):
+    """
+    (sync, async) httpx clients whose every request goes through `limiter`.
+    """
+    return (
+        httpx.Client(transport=LimitedTransport(limiter, httpx.HTTPTransport(limits=limits)), timeout=timeout),
+        httpx.AsyncClient(
+            transport=AsyncLimitedTransport(limiter, httpx.AsyncHTTPTransport(limits=limits)), timeout=timeout
+        ),
+    )
+
+
+_limiters: Dict[str, AdaptiveLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_limiter(kind: str) -> AdaptiveLimiter:
+    """
+    Shared limiter for "chat" (LLM_RPM / LLM_TPM / LLM_MAX_CONCURRENCY) or
+    "embeddings" (EMBEDDING_RPM / EMBEDDING_TPM / EMBEDDING_MAX_CONCURRENCY).
+    """
+    with _limiters_lock:
+        limiter = _limiters.get(kind)
+        if limiter is None:
+            if kind == "chat":
+                limiter = AdaptiveLimiter(
+                    "chat",
+                    rpm=settings.LLM_RPM,
+                    tpm=settings.LLM_TPM,
+                    max_concurrency=settings.LLM_MAX_CONCURRENCY,
+                    completion_tokens=settings.LLM_COMPLETION_ESTIMATE,
+                )
+            elif kind == "embeddings":
+                limiter = AdaptiveLimiter(
+                    "embeddings",
+                    rpm=settings.EMBEDDING_RPM,
+                    tpm=settings.EMBEDDING_TPM,
+                    max_concurrency=settings.EMBEDDING_MAX_CONCURRENCY,
+                )
+            else:
+                raise ValueError(f"Unknown limiter '{kind}', expected chat or embeddings")
+            _limiters[kind] = limiter
+    return limiter
@@ -1,6 +1,20 @@
 import logging
 from typing import Optional
 
+from .metrics import request_id_var
+
+
+class RequestIdFilter(logging.Filter):
+    """
+    Stamp every record with the id of the HTTP request being served ("-"
+    outside a request), so log lines from agents, retrieval and LLM calls
+    can be correlated.
+    """
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id_var.get()
+        return True
+
 
 def setup_logging(level: int = logging.INFO) -> None:
     """
@@ -9,12 +23,15 @@ def setup_logging(level: int = logging.INFO) -> None:
     """
     logging.basicConfig(
         level=level,
-        format="%(asctime)s | %(levelname)s | %(name)s | %(message)s",
+        format="%(asctime)s | %(levelname)s | %(request_id)s | %(name)s | %(message)s",
     )
+    for handler in logging.getLogger().handlers:
+        if not any(isinstance(f, RequestIdFilter) for f in handler.filters):
+            handler.addFilter(RequestIdFilter())
 
 
 def get_logger(name: Optional[str] = None) -> logging.Logger:
     """
     Return a logger with the given name.
     """
-    return logging.getLogger(name or __name__)
\ No newline at end of file
+    return logging.getLogger(name or __name__)
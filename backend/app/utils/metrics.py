@@ -0,0 +1,239 @@
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+# correlates log lines and spans with the HTTP request that caused them
+request_id_var: ContextVar[str] = ContextVar("request_id", default="-")
+
+LabelValues = Tuple[str, ...]
+Sample = Tuple[Dict[str, str], float]
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items()) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        return tuple(str(labels.get(n, "")) for n in self.labelnames)
+
+    def _labels(self, key: LabelValues) -> Dict[str, str]:
+        return dict(zip(self.labelnames, key))
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._render_samples())
+        return lines
+
+    def _render_samples(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def _render_samples(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_format_labels(self._labels(k))} {_format_value(v)}" for k, v in items]
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[LabelValues, float] = {}
+
+    def set(self, value: float, **labels) -> None:
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels) -> None:
+        self.inc(-amount, **labels)
+
+    def _render_samples(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_format_labels(self._labels(k))} {_format_value(v)}" for k, v in items]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # per label set: [count per bucket (non-cumulative) + overflow, sum]
+        self._values: Dict[LabelValues, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        slot = bisect_left(self.buckets, value)
+        with self._lock:
+            counts, total = self._values.setdefault(key, ([0] * (len(self.buckets) + 1), [0.0]))
+            counts[slot] += 1
+            total[0] += value
+
+    @contextmanager
+    def time(self, **labels):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - t0, **labels)
+
+    def _render_samples(self) -> List[str]:
+        with self._lock:
+            items = [(k, list(c), t[0]) for k, (c, t) in self._values.items()]
+        lines = []
+        for key, counts, total in items:
+            labels = self._labels(key)
+            running = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                running += count
+                le = dict(labels, le=_format_value(bound))
+                lines.append(f"{self.name}_bucket{_format_labels(le)} {running}")
+            lines.append(f"{self.name}_sum{_format_labels(labels)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(labels)} {running}")
+        return lines
+
+
+Collector = Callable[[], Iterable[Tuple[str, str, str, List[Sample]]]]
+
+
+class Registry:
+    """
+    Minimal in-process metrics registry rendered in the Prometheus text
+    exposition format. Collectors are called at scrape time for values that
+    already live elsewhere (cache statistics), so the hot path never
+    touches them.
+    """
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: List[Collector] = []
+        self._lock = threading.Lock()
+
+    def _register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, help, labelnames))
+
+    def gauge(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, help, labelnames))
+
+    def histogram(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, help, labelnames, buckets))
+
+    def add_collector(self, collector: Collector) -> None:
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in list(self._metrics.values()):
+            lines.extend(metric.render())
+        for collector in self._collectors:
+            try:
+                families = list(collector())
+            except Exception as exc:  # a broken collector must not break the scrape
+                print(f"[WARN] Metrics collector failed: {exc}")
+                continue
+            for name, kind, help, samples in families:
+                lines.append(f"# HELP {name} {help}")
+                lines.append(f"# TYPE {name} {kind}")
+                lines.extend(f"{name}{_format_labels(labels)} {_format_value(value)}" for labels, value in samples)
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+HTTP_REQUESTS_IN_FLIGHT = REGISTRY.gauge(
+    "streamintel_http_requests_in_flight", "HTTP requests currently being served."
+)
+HTTP_REQUEST_SECONDS = REGISTRY.histogram(
+    "streamintel_http_request_seconds",
+    "HTTP latency up to the response headers (time to first byte for streams).",
+    ["method", "path", "status"],
+)
+NODE_SECONDS = REGISTRY.histogram(
+    "streamintel_graph_node_seconds", "Agent graph node latency.", ["node", "outcome"]
+)
+LLM_SECONDS = REGISTRY.histogram(
+    "streamintel_llm_call_seconds", "Chat model call latency.", ["model", "outcome"]
+)
+LLM_TOKENS = REGISTRY.counter(
+    "streamintel_llm_tokens_total", "Tokens consumed by chat model calls.", ["model", "kind"]
+)
+EMBEDDING_SECONDS = REGISTRY.histogram(
+    "streamintel_embedding_call_seconds", "Embedding provider call latency (cache misses only).", ["op"]
+)
+EMBEDDING_TEXTS = REGISTRY.counter(
+    "streamintel_embedding_texts_total", "Texts sent to the embedding provider.", ["op"]
+)
+VECTOR_SEARCH_SECONDS = REGISTRY.histogram(
+    "streamintel_vector_search_seconds", "Catalog search latency, embedding included.", ["mode"]
+)
+SINGLEFLIGHT_REQUESTS = REGISTRY.counter(
+    "streamintel_singleflight_requests_total",
+    "Graph runs started (leader) and requests that joined an identical run in flight (coalesced).",
+    ["role"],
+)
+CONTEXT_TOKENS = REGISTRY.counter(
+    "streamintel_context_tokens_total",
+    "Prompt context tokens per agent after packing (packed) and removed by packing (saved).",
+    ["agent", "kind"],
+)
+LIMITER_WAIT_SECONDS = REGISTRY.histogram(
+    "streamintel_limiter_wait_seconds",
+    "Time provider calls waited for admission by the rate limiter.",
+    ["limiter", "priority"],
+)
+LIMITER_RATE_LIMITED = REGISTRY.counter(
+    "streamintel_limiter_rate_limited_total", "Provider responses with HTTP 429.", ["limiter"]
+)
+
+
+def render_metrics() -> str:
+    return REGISTRY.render()
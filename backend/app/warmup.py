@@ -0,0 +1,102 @@
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .agents.context import get_encoding
+from .agents.memo import get_node_memo
+from .agents.response_cache import get_response_cache
+from .agents.runtime import init_runtime
+from .agents.sentiment import load_sentiment_model
+from .agents.sessions import get_session_store
+from .rag.retriever import warm_index
+from .rag.vectorstore import get_embeddings
+
+
+def _warm_runtime() -> None:
+    init_runtime().warm()
+
+
+def _warm_caches() -> None:
+    get_response_cache()
+    get_node_memo()
+    get_session_store()
+
+
+# (name, step, required): a failed required step keeps the process unready
+STEPS: List[Tuple[str, Callable[[], Any], bool]] = [
+    ("runtime", _warm_runtime, True),
+    ("embeddings", get_embeddings, True),
+    ("index", warm_index, True),
+    ("caches", _warm_caches, False),
+    ("tokenizer", get_encoding, False),
+    ("sentiment", load_sentiment_model, False),
+]
+
+
+class Warmup:
+    """
+    Pays the first-request costs at startup: the heavy imports behind the
+    graph and the OpenAI clients, graph compilation, the pooled LLM and
+    embedding clients, the vector index with its side indexes, and the
+    sentiment pipeline. Steps run in order on one thread; /readyz reports
+    ready once every required step has succeeded.
+    """
+
+    def __init__(self, steps: Optional[List[Tuple[str, Callable[[], Any], bool]]] = None):
+        self.steps = steps if steps is not None else STEPS
+        self.status = "pending"  # pending | running | ready | failed | skipped
+        self.timings: Dict[str, float] = {}
+        self.errors: Dict[str, str] = {}
+        self.index: Dict[str, Any] = {}
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    @property
+    def ready(self) -> bool:
+        return self.status in ("ready", "skipped")
+
+    def skip(self) -> None:
+        self.status = "skipped"
+
+    def run(self) -> None:
+        with self._lock:
+            if self.status == "running":
+                return
+            self.status = "running"
+            self.timings, self.errors = {}, {}
+        self.started_at = time.time()
+        t_start = time.perf_counter()
+
+        status = "ready"
+        for name, step, required in self.steps:
+            t0 = time.perf_counter()
+            try:
+                result = step()
+            except Exception as exc:
+                self.errors[name] = f"{type(exc).__name__}: {exc}"
+                if required:
+                    print(f"[ERROR] Warmup step '{name}' failed: {exc}")
+                    status = "failed"
+                    break
+                print(f"[WARN] Warmup step '{name}' failed: {exc}")
+            else:
+                if name == "index":
+                    self.index = result
+            finally:
+                self.timings[name] = round(time.perf_counter() - t0, 4)
+
+        self.timings["total"] = round(time.perf_counter() - t_start, 4)
+        self.finished_at = time.time()
+        self.status = status
+        print(f"[INFO] Warmup {status} in {self.timings['total']:.2f}s {self.timings}")
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "status": self.status,
+            "timings_s": dict(self.timings),
+            "errors": dict(self.errors),
+            "index": dict(self.index),
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
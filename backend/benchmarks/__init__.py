@@ -0,0 +1,7 @@
+"""
+Offline benchmarks and load tests for the StreamIntel360 backend.
+
+Run from the backend/ directory, e.g.:
+
+    python -m benchmarks.load_test --requests 20
+"""
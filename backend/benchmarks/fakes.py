@@ -0,0 +1,121 @@
+"""
+Deterministic local stand-ins for the OpenAI backends (embeddings and chat)
+used by the benchmarks.
+"""
+import asyncio
+import re
+import time
+import zlib
+from typing import List
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+
+class HashingEmbeddings(Embeddings):
+    """
+    Bag-of-words feature hashing into `size` dimensions, L2-normalized.
+
+    Deterministic and free, and texts sharing words land close together, so
+    retrieval benchmarks still return sensible neighbours. `latency` seconds
+    are slept per call to mimic a network round-trip.
+    """
+
+    def __init__(self, size: int = 256, latency: float = 0.0):
+        self.size = size
+        self.latency = latency
+        self.calls = 0
+
+    def _embed(self, text: str) -> List[float]:
+        buckets = [zlib.crc32(tok.encode("utf-8")) % self.size for tok in _TOKEN.findall(text.lower())]
+        vec = np.bincount(buckets, minlength=self.size).astype(np.float32)
+        norm = np.linalg.norm(vec)
+        if norm:
+            vec /= norm
+        return vec.tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        return [self._embed(t) for t in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        self.calls += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return [self._embed(t) for t in texts]
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return (await self.aembed_documents([text]))[0]
+
+
+def install_fake_embeddings(size: int = 256, latency: float = 0.0) -> HashingEmbeddings:
+    """
+    Route every get_embeddings() caller (retrieval and ingest) through
+    HashingEmbeddings, behind an in-memory-only embedding cache.
+    """
+    from app.rag import vectorstore
+    from app.rag.embedding_cache import CachedEmbeddings, EmbeddingCache
+
+    fake = HashingEmbeddings(size=size, latency=latency)
+    vectorstore._embeddings = CachedEmbeddings(fake, model_name="fake-hashing", cache=EmbeddingCache(None))
+    return fake
+
+
+class FakeLLMStats:
+    def __init__(self):
+        self.calls = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+
+
+def install_fake_llm(latency: float = 0.2, jitter: float = 0.0, seed: int = 0) -> FakeLLMStats:
+    """
+    Replace ChatOpenAI.invoke / ainvoke with a local stand-in that sleeps
+    `latency` (+- uniform `jitter`) seconds and returns a deterministic
+    executive-summary-shaped answer derived from the prompt.
+    """
+    import random
+
+    from langchain_core.messages import AIMessage
+    from langchain_openai import ChatOpenAI
+
+    stats = FakeLLMStats()
+    rng = random.Random(seed)
+
+    def _delay() -> float:
+        return max(0.0, latency + (rng.uniform(-jitter, jitter) if jitter else 0.0))
+
+    def _answer(messages) -> AIMessage:
+        digest = zlib.crc32(str(messages).encode("utf-8"))
+        verdict = ("Go", "Pilot", "No-Go")[digest % 3]
+        return AIMessage(content=(
+            f"Overview: stub analysis #{digest:08x}.\n\n"
+            "Why this could work:\n- stub\n\nKey risks:\n- stub\n\n"
+            f"Recommendation:\nRecommended: {verdict}"
+        ))
+
+    def fake_invoke(self, messages, *args, **kwargs):
+        stats.calls += 1
+        time.sleep(_delay())
+        return _answer(messages)
+
+    async def fake_ainvoke(self, messages, *args, **kwargs):
+        stats.calls += 1
+        stats.in_flight += 1
+        stats.peak_in_flight = max(stats.peak_in_flight, stats.in_flight)
+        try:
+            await asyncio.sleep(_delay())
+        finally:
+            stats.in_flight -= 1
+        return _answer(messages)
+
+    ChatOpenAI.invoke = fake_invoke
+    ChatOpenAI.ainvoke = fake_ainvoke
+    return stats
@@ -0,0 +1,83 @@
+"""
+Ingest throughput benchmark: rows/sec for each stage of run_ingest.
+
+Runs the streaming pipeline against data/raw/netflix_titles.csv (optionally
+replicated --scale times with fresh show_ids) into a throwaway Chroma
+directory, using offline hashing embeddings with a simulated per-batch
+latency. Peak RSS is reported so flat memory can be checked as --scale
+grows.
+
+    python -m benchmarks.ingest_throughput --scale 4 --embed-latency 0.2
+"""
+import argparse
+import os
+import tempfile
+import resource
+from pathlib import Path
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-offline-benchmark")
+
+import pandas as pd
+
+from benchmarks.fakes import install_fake_embeddings
+
+REPO_DATA = Path(__file__).resolve().parents[2] / "data"
+
+
+def _prepare_data(tmp: Path, scale: int) -> Path:
+    raw = tmp / "raw"
+    raw.mkdir(parents=True)
+    src = REPO_DATA / "raw" / "netflix_titles.csv"
+    if scale == 1:
+        (raw / "netflix_titles.csv").write_bytes(src.read_bytes())
+        return tmp
+    first = True
+    for i in range(scale):
+        for chunk in pd.read_csv(src, encoding="latin-1", dtype=str, chunksize=5000):
+            chunk["show_id"] = chunk["show_id"] + f"_x{i}"
+            chunk.to_csv(raw / "netflix_titles.csv", mode="w" if first else "a", header=first, index=False)
+            first = False
+    return tmp
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ingest throughput benchmark.")
+    parser.add_argument("--scale", type=int, default=1, help="replicate the catalog N times")
+    parser.add_argument("--chunk-size", type=int, default=2000)
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--embed-latency", type=float, default=0.1,
+                        help="simulated seconds per embedding batch call")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        tmp = _prepare_data(Path(tmpdir), args.scale)
+        os.environ["DATA_ROOT"] = str(tmp)
+        os.environ["CHROMA_DIR"] = str(tmp / "chroma")
+        install_fake_embeddings(latency=args.embed_latency)
+
+        from app.rag.ingest import run_ingest
+
+        summary = run_ingest(
+            incremental=False,
+            chunk_size=args.chunk_size,
+            batch_size=args.batch_size,
+            concurrency=args.concurrency,
+        )
+        peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    rows = summary["rows"]
+    timings = summary["timings"]
+    print("\n=== Ingest throughput ===")
+    print(f"Rows             : {rows}")
+    for stage in ("read", "render", "diff", "embed", "write"):
+        secs = timings[stage]
+        rate = rows / secs if secs else float("inf")
+        print(f"{stage:<16} : {secs:8.2f}s  {rate:12,.0f} rows/s")
+    # embed time is summed over the worker threads, so it can exceed wall time
+    print(f"{'end-to-end':<16} : {timings['total']:8.2f}s  {rows / timings['total']:12,.0f} rows/s")
+    print(f"Peak RSS         : {peak_kb / 1024:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
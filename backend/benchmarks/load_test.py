@@ -0,0 +1,151 @@
+"""
+Concurrency load test for /api/chat.
+
+ChatOpenAI, the embeddings and the vector store are replaced by in-process
+fakes (the LLM and search sleep for a fixed latency), so the test measures
+only how the backend schedules work. With async agents, N concurrent requests should finish in
+roughly the latency of one request; with --blocking (time.sleep inside the
+LLM call, i.e. the old sync behaviour) they queue up behind each other.
+
+    python -m benchmarks.load_test --requests 20 --llm-latency 0.2
+    python -m benchmarks.load_test --requests 20 --llm-latency 0.2 --blocking
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-offline-benchmark")
+# measure scheduling of real graph runs; the caches would otherwise absorb repeats
+os.environ["RESPONSE_CACHE_THRESHOLD"] = "2"
+os.environ["NODE_MEMO_BACKEND"] = "off"
+
+import httpx
+from langchain_core.documents import Document
+from langchain_core.messages import AIMessage
+from langchain_openai import ChatOpenAI
+
+from app.main import app
+from app.rag import retriever
+from benchmarks.fakes import install_fake_embeddings
+
+
+class _InFlight:
+    def __init__(self):
+        self.current = 0
+        self.peak = 0
+
+    def enter(self):
+        self.current += 1
+        self.peak = max(self.peak, self.current)
+
+    def exit(self):
+        self.current -= 1
+
+
+class FakeVectorStore:
+    def __init__(self, latency: float):
+        self.latency = latency
+
+    def _docs(self, k: int):
+        return [
+            Document(
+                page_content=f"Title: Fake Title {i} | Type: Movie | Description: stub",
+                metadata={"title": f"Fake Title {i}", "show_id": f"s{i}"},
+            )
+            for i in range(k)
+        ]
+
+    def similarity_search(self, query: str, k: int = 4, **kwargs):
+        time.sleep(self.latency)
+        return self._docs(k)
+
+    async def asimilarity_search(self, query: str, k: int = 4, **kwargs):
+        await asyncio.sleep(self.latency)
+        return self._docs(k)
+
+
+def install_fakes(llm_latency: float, search_latency: float, blocking: bool) -> _InFlight:
+    in_flight = _InFlight()
+
+    def fake_invoke(self, messages, *args, **kwargs):
+        in_flight.enter()
+        try:
+            time.sleep(llm_latency)
+        finally:
+            in_flight.exit()
+        return AIMessage(content="Recommended: Pilot")
+
+    async def fake_ainvoke(self, messages, *args, **kwargs):
+        if blocking:
+            return fake_invoke(self, messages)
+        in_flight.enter()
+        try:
+            await asyncio.sleep(llm_latency)
+        finally:
+            in_flight.exit()
+        return AIMessage(content="Recommended: Pilot")
+
+    ChatOpenAI.invoke = fake_invoke
+    ChatOpenAI.ainvoke = fake_ainvoke
+    # nothing in the request path may reach the OpenAI embeddings endpoint
+    install_fake_embeddings()
+    retriever._vectordb = FakeVectorStore(search_latency)
+    return in_flight
+
+
+async def run_load(n_requests: int) -> dict:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        latencies = []
+
+        async def one(i: int):
+            t0 = time.perf_counter()
+            resp = await client.post("/api/chat", json={"message": f"concept {i}"})
+            resp.raise_for_status()
+            latencies.append(time.perf_counter() - t0)
+
+        t0 = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(n_requests)))
+        wall = time.perf_counter() - t0
+
+    latencies.sort()
+    return {
+        "requests": n_requests,
+        "wall_s": wall,
+        "p50_s": latencies[len(latencies) // 2],
+        "max_s": latencies[-1],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--llm-latency", type=float, default=0.2)
+    parser.add_argument("--search-latency", type=float, default=0.05)
+    parser.add_argument("--blocking", action="store_true",
+                        help="simulate sync LLM calls that block the event loop")
+    args = parser.parse_args()
+
+    in_flight = install_fakes(args.llm_latency, args.search_latency, args.blocking)
+    stats = asyncio.run(run_load(args.requests))
+
+    serial_s = args.requests * 4 * args.llm_latency
+    print("=== Load test: /api/chat ===")
+    print(f"Requests          : {stats['requests']}")
+    print(f"Wall time         : {stats['wall_s']:.2f}s (fully serial would be ~{serial_s:.2f}s)")
+    print(f"Latency p50 / max : {stats['p50_s']:.2f}s / {stats['max_s']:.2f}s")
+    print(f"Peak LLM calls in flight: {in_flight.peak}")
+    if in_flight.peak > 1:
+        print("[INFO] Requests overlapped.")
+    elif args.blocking:
+        print("[WARN] Requests were serialized.")
+    else:
+        # async agents must overlap; a serialized run means something blocks the loop
+        print("[FAIL] Requests were serialized.")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
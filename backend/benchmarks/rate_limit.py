@@ -0,0 +1,297 @@
+"""
+Rate-limit behaviour against a local fake OpenAI server that returns 429s.
+
+The fake server (stdlib ThreadingHTTPServer on 127.0.0.1) serves
+/v1/chat/completions and /v1/embeddings with a fixed latency and enforces
+its own quota per endpoint: at most --server-rps requests per second and
+--server-concurrency requests at once. Anything over quota gets a 429 with
+a retry-after-ms header, like the real API.
+
+Real ChatOpenAI / OpenAIEmbeddings clients (with the OpenAI SDK's own
+retries) are pointed at it, once through plain httpx clients and once
+through the limited transports of app.utils.limiter, and driven with a
+mixed burst:
+
+- interactive chat calls (the default priority),
+- batch chat calls (request_priority("batch")),
+- ingest embedding batches from worker threads (request_priority("ingest"),
+  exercising the sync transport).
+
+Reported per mode: 429s served, calls that still failed after the SDK's
+retries, latency percentiles per priority, and the limiter's queue waits
+and final concurrency limit. The script exits non-zero when the limited
+run loses any call or does not serve interactive calls ahead of batch.
+
+    python -m benchmarks.rate_limit --interactive 40 --batch 80 --ingest 20
+"""
+import argparse
+import asyncio
+import base64
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-offline-benchmark")
+
+import httpx
+import numpy as np
+from langchain_openai import ChatOpenAI, OpenAIEmbeddings
+
+from app.utils.limiter import AdaptiveLimiter, limited_clients, request_priority
+
+
+class _Quota:
+    """
+    Server-side quota of one endpoint: a sliding one-second request window
+    plus a cap on concurrent requests.
+    """
+
+    def __init__(self, rps: int, concurrency: int):
+        self.rps = rps
+        self.concurrency = concurrency
+        self.lock = threading.Lock()
+        self.stamps = []
+        self.active = 0
+        self.served = 0
+        self.rejected = 0
+
+    def enter(self, latency: float) -> float:
+        """
+        0 when the request is admitted, else the Retry-After delay (s): until
+        the oldest request leaves the window, or about one call's latency
+        when only the concurrency cap is hit.
+        """
+        now = time.monotonic()
+        with self.lock:
+            self.stamps = [t for t in self.stamps if now - t < 1.0]
+            if len(self.stamps) >= self.rps:
+                self.rejected += 1
+                return 1.0 - (now - self.stamps[0])
+            if self.active >= self.concurrency:
+                self.rejected += 1
+                return latency
+            self.stamps.append(now)
+            self.active += 1
+            self.served += 1
+            return 0.0
+
+    def exit(self) -> None:
+        with self.lock:
+            self.active -= 1
+
+    def reset(self) -> None:
+        with self.lock:
+            self.stamps, self.active, self.served, self.rejected = [], 0, 0, 0
+
+
+def _make_handler(quotas, latency: float, dim: int):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def _send(self, status: int, body: dict, headers=None) -> None:
+            raw = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(raw)))
+            for key, value in (headers or {}).items():
+                self.send_header(key, value)
+            self.end_headers()
+            self.wfile.write(raw)
+
+        def do_POST(self):
+            payload = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            endpoint = "embeddings" if self.path.endswith("/embeddings") else "chat"
+            quota = quotas[endpoint]
+            retry_after = quota.enter(latency)
+            if retry_after:
+                self._send(429, {"error": {"message": "Rate limit reached", "type": "requests",
+                                           "code": "rate_limit_exceeded"}},
+                           {"retry-after-ms": str(int(retry_after * 1000) + 1)})
+                return
+            try:
+                time.sleep(latency)
+                if endpoint == "chat":
+                    self._send(200, {
+                        "id": "chatcmpl-fake", "object": "chat.completion", "created": int(time.time()),
+                        "model": payload.get("model", "fake"),
+                        "choices": [{"index": 0, "finish_reason": "stop",
+                                     "message": {"role": "assistant", "content": "Recommendation: greenlight."}}],
+                        "usage": {"prompt_tokens": 50, "completion_tokens": 5, "total_tokens": 55},
+                    })
+                else:
+                    texts = payload["input"] if isinstance(payload["input"], list) else [payload["input"]]
+                    vector = np.full(dim, 1.0 / np.sqrt(dim), dtype=np.float32)
+                    if payload.get("encoding_format") == "base64":
+                        embedding = base64.b64encode(vector.tobytes()).decode("ascii")
+                    else:
+                        embedding = vector.tolist()
+                    self._send(200, {
+                        "object": "list", "model": payload.get("model", "fake"),
+                        "data": [{"object": "embedding", "index": i, "embedding": embedding}
+                                 for i in range(len(texts))],
+                        "usage": {"prompt_tokens": 10 * len(texts), "total_tokens": 10 * len(texts)},
+                    })
+            finally:
+                quota.exit()
+
+    return Handler
+
+
+def _percentile(values, q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+async def run_mode(args, base_url: str, quotas, limited: bool) -> dict:
+    limits = httpx.Limits(max_connections=200, max_keepalive_connections=200)
+    chat_limiter = embed_limiter = None
+    if limited:
+        chat_limiter = AdaptiveLimiter("chat", max_concurrency=args.max_concurrency, completion_tokens=50)
+        embed_limiter = AdaptiveLimiter("embeddings", max_concurrency=args.max_concurrency)
+        chat_sync, chat_async = limited_clients(chat_limiter, limits, 60)
+        embed_sync, embed_async = limited_clients(embed_limiter, limits, 60)
+    else:
+        chat_sync, chat_async = httpx.Client(limits=limits, timeout=60), httpx.AsyncClient(limits=limits, timeout=60)
+        embed_sync, embed_async = httpx.Client(limits=limits, timeout=60), httpx.AsyncClient(limits=limits, timeout=60)
+
+    llm = ChatOpenAI(
+        model="gpt-4.1-mini", base_url=base_url, max_retries=args.sdk_retries,
+        http_client=chat_sync, http_async_client=chat_async,
+    )
+    embeddings = OpenAIEmbeddings(
+        model="text-embedding-3-small", base_url=base_url, max_retries=args.sdk_retries,
+        check_embedding_ctx_length=False, http_client=embed_sync, http_async_client=embed_async,
+    )
+    for quota in quotas.values():
+        quota.reset()
+
+    latencies = {"interactive": [], "batch": [], "ingest": []}
+    failures = {"interactive": 0, "batch": 0, "ingest": 0}
+
+    async def chat_call(i: int, priority: str) -> None:
+        t0 = time.perf_counter()
+        try:
+            with request_priority(priority):
+                await llm.ainvoke(f"pitch #{i}")
+            latencies[priority].append(time.perf_counter() - t0)
+        except Exception:
+            failures[priority] += 1
+
+    def ingest_batch(i: int) -> None:
+        t0 = time.perf_counter()
+        try:
+            with request_priority("ingest"):
+                embeddings.embed_documents([f"title {i}-{j}" for j in range(16)])
+            latencies["ingest"].append(time.perf_counter() - t0)
+        except Exception:
+            failures["ingest"] += 1
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.ingest_workers) as pool:
+        ingest = [asyncio.get_running_loop().run_in_executor(pool, ingest_batch, i) for i in range(args.ingest)]
+        # batch traffic arrives first, interactive lands on an already saturated queue
+        batch = [asyncio.create_task(chat_call(i, "batch")) for i in range(args.batch)]
+        await asyncio.sleep(0.05)
+        interactive = []
+        for i in range(args.interactive):
+            interactive.append(asyncio.create_task(chat_call(i, "interactive")))
+            await asyncio.sleep(args.interactive_gap)
+        await asyncio.gather(*batch, *interactive, *ingest)
+    wall = time.perf_counter() - t0
+
+    chat_sync.close()
+    embed_sync.close()
+    await chat_async.aclose()
+    await embed_async.aclose()
+
+    return {
+        "wall_s": wall,
+        "served": {k: q.served for k, q in quotas.items()},
+        "rejected_429": {k: q.rejected for k, q in quotas.items()},
+        "failures": failures,
+        "latency": {
+            p: {"p50": _percentile(v, 0.5), "p95": _percentile(v, 0.95), "mean": statistics.fmean(v) if v else 0.0}
+            for p, v in latencies.items()
+        },
+        "limiter": {
+            "chat": chat_limiter.stats() if chat_limiter else None,
+            "embeddings": embed_limiter.stats() if embed_limiter else None,
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Adaptive rate limiter vs a 429-returning fake OpenAI server.")
+    parser.add_argument("--interactive", type=int, default=40, help="interactive chat calls")
+    parser.add_argument("--batch", type=int, default=80, help="batch chat calls (all submitted at once)")
+    parser.add_argument("--ingest", type=int, default=20, help="ingest embedding batches (16 texts each)")
+    parser.add_argument("--ingest-workers", type=int, default=8)
+    parser.add_argument("--interactive-gap", type=float, default=0.02, help="seconds between interactive arrivals")
+    parser.add_argument("--latency", type=float, default=0.05, help="fake server seconds per successful call")
+    parser.add_argument("--server-rps", type=int, default=60, help="server quota per endpoint, requests/s")
+    parser.add_argument("--server-concurrency", type=int, default=6, help="server quota per endpoint, in flight")
+    parser.add_argument("--max-concurrency", type=int, default=32, help="limiter concurrency ceiling")
+    parser.add_argument("--sdk-retries", type=int, default=2, help="OpenAI SDK max_retries")
+    parser.add_argument("--dim", type=int, default=64, help="fake embedding dimension")
+    parser.add_argument("--json", help="also write results to this file")
+    args = parser.parse_args()
+
+    quotas = {
+        "chat": _Quota(args.server_rps, args.server_concurrency),
+        "embeddings": _Quota(args.server_rps, args.server_concurrency),
+    }
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _make_handler(quotas, args.latency, args.dim))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}/v1"
+
+    try:
+        results = {
+            "off": asyncio.run(run_mode(args, base_url, quotas, limited=False)),
+            "on": asyncio.run(run_mode(args, base_url, quotas, limited=True)),
+        }
+    finally:
+        server.shutdown()
+
+    print(f"\n=== Fake server: {args.server_rps} req/s, {args.server_concurrency} concurrent per endpoint, "
+          f"{args.latency * 1000:.0f} ms per call ===")
+    for mode, r in results.items():
+        print(f"\n[limiter {mode}] wall {r['wall_s']:.2f}s | 429s chat {r['rejected_429']['chat']}, "
+              f"embeddings {r['rejected_429']['embeddings']} | failed calls {r['failures']}")
+        for priority, lat in r["latency"].items():
+            print(f"  {priority:<12} p50 {lat['p50'] * 1000:7.0f} ms | p95 {lat['p95'] * 1000:7.0f} ms")
+        for kind, stats in r["limiter"].items():
+            if stats:
+                print(f"  {kind} limiter: limit {stats['limit']} | rate_limited {stats['rate_limited']} | "
+                      f"mean wait {stats['mean_wait_ms']}")
+
+    if args.json:
+        with open(args.json, "w") as fh:
+            json.dump(results, fh, indent=2)
+        print(f"[INFO] Results written to {args.json}")
+
+    on = results["on"]
+    problems = []
+    if any(on["failures"].values()):
+        problems.append(f"calls failed with the limiter on: {on['failures']}")
+    if on["latency"]["interactive"]["p50"] > on["latency"]["batch"]["p50"]:
+        problems.append("interactive calls were not served ahead of batch calls")
+    for problem in problems:
+        print(f"[ERROR] {problem}")
+    if problems:
+        sys.exit(1)
+    print("[INFO] No lost calls with the limiter on; interactive traffic served first.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Dense vs lexical vs hybrid retrieval on a labelled query set.
+
+The catalog is ingested into a temporary NumPy index with the offline
+hashing embeddings, then every query in benchmarks/data/labelled_queries.json
+is run through retrieve_similar_titles in each mode. Reports p50 / p95
+latency, recall@5, recall@10 and MRR per mode. --embed-latency adds a
+simulated embedding round-trip so the zero-network lexical path can be
+compared against realistic dense timings.
+
+    python -m benchmarks.retrieval_modes --embed-latency 0.05
+"""
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-offline-benchmark")
+
+from benchmarks.fakes import install_fake_embeddings
+
+DEFAULT_QUERIES = Path(__file__).parent / "data" / "labelled_queries.json"
+
+
+def _percentile(samples, q):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * q))] * 1000
+
+
+def bench_mode(mode: str, labelled, k: int):
+    from app.rag.retriever import retrieve_similar_titles
+
+    latencies, ranks = [], []
+    for item in labelled:
+        t0 = time.perf_counter()
+        docs = retrieve_similar_titles(item["query"], k=k, mode=mode)
+        latencies.append(time.perf_counter() - t0)
+
+        found = [d.metadata.get("show_id") for d in docs]
+        relevant = set(item["relevant"])
+        ranks.append(next((i + 1 for i, doc_id in enumerate(found) if doc_id in relevant), None))
+
+    def recall_at(n):
+        return sum(1 for r in ranks if r is not None and r <= n) / len(ranks)
+
+    return {
+        "mode": mode,
+        "p50_ms": _percentile(latencies, 0.5),
+        "p95_ms": _percentile(latencies, 0.95),
+        "mean_ms": statistics.fmean(latencies) * 1000,
+        "recall@5": recall_at(5),
+        "recall@10": recall_at(10),
+        "mrr": sum(1 / r for r in ranks if r) / len(ranks),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Dense / lexical / hybrid retrieval benchmark.")
+    parser.add_argument("--queries", type=Path, default=DEFAULT_QUERIES, help="labelled query set (JSON)")
+    parser.add_argument("--dim", type=int, default=512, help="fake embedding dimension")
+    parser.add_argument("--embed-latency", type=float, default=0.0, help="simulated seconds per embedding call")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--modes", nargs="+", default=["dense", "lexical", "hybrid"])
+    parser.add_argument("--json", type=Path, help="also write results to this file")
+    args = parser.parse_args()
+
+    labelled = json.loads(args.queries.read_text())
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        os.environ["VECTOR_BACKEND"] = "numpy"
+        os.environ["NUMPY_INDEX_DIR"] = str(Path(tmpdir) / "numpy_index")
+        fake = install_fake_embeddings(size=args.dim)
+
+        from app.rag.ingest import run_ingest
+
+        run_ingest(incremental=False)
+        # the ingest calls were free; only queries pay the simulated round-trip,
+        # and each query is embedded once per mode (the cache would hide it)
+        fake.latency = args.embed_latency
+        from app.rag import vectorstore
+        vectorstore._embeddings.cache.max_entries = 0
+
+        results = [bench_mode(mode, labelled, args.k) for mode in args.modes]
+
+    print(f"\n=== Retrieval modes ({len(labelled)} labelled queries, k={args.k}) ===")
+    for r in results:
+        print(f"[{r['mode']:<7}] p50 {r['p50_ms']:8.2f} ms | p95 {r['p95_ms']:8.2f} ms | "
+              f"recall@5 {r['recall@5']:.2f} | recall@10 {r['recall@10']:.2f} | MRR {r['mrr']:.3f}")
+
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=2))
+        print(f"[INFO] Results written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Saturation-level spread check on data/raw/netflix_titles.csv.
+
+Builds the catalog analytics straight from the CSV (no embeddings, so
+density is left out and the score uses size and growth only), scores every
+non-empty genre x type segment the way the competitive agent does, and
+reports how the levels are distributed. Exits non-zero when any of high /
+medium / low is missing or a single level takes more than --max-share of
+the segments, i.e. when the score no longer discriminates.
+
+    python -m benchmarks.saturation_spread
+    python -m benchmarks.saturation_spread --max-share 0.6 --show 5
+"""
+import argparse
+import sys
+from collections import Counter
+
+from app.rag.analytics import SATURATION_LEVELS, CatalogAnalytics
+from app.rag.filters import TitleFilters
+from app.rag.ingest import _get_paths, _iter_rendered
+
+
+def load_analytics() -> CatalogAnalytics:
+    raw_dir, _ = _get_paths()
+    columns = {"ids": [], "countries": [], "types": [], "genres": [], "years": []}
+    timings = {"read": 0.0, "render": 0.0}
+    seen = set()
+    for ids, _, metadatas in _iter_rendered(raw_dir, 2000, timings):
+        for doc_id, meta in zip(ids, metadatas):
+            if doc_id in seen:
+                continue
+            seen.add(doc_id)
+            columns["ids"].append(doc_id)
+            columns["countries"].append(meta["country"])
+            columns["types"].append(meta["type"])
+            columns["genres"].append(meta["genres"])
+            columns["years"].append(meta["release_year"])
+    return CatalogAnalytics.build(**columns)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Saturation-level spread over genre x type segments.")
+    parser.add_argument("--max-share", type=float, default=2 / 3,
+                        help="fail when one level covers more than this share of segments")
+    parser.add_argument("--show", type=int, default=3, help="example segments printed per level")
+    args = parser.parse_args()
+
+    analytics = load_analytics()
+    scored = []
+    for genre in analytics.genre_vocab.tolist():
+        for type_ in analytics.type_vocab.tolist():
+            stats = analytics.segment(TitleFilters(genres=[genre], types=[type_]))
+            if stats["titles"]:
+                scored.append((genre, type_, stats["titles"], stats["saturation"]))
+
+    levels = Counter(sat["level"] for *_, sat in scored)
+    print(f"=== Saturation spread ({len(analytics)} titles, {len(scored)} genre x type segments) ===")
+    for _, level in SATURATION_LEVELS:
+        examples = sorted((s for s in scored if s[3]["level"] == level), key=lambda s: -s[2])[:args.show]
+        print(f"{level:<6}: {levels[level]:3d} ({levels[level] / len(scored):.0%})  "
+              + "; ".join(f"{g} / {t}: {n} titles, score {sat['score']}" for g, t, n, sat in examples))
+
+    missing = [level for _, level in SATURATION_LEVELS if not levels[level]]
+    dominant = [level for level, count in levels.items() if count / len(scored) > args.max_share]
+    if missing or dominant:
+        print(f"[FAIL] levels missing: {missing or 'none'}; above {args.max_share:.0%}: {dominant or 'none'}")
+        sys.exit(1)
+    print("[OK] saturation levels spread across high / medium / low.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Throughput of the local sentiment pipeline (models/imdb_sentiment_pipeline.joblib).
+
+Scores catalog descriptions, replicated up to each batch size, in-process
+and through the process pool, and reports texts/sec. Needs scikit-learn
+and joblib (requirements.txt); no network.
+
+    python -m benchmarks.sentiment_throughput --sizes 1000 10000 50000 --workers 1 4
+"""
+import argparse
+import json
+import os
+import time
+from pathlib import Path
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-offline-benchmark")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sentiment pipeline throughput benchmark.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 50000])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, os.cpu_count() or 1])
+    parser.add_argument("--repeats", type=int, default=3, help="best-of-N per configuration")
+    parser.add_argument("--json", type=Path, help="also write results to this file")
+    args = parser.parse_args()
+
+    # every batch is eligible for the pool; workers=1 keeps it in-process
+    os.environ["SENTIMENT_POOL_MIN"] = "1"
+
+    import pandas as pd
+    from app.agents.sentiment import SentimentModel
+    from app.rag.ingest import _get_paths
+
+    raw_dir, _ = _get_paths()
+    corpus = pd.read_csv(
+        raw_dir / "netflix_titles.csv", encoding="latin-1", usecols=["description"]
+    )["description"].dropna().astype(str).tolist()
+
+    t0 = time.perf_counter()
+    model = SentimentModel()
+    load_s = time.perf_counter() - t0
+
+    results = []
+    for size in args.sizes:
+        texts = (corpus * (size // len(corpus) + 1))[:size]
+        for workers in args.workers:
+            model.positive_proba(texts[:64], workers=workers)  # warm the pool
+            best = float("inf")
+            for _ in range(args.repeats):
+                t0 = time.perf_counter()
+                model.positive_proba(texts, workers=workers)
+                best = min(best, time.perf_counter() - t0)
+            results.append({
+                "texts": size,
+                "workers": workers,
+                "seconds": best,
+                "texts_per_sec": size / best,
+            })
+    model.close()
+
+    print(f"\n=== Sentiment throughput (model load {load_s:.2f}s) ===")
+    for r in results:
+        print(f"{r['texts']:>7} texts | workers {r['workers']:>2} | "
+              f"{r['seconds']:7.3f}s | {r['texts_per_sec']:>10,.0f} texts/s")
+
+    if args.json:
+        args.json.write_text(json.dumps({"load_s": load_s, "results": results}, indent=2))
+        print(f"[INFO] Results written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
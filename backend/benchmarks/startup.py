@@ -0,0 +1,149 @@
+"""
+Cold-start budget: import time, time to ready and first-request latency.
+
+Every measurement runs in a fresh interpreter, as an autoscaled pod would.
+The catalog is ingested once into a temporary NumPy index with the offline
+hashing embeddings; each child process then
+
+1. times `import app.main`,
+2. installs the fakes (after the import, so they do not pre-load anything),
+3. enters the app lifespan with the given WARMUP mode and polls /readyz,
+4. times the first and the second POST /api/chat.
+
+WARMUP=off is the lazy behaviour (the first request opens the index and
+compiles the graph); blocking and background pay that during startup. The
+script exits non-zero when the median import time or the median first
+request of a warmed mode exceeds its budget, so it can gate CI.
+
+    python -m benchmarks.startup --runs 5 --import-budget 1.0 --first-request-budget 0.25
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-offline-benchmark")
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+
+
+def child(args) -> None:
+    t0 = time.perf_counter()
+    from app.main import app
+    import_s = time.perf_counter() - t0
+
+    import asyncio
+    import httpx
+
+    from benchmarks.fakes import install_fake_embeddings, install_fake_llm
+
+    install_fake_embeddings(size=args.dim)
+    install_fake_llm(latency=args.llm_latency)
+
+    async def run():
+        out = {"import_s": import_s}
+        t_start = time.perf_counter()
+        async with app.router.lifespan_context(app):
+            out["lifespan_s"] = time.perf_counter() - t_start
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+                while (await client.get("/readyz")).status_code != 200:
+                    if time.perf_counter() - t_start > args.ready_timeout:
+                        raise SystemExit("readyz did not turn 200 in time")
+                    await asyncio.sleep(0.01)
+                out["ready_s"] = time.perf_counter() - t_start
+                for name in ("first_request_s", "second_request_s"):
+                    t0 = time.perf_counter()
+                    resp = await client.post("/api/chat", json={"message": "a heist thriller set in Madrid"})
+                    resp.raise_for_status()
+                    out[name] = time.perf_counter() - t0
+        return out
+
+    print(json.dumps(asyncio.run(run())))
+
+
+def _spawn(args, mode: str, env) -> dict:
+    cmd = [
+        sys.executable, "-m", "benchmarks.startup", "--child",
+        "--dim", str(args.dim), "--llm-latency", str(args.llm_latency),
+        "--ready-timeout", str(args.ready_timeout),
+    ]
+    proc = subprocess.run(
+        cmd, cwd=BACKEND_DIR, env=dict(env, WARMUP=mode),
+        capture_output=True, text=True, check=True,
+    )
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold-start import / readiness / first-request benchmark.")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--runs", type=int, default=3, help="fresh processes per warmup mode")
+    parser.add_argument("--modes", nargs="+", default=["off", "blocking", "background"])
+    parser.add_argument("--dim", type=int, default=1536, help="fake embedding dimension")
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="seconds per fake chat call")
+    parser.add_argument("--ready-timeout", type=float, default=60.0)
+    parser.add_argument("--import-budget", type=float, default=1.0, help="max median `import app.main` seconds")
+    parser.add_argument("--first-request-budget", type=float, default=0.25,
+                        help="max median first /api/chat seconds once ready (warmed modes)")
+    parser.add_argument("--json", type=Path, help="also write results to this file")
+    args = parser.parse_args()
+
+    if args.child:
+        child(args)
+        return
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        env = dict(
+            os.environ,
+            VECTOR_BACKEND="numpy",
+            NUMPY_INDEX_DIR=str(Path(tmpdir) / "numpy_index"),
+            PYTHONPATH=os.pathsep.join(filter(None, [str(BACKEND_DIR), os.environ.get("PYTHONPATH")])),
+        )
+        os.environ.update(VECTOR_BACKEND=env["VECTOR_BACKEND"], NUMPY_INDEX_DIR=env["NUMPY_INDEX_DIR"])
+        from benchmarks.fakes import install_fake_embeddings
+        from app.rag.ingest import run_ingest
+
+        install_fake_embeddings(size=args.dim)
+        run_ingest(incremental=False)
+
+        results = {}
+        for mode in args.modes:
+            runs = [_spawn(args, mode, env) for _ in range(args.runs)]
+            results[mode] = {key: statistics.median(r[key] for r in runs) for key in runs[0]}
+
+    print(f"\n=== Cold start (median of {args.runs} fresh processes) ===")
+    for mode, r in results.items():
+        print(f"[WARMUP={mode:<10}] import {r['import_s'] * 1000:6.0f} ms | lifespan {r['lifespan_s'] * 1000:6.0f} ms | "
+              f"ready {r['ready_s'] * 1000:6.0f} ms | first request {r['first_request_s'] * 1000:6.0f} ms | "
+              f"second {r['second_request_s'] * 1000:6.0f} ms")
+
+    failures = []
+    worst_import = max(r["import_s"] for r in results.values())
+    if worst_import > args.import_budget:
+        failures.append(f"import app.main took {worst_import:.3f}s (budget {args.import_budget:.3f}s)")
+    for mode, r in results.items():
+        if mode != "off" and r["first_request_s"] > args.first_request_budget:
+            failures.append(
+                f"first request with WARMUP={mode} took {r['first_request_s']:.3f}s "
+                f"(budget {args.first_request_budget:.3f}s)"
+            )
+
+    if args.json:
+        args.json.write_text(json.dumps({"results": results, "budget_failures": failures}, indent=2))
+        print(f"[INFO] Results written to {args.json}")
+
+    for failure in failures:
+        print(f"[ERROR] Over budget: {failure}")
+    if failures:
+        sys.exit(1)
+    print("[INFO] Within the import and first-request budgets.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,300 @@
+"""
+Offline benchmark suite: the whole backend with no OpenAI traffic.
+
+ChatOpenAI and OpenAIEmbeddings are replaced by the deterministic fakes in
+benchmarks.fakes, each with a configurable latency, and the catalog is
+ingested into a temporary index. Measured:
+
+- ingest      rows/sec per run_ingest stage on data/raw/netflix_titles.csv
+- retrieval   search latency per mode at several k (query embeddings are
+              pre-warmed, so only the index is timed)
+- endpoints   /api/chat and /api/analyze_title latency percentiles and
+              throughput at increasing client concurrency
+- memory      resident set size after each stage, plus the peak
+
+Everything is written as JSON (benchmarks/results/suite-<timestamp>.json by
+default). Pass --baseline with an earlier file to print the change of every
+metric, so regressions show up run to run. The response cache and node
+memoization are disabled so every request does the full work.
+
+    python -m benchmarks.suite --llm-latency 0.2 --concurrency 1 8 32
+    python -m benchmarks.suite --baseline benchmarks/results/suite-20250101-120000.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-offline-benchmark")
+# measure the uncached pipeline; both layers would otherwise absorb repeats
+os.environ["RESPONSE_CACHE_THRESHOLD"] = "2"
+os.environ["NODE_MEMO_BACKEND"] = "off"
+
+from benchmarks.fakes import install_fake_embeddings, install_fake_llm
+
+RESULTS_DIR = Path(__file__).parent / "results"
+
+
+def _rss_mb() -> float:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1e6
+    except (OSError, ValueError):
+        return 0.0
+
+
+def _peak_rss_mb() -> float:
+    # ru_maxrss is KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _latency_stats(samples):
+    samples = sorted(samples)
+    if not samples:
+        return {}
+
+    def pct(q):
+        return samples[min(len(samples) - 1, int(len(samples) * q))] * 1000
+
+    return {
+        "p50_ms": pct(0.50),
+        "p95_ms": pct(0.95),
+        "p99_ms": pct(0.99),
+        "mean_ms": statistics.fmean(samples) * 1000,
+        "max_ms": samples[-1] * 1000,
+    }
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True, cwd=Path(__file__).parent,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def bench_ingest(args):
+    from app.rag.ingest import run_ingest
+
+    summary = run_ingest(incremental=False)
+    rows, timings = summary["rows"], summary["timings"]
+    return {
+        "rows": rows,
+        "seconds": timings,
+        "rows_per_sec": {
+            stage: rows / secs for stage, secs in timings.items() if secs and stage != "side_indexes"
+        },
+    }
+
+
+def bench_retrieval(args, queries):
+    from app.rag import vectorstore
+    from app.rag.retriever import retrieve_similar_titles
+
+    vectorstore.get_embeddings().embed_documents(queries)  # warm the embedding cache
+
+    out = {}
+    for mode in args.modes:
+        for k in args.k:
+            samples = []
+            for q in queries:
+                t0 = time.perf_counter()
+                retrieve_similar_titles(q, k=k, mode=mode)
+                samples.append(time.perf_counter() - t0)
+            out[f"{mode}@k={k}"] = _latency_stats(samples)
+    return out
+
+
+async def _drive(client, path, payloads, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, errors, first_error = [], 0, None
+
+    async def one(payload):
+        nonlocal errors, first_error
+        async with semaphore:
+            t0 = time.perf_counter()
+            resp = await client.post(path, json=payload)
+            if resp.status_code != 200:
+                errors += 1
+                first_error = first_error or f"{resp.status_code} {resp.text[:200]}"
+            latencies.append(time.perf_counter() - t0)
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(one(p) for p in payloads))
+    wall = time.perf_counter() - t0
+    return {
+        "requests": len(payloads),
+        "errors": errors,
+        "first_error": first_error,
+        "wall_s": wall,
+        "throughput_rps": len(payloads) / wall,
+        "latency": _latency_stats(latencies),
+    }
+
+
+async def bench_endpoints(args, concepts, llm_stats):
+    import httpx
+
+    from app.main import app
+
+    endpoints = {
+        "/api/chat": lambda i, c: {"message": f"{c} (variant {i})"},
+        "/api/analyze_title": lambda i, c: {
+            "title_name": f"Pitch {i}", "description": c, "target_regions": ["Europe"],
+        },
+    }
+    out = {}
+    # the lifespan (runtime, sentiment model) is entered explicitly, as uvicorn would
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+            run = 0
+            for path, make in endpoints.items():
+                out[path] = {}
+                for concurrency in args.concurrency:
+                    n = max(args.min_requests, concurrency * args.rounds)
+                    payloads = [make(run + i, concepts[(run + i) % len(concepts)]) for i in range(n)]
+                    run += n
+                    llm_stats.peak_in_flight = 0
+                    result = await _drive(client, path, payloads, concurrency)
+                    result["peak_llm_in_flight"] = llm_stats.peak_in_flight
+                    out[path][f"c={concurrency}"] = result
+    return out
+
+
+def _flatten(prefix, value, out):
+    if isinstance(value, dict):
+        for key, sub in value.items():
+            _flatten(f"{prefix}.{key}" if prefix else str(key), sub, out)
+    elif isinstance(value, (int, float)) and not isinstance(value, bool):
+        out[prefix] = float(value)
+    return out
+
+
+def compare(current, baseline, min_change: float = 0.05):
+    """
+    Print every shared metric whose value moved by more than `min_change`.
+    """
+    cur = _flatten("", {k: current.get(k, {}) for k in ("ingest", "retrieval", "endpoints", "memory")}, {})
+    base = _flatten("", {k: baseline.get(k, {}) for k in ("ingest", "retrieval", "endpoints", "memory")}, {})
+    print(f"\n=== Changes vs baseline ({baseline.get('meta', {}).get('git_commit', '?')}) ===")
+    shown = 0
+    for key in sorted(cur.keys() & base.keys()):
+        old, new = base[key], cur[key]
+        if old and abs(new - old) / abs(old) > min_change:
+            print(f"{key:<60} {old:>12.2f} -> {new:>12.2f}  ({(new - old) / abs(old):+.1%})")
+            shown += 1
+    if not shown:
+        print(f"[INFO] No metric moved by more than {min_change:.0%}.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline benchmark suite with stubbed OpenAI backends.")
+    parser.add_argument("--llm-latency", type=float, default=0.2, help="seconds per fake chat call")
+    parser.add_argument("--llm-jitter", type=float, default=0.0, help="+- uniform jitter on the chat latency")
+    parser.add_argument("--embed-latency", type=float, default=0.05, help="seconds per fake embedding call")
+    parser.add_argument("--dim", type=int, default=1536, help="fake embedding dimension")
+    parser.add_argument("--backend", choices=["numpy", "chroma"], default="numpy")
+    parser.add_argument("--k", type=int, nargs="+", default=[5, 10, 50])
+    parser.add_argument("--modes", nargs="+", default=["dense", "lexical", "hybrid"])
+    parser.add_argument("--queries", type=int, default=200, help="retrieval queries per (mode, k)")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16, 64])
+    parser.add_argument("--rounds", type=int, default=4, help="requests per level = concurrency * rounds")
+    parser.add_argument("--min-requests", type=int, default=16)
+    parser.add_argument("--skip", nargs="*", default=[], choices=["retrieval", "endpoints"])
+    parser.add_argument("--output", type=Path, help="JSON results file")
+    parser.add_argument("--baseline", type=Path, help="earlier results file to compare against")
+    args = parser.parse_args()
+
+    memory = {"start_mb": _rss_mb()}
+    results = {
+        "meta": {
+            "started_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "git_commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "args": {k: (str(v) if isinstance(v, Path) else v) for k, v in vars(args).items()},
+        },
+    }
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        tmp = Path(tmpdir)
+        os.environ["VECTOR_BACKEND"] = args.backend
+        os.environ["CHROMA_DIR"] = str(tmp / "chroma")
+        os.environ["NUMPY_INDEX_DIR"] = str(tmp / "numpy_index")
+        fake = install_fake_embeddings(size=args.dim, latency=args.embed_latency)
+        llm_stats = install_fake_llm(latency=args.llm_latency, jitter=args.llm_jitter)
+
+        import pandas as pd
+        from app.rag.ingest import _get_paths
+
+        raw_dir, _ = _get_paths()
+        descriptions = pd.read_csv(
+            raw_dir / "netflix_titles.csv", encoding="latin-1", usecols=["description"]
+        )["description"].dropna().astype(str)
+        queries = descriptions.sample(args.queries, random_state=0).tolist()
+        concepts = descriptions.sample(min(len(descriptions), 2000), random_state=1).tolist()
+
+        results["ingest"] = bench_ingest(args)
+        memory["after_ingest_mb"] = _rss_mb()
+
+        if "retrieval" not in args.skip:
+            results["retrieval"] = bench_retrieval(args, queries)
+            memory["after_retrieval_mb"] = _rss_mb()
+
+        if "endpoints" not in args.skip:
+            results["endpoints"] = asyncio.run(bench_endpoints(args, concepts, llm_stats))
+            memory["after_endpoints_mb"] = _rss_mb()
+
+        results["fakes"] = {"embedding_calls": fake.calls, "llm_calls": llm_stats.calls}
+
+    # statm and ru_maxrss count slightly differently; report the larger
+    memory["peak_mb"] = max(_peak_rss_mb(), *memory.values())
+    results["memory"] = memory
+
+    ingest = results["ingest"]
+    print("\n=== Benchmark suite ===")
+    print(f"[ingest] {ingest['rows']} rows in {ingest['seconds']['total']:.2f}s "
+          f"({ingest['rows_per_sec']['total']:,.0f} rows/s)")
+    for key, lat in results.get("retrieval", {}).items():
+        print(f"[retrieval] {key:<16} p50 {lat['p50_ms']:8.3f} ms | p95 {lat['p95_ms']:8.3f} ms")
+    for path, levels in results.get("endpoints", {}).items():
+        for level, r in levels.items():
+            print(f"[{path}] {level:<5} {r['throughput_rps']:7.1f} req/s | "
+                  f"p50 {r['latency']['p50_ms']:7.0f} ms | p95 {r['latency']['p95_ms']:7.0f} ms | "
+                  f"p99 {r['latency']['p99_ms']:7.0f} ms | errors {r['errors']}")
+    print(f"[memory] " + " | ".join(f"{k} {v:.0f}" for k, v in memory.items()))
+
+    output = args.output or RESULTS_DIR / f"suite-{time.strftime('%Y%m%d-%H%M%S')}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(results, indent=2))
+    print(f"[INFO] Results written to {output}")
+
+    if args.baseline:
+        compare(results, json.loads(args.baseline.read_text()))
+
+    # latencies of failed requests are not a benchmark; a run with errors is a failed run
+    failed = [
+        f"{path} {level}: {r['errors']} errors (first: {r['first_error']})"
+        for path, levels in results.get("endpoints", {}).items()
+        for level, r in levels.items()
+        if r["errors"]
+    ]
+    if failed:
+        print("[FAIL] " + "\n[FAIL] ".join(failed))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
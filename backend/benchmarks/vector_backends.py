@@ -0,0 +1,128 @@
+"""
+Chroma vs NumPy vector-store benchmark on data/raw/netflix_titles.csv.
+
+Both backends are built by run_ingest with the same offline hashing
+embeddings, then searched with precomputed query vectors so only the index
+itself is timed. Reports build time, on-disk size, resident memory added by
+opening the index (Chroma's client is already warm from the build, so its
+figure is a lower bound), per-query latency at several k, and batched
+multi-query throughput for the NumPy backend.
+
+    python -m benchmarks.vector_backends --dim 1536 --queries 200
+"""
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-offline-benchmark")
+
+from benchmarks.fakes import install_fake_embeddings
+
+
+def _rss_mb() -> float:
+    """
+    Current resident set size (Linux /proc; 0 elsewhere).
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / 1e6
+    except (OSError, ValueError):
+        return 0.0
+
+
+def _dir_mb(path: Path) -> float:
+    return sum(p.stat().st_size for p in path.rglob("*") if p.is_file()) / 1e6
+
+
+def _percentiles(samples):
+    samples = sorted(samples)
+    return {
+        "p50_ms": samples[len(samples) // 2] * 1000,
+        "p95_ms": samples[int(len(samples) * 0.95) - 1] * 1000,
+        "mean_ms": statistics.fmean(samples) * 1000,
+    }
+
+
+def bench_backend(backend: str, query_vectors, ks):
+    os.environ["VECTOR_BACKEND"] = backend
+    from app.rag.ingest import run_ingest
+    from app.rag.vectorstore import build_vectorstore, get_index_dir
+
+    t0 = time.perf_counter()
+    run_ingest(incremental=False)
+    build_s = time.perf_counter() - t0
+
+    rss_before = _rss_mb()
+    store = build_vectorstore()
+    store.similarity_search_by_vector(query_vectors[0], k=1)  # force index load
+    rss_after = _rss_mb()
+
+    result = {
+        "backend": backend,
+        "build_s": build_s,
+        "disk_mb": _dir_mb(get_index_dir()),
+        "rss_open_mb": rss_after - rss_before,
+        "latency": {},
+    }
+    for k in ks:
+        samples = []
+        for vec in query_vectors:
+            t0 = time.perf_counter()
+            store.similarity_search_by_vector(vec, k=k)
+            samples.append(time.perf_counter() - t0)
+        result["latency"][f"k={k}"] = _percentiles(samples)
+
+    if hasattr(store, "similarity_search_by_vectors"):
+        t0 = time.perf_counter()
+        store.similarity_search_by_vectors(query_vectors, k=10)
+        elapsed = time.perf_counter() - t0
+        result["batched_qps_k10"] = len(query_vectors) / elapsed
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Chroma vs NumPy vector-store benchmark.")
+    parser.add_argument("--dim", type=int, default=1536, help="embedding dimension")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, nargs="+", default=[5, 10, 50])
+    parser.add_argument("--backends", nargs="+", default=["chroma", "numpy"])
+    parser.add_argument("--json", type=Path, help="also write results to this file")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        tmp = Path(tmpdir)
+        os.environ["CHROMA_DIR"] = str(tmp / "chroma")
+        os.environ["NUMPY_INDEX_DIR"] = str(tmp / "numpy_index")
+        fake = install_fake_embeddings(size=args.dim)
+
+        import pandas as pd
+        from app.rag.ingest import _get_paths
+
+        raw_dir, _ = _get_paths()
+        titles = pd.read_csv(raw_dir / "netflix_titles.csv", encoding="latin-1", usecols=["description"])
+        queries = titles["description"].dropna().sample(args.queries, random_state=0).tolist()
+        query_vectors = fake.embed_documents(queries)
+
+        results = [bench_backend(b, query_vectors, args.k) for b in args.backends]
+
+    print("\n=== Vector backend benchmark ===")
+    for r in results:
+        print(f"[{r['backend']}] build {r['build_s']:.1f}s | disk {r['disk_mb']:.1f} MB | "
+              f"RSS on open +{r['rss_open_mb']:.1f} MB")
+        for k, lat in r["latency"].items():
+            print(f"    {k:<6} p50 {lat['p50_ms']:7.3f} ms | p95 {lat['p95_ms']:7.3f} ms")
+        if "batched_qps_k10" in r:
+            print(f"    batched k=10: {r['batched_qps_k10']:,.0f} queries/s")
+
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=2))
+        print(f"[INFO] Results written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()